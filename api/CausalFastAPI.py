@@ -1,24 +1,2776 @@
+import contextlib
+import copy
+import hashlib
+import json
 import logging
+import multiprocessing
+import os
+import pickle
+import re
+import sqlite3
+import tempfile
+import threading
+import time
 import typing
+import uuid
 import warnings
-from itertools import combinations
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, combinations
 
-import matplotlib
 import numpy as np
 import pandas as pd
 from pandas.api.types import is_numeric_dtype
 
-import networkx as nx
-from networkx import path_graph
+# dowhy, econml, sklearn, statsmodels, scipy.stats, networkx drawing and matplotlib are imported in the functions that use them:
+# together they cost seconds at import, and graph, EDA, SCM and store work needs none of them
 
-import statsmodels.api as sm
-from sklearn.preprocessing import PolynomialFeatures
-from sklearn.linear_model import LassoCV
-from sklearn.linear_model import LogisticRegressionCV
-from sklearn.ensemble import GradientBoostingRegressor
+_LOGGER = logging.getLogger(__name__)
 
-from dowhy import CausalModel
-from econml.inference import BootstrapInference
+class StageTiming(typing.NamedTuple):
+    stage: str
+    wall_seconds: float
+    cpu_seconds: float
+    peak_rss_mb: typing.Any
+    pid: int
+
+_RSS_INTERVAL = 0.005
+_PAGESIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else None
+
+def _currentrss():
+    # Resident set size right now in MB, read from /proc (None where there is no /proc)
+    try:
+        with open('/proc/self/statm') as handle:
+            return int(handle.read().split()[1]) * _PAGESIZE / 2**20
+    except (OSError, ValueError, IndexError, TypeError):
+        return None
+
+class _RssSampler:
+    # While any stage is open one daemon thread samples the resident set size every few milliseconds and raises the peak
+    # of every open stage, so nested and back-to-back stages each get their own peak instead of the process high-water mark
+    def __init__(self, interval=_RSS_INTERVAL):
+        self.interval = interval
+        self._reset()
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._peaks = {}
+        self._thread = None
+
+    def start(self):
+        rss = _currentrss()
+        if rss is None:
+            return None
+        token = object()
+        with self._lock:
+            self._peaks[token] = rss
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='causalfast-rss', daemon=True)
+                self._thread.start()
+        return token
+
+    def stop(self, token):
+        if token is None:
+            return None
+        rss = _currentrss()
+        with self._lock:
+            peak = self._peaks.pop(token)
+        return peak if rss is None else max(peak, rss)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            rss = _currentrss()
+            with self._lock:
+                if len(self._peaks) == 0:
+                    self._thread = None
+                    return
+                for token, peak in self._peaks.items():
+                    self._peaks[token] = max(peak, rss)
+
+_RSS_SAMPLER = _RssSampler()
+if hasattr(os, 'register_at_fork'):
+    # A forked refuter worker has no sampler thread and may inherit a held lock
+    os.register_at_fork(after_in_child=_RSS_SAMPLER._reset)
+
+@contextlib.contextmanager
+def _timed(name, timings):
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    token = _RSS_SAMPLER.start()
+    try:
+        yield
+    finally:
+        timings.append(StageTiming(stage=name, wall_seconds=time.perf_counter() - wall, cpu_seconds=time.process_time() - cpu,
+                                   peak_rss_mb=_RSS_SAMPLER.stop(token), pid=os.getpid()))
+
+class JsonLinesSink:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        line = json.dumps(event, default=str)
+        with self._lock:
+            with open(self.path, 'a') as handle:
+                handle.write(line + '\n')
+
+class Instrument:
+    # Records wall time, CPU time and peak RSS per stage and emits one structured event per stage
+    # to the module logger (DEBUG) and to an optional sink: a callable or a JSON-lines file path.
+    def __init__(self, sink=None, run=None):
+        if isinstance(sink, (str, os.PathLike)):
+            sink = JsonLinesSink(sink)
+        self.sink = sink
+        self.run = run if run is not None else uuid.uuid4().hex
+        self.timings = []
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        timings = []
+        try:
+            with _timed(name, timings):
+                yield
+        finally:
+            self.record(timings[0])
+
+    def record(self, timing):
+        self.timings.append(timing)
+        event = dict(timing._asdict(), event='causalfast.stage', run=self.run, time=time.time())
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug(json.dumps(event, default=str))
+        if self.sink is not None:
+            self.sink(event)
+
+    def summary(self, first=0):
+        return {timing.stage: timing for timing in self.timings[first:]}
+
+def _instrument(instrument):
+    if isinstance(instrument, Instrument):
+        return instrument
+    return Instrument(sink=instrument)
+
+class RefutationResult(typing.NamedTuple):
+    refuter: str
+    refutation_type: str
+    estimated_effect: typing.Any
+    new_effect: typing.Any
+    is_statistically_significant: typing.Any
+    p_value: typing.Any
+    random_seed: int
+    timing: typing.Any = None
+
+def _refuterplan(estimandcheck, bootstrap='dowhy'):
+    # random_common_cause is skipped for iv: adding a confounder of treatment and outcome breaks the instrument
+    plan = []
+    if estimandcheck != 'iv':
+        plan.append(('random_common_cause', {}))
+    plan.append(('data_subset_refuter', {'subset_fraction':0.9}))
+    plan.append(('placebo_treatment_refuter', {'placebo_type':'permute'}))
+    plan.append(('bootstrap_refuter', {'native':bootstrap == 'native'}))
+    return plan
+
+def _refuterseeds(random_seed, count):
+    # One child seed per refuter position, so a refuter gets the same seed whatever the worker count
+    children = np.random.SeedSequence(random_seed).spawn(count)
+    return [int(child.generate_state(1)[0]) for child in children]
+
+def _runrefuter(cmodel, identified_estimand, estimate, method, kwargs, seed):
+    # bootstrap_refuter draws its noise from the global numpy generator, so it is seeded as well; the caller's
+    # global state is put back afterwards, since serial refuters run in the caller's process
+    kwargs = dict(kwargs)
+    native = kwargs.pop('native', False)
+    timings = []
+    state = np.random.get_state()
+    np.random.seed(seed)
+    try:
+        with _timed('refuter.' + method, timings):
+            if method == 'bootstrap_refuter' and native == True and _bootstrapspec(estimate, cmodel._data) is not None:
+                refutation_type, estimated_effect, new_effect, significant, p_value = _nativebootstrap(cmodel, estimate, kwargs, seed)
+            else:
+                refute_results = cmodel.refute_estimate(identified_estimand, estimate=estimate, method_name=method, random_state=seed, **kwargs)
+                refutation = refute_results.__dict__.get('refutation_result') or {}
+                refutation_type = refute_results.__dict__.get('refutation_type')
+                estimated_effect = refute_results.__dict__.get('estimated_effect')
+                new_effect = refute_results.__dict__.get('new_effect')
+                significant = refutation.get('is_statistically_significant')
+                p_value = refutation.get('p_value')
+    finally:
+        np.random.set_state(state)
+    return RefutationResult(refuter=method,
+                            refutation_type=refutation_type,
+                            estimated_effect=estimated_effect,
+                            new_effect=new_effect,
+                            is_statistically_significant=significant,
+                            p_value=p_value,
+                            random_seed=seed,
+                            timing=timings[0])
+
+_REFUTER_STATE = {}
+
+def _refuterinit(cmodel, identified_estimand, estimate):
+    # Runs once per worker; under fork the model and its data are inherited rather than pickled
+    _REFUTER_STATE['cmodel'] = cmodel
+    _REFUTER_STATE['identified_estimand'] = identified_estimand
+    _REFUTER_STATE['estimate'] = estimate
+
+def _refuterworker(method, kwargs, seed):
+    return _runrefuter(_REFUTER_STATE['cmodel'], _REFUTER_STATE['identified_estimand'], _REFUTER_STATE['estimate'], method, kwargs, seed)
+
+def _runrefuters(cmodel, identified_estimand, estimate, plan, seeds, workers=None):
+    if workers == -1:
+        workers = os.cpu_count() or 1
+    if workers is None or workers <= 1 or len(plan) <= 1:
+        return [_runrefuter(cmodel, identified_estimand, estimate, method, kwargs, seed) for (method, kwargs), seed in zip(plan, seeds)]
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+    else:
+        context = multiprocessing.get_context()
+    with ProcessPoolExecutor(max_workers=min(workers, len(plan)), mp_context=context,
+                             initializer=_refuterinit, initargs=(cmodel, identified_estimand, estimate)) as pool:
+        futures = [pool.submit(_refuterworker, method, kwargs, seed) for (method, kwargs), seed in zip(plan, seeds)]
+        return [future.result() for future in futures]
+
+# DoWhy's own estimators, which take need_conditional_estimates in method_params; EconML and CausalML ones do not
+_DOWHY_METHODS = ('backdoor.linear_regression', 'backdoor.generalized_linear_model', 'backdoor.propensity_score_stratification',
+                  'backdoor.propensity_score_matching', 'backdoor.propensity_score_weighting', 'backdoor.distance_matching',
+                  'backdoor.doubly_robust', 'iv.instrumental_variable', 'iv.regression_discontinuity', 'frontdoor.two_stage_regression')
+_BOOTSTRAP_METHODS = ('backdoor.linear_regression', 'backdoor.propensity_score_weighting')
+_BOOTSTRAP_WEIGHTINGS = ('ips_weight', 'ips_normalized_weight', 'ips_stabilized_weight')
+_BOOTSTRAP_BLOCK_BYTES = 1 << 27
+
+class BootstrapResult(typing.NamedTuple):
+    method_name: str
+    estimates: typing.Any
+    value: float
+    std_error: float
+    ci_lower: float
+    ci_upper: float
+    scheme: str
+    noise: float
+    random_seed: typing.Any
+
+def _bootstrapspec(estimate, data):
+    # Everything the vectorized replicates need from a fitted DoWhy estimate, or None when only DoWhy can refit it
+    from dowhy.causal_estimators.linear_regression_estimator import LinearRegressionEstimator
+    from dowhy.causal_estimators.propensity_score_weighting_estimator import PropensityScoreWeightingEstimator
+    from sklearn.linear_model import LogisticRegression
+    estimator = estimate.__dict__.get('estimator')
+    target = estimate.__dict__.get('target_estimand')
+    # Only the two supported estimators carry the private attributes read below (frontdoor and iv estimators do not)
+    if not isinstance(estimator, (LinearRegressionEstimator, PropensityScoreWeightingEstimator)):
+        return None
+    if target is None or len(target.treatment_variable) != 1:
+        return None
+    treatment = target.treatment_variable[0]
+    outcome = target.outcome_variable[0]
+    common_causes = list(estimator._observed_common_causes_names or [])
+    spec = {'treatment':treatment, 'outcome':outcome, 'common_causes':common_causes, 'modifiers':[],
+            'scale':estimate.treatment_value - estimate.control_value}
+    if type(estimator) is LinearRegressionEstimator:
+        spec['method_name'] = 'backdoor.linear_regression'
+        spec['modifiers'] = list(estimator._effect_modifier_names or [])
+    elif type(estimator) is PropensityScoreWeightingEstimator:
+        model = estimator.propensity_score_model
+        params = model.get_params() if type(model) is LogisticRegression else None
+        if (params is None or params['class_weight'] is not None or params['l1_ratio'] not in (None, 0)
+                or params['penalty'] not in (None, 'l2', 'deprecated') or estimator.weighting_scheme not in _BOOTSTRAP_WEIGHTINGS
+                or estimate.treatment_value != 1 or estimate.control_value != 0 or len(common_causes) == 0):
+            return None
+        spec['method_name'] = 'backdoor.propensity_score_weighting'
+        spec['penalty'] = 0.0 if params['penalty'] is None else 1.0 / params['C']
+        spec['fit_intercept'] = params['fit_intercept']
+        spec['bounds'] = (estimator.min_ps_score, estimator.max_ps_score)
+        spec['units'] = estimator._target_units if estimator._target_units in ('att', 'atc') else 'ate'
+    else:
+        return None
+    columns = list(dict.fromkeys([treatment, outcome] + common_causes + spec['modifiers']))
+    if any(not is_numeric_dtype(data[c]) for c in columns):
+        return None
+    spec['columns'] = columns
+    return spec
+
+def _bootols(block, weights, spec):
+    # Batched weighted least squares: one (features x features) system per replicate, solved together
+    ncommon = len(spec['common_causes'])
+    treatment = block[..., 0:1]
+    modifiers = block[..., 2 + ncommon:]
+    design = np.concatenate([np.ones_like(treatment), treatment, block[..., 2:2 + ncommon], treatment * modifiers], axis=2)
+    weighted = design * weights[..., None]
+    xtx = weighted.transpose(0, 2, 1) @ design
+    xty = weighted.transpose(0, 2, 1) @ block[..., 1:2]
+    params = (np.linalg.pinv(xtx, hermitian=True) @ xty)[..., 0]
+    effect = params[:, 1]
+    if modifiers.shape[2] > 0:
+        means = (modifiers * weights[..., None]).sum(axis=1) / weights.sum(axis=1)[:, None]
+        effect = effect + (params[:, 2 + ncommon:] * means).sum(axis=1)
+    return effect * spec['scale']
+
+def _bootipw(block, weights, spec):
+    # Batched Newton fits of the L2-penalised logistic propensity model (sklearn's objective), then the IPW contrast
+    treatment = block[..., 0]
+    outcome = block[..., 1]
+    design = block[..., 2:2 + len(spec['common_causes'])]
+    if spec['fit_intercept'] == True:
+        design = np.concatenate([np.ones_like(design[..., :1]), design], axis=2)
+    penalty = np.full(design.shape[2], spec['penalty'])
+    if spec['fit_intercept'] == True:
+        penalty[0] = 0.0
+    params = np.zeros(design.shape[::2])
+    for iteration in range(100):
+        scores = _sigmoid(np.einsum('bnp,bp->bn', design, params))
+        gradient = np.einsum('bnp,bn->bp', design, weights * (treatment - scores)) - penalty * params
+        hessian = (design * (weights * scores * (1 - scores))[..., None]).transpose(0, 2, 1) @ design + np.diag(penalty)
+        step = np.linalg.solve(hessian, gradient[..., None])[..., 0]
+        params += step
+        if np.max(np.abs(step)) < 1e-10:
+            break
+    scores = np.clip(_sigmoid(np.einsum('bnp,bp->bn', design, params)), spec['bounds'][0], spec['bounds'][1])
+    return _ipwcontrast(treatment, outcome, scores, spec['units'], weights)
+
+def _ipwcontrast(treatment, outcome, scores, units='ate', weights=1.0):
+    # DoWhy's ips/tips/cips weighted difference of means along the last axis; normalised and stabilised weights give the same ratio
+    if units == 'att':
+        unitweights = treatment + (1 - treatment) * scores / (1 - scores)
+    elif units == 'atc':
+        unitweights = treatment * (1 - scores) / scores + (1 - treatment)
+    else:
+        unitweights = treatment / scores + (1 - treatment) / (1 - scores)
+    unitweights = unitweights * weights
+    treated = (unitweights * treatment * outcome).sum(axis=-1) / (unitweights * treatment).sum(axis=-1)
+    control = (unitweights * (1 - treatment) * outcome).sum(axis=-1) / (unitweights * (1 - treatment)).sum(axis=-1)
+    return treated - control
+
+def _bootblock(array, spec, size, seed, noise, flips):
+    # Multinomial/Bayesian schemes reweight the shared rows; with noise the rows are drawn by index and perturbed
+    # the way DoWhy's bootstrap_refuter does (float columns + N(0, noise * std), boolean columns flipped)
+    rng = np.random.default_rng(seed)
+    rows = len(array)
+    if noise == 0:
+        if spec['scheme'] == 'bayesian':
+            weights = rng.standard_exponential((size, rows))
+            weights *= rows / weights.sum(axis=1, keepdims=True)
+        else:
+            weights = np.stack([np.bincount(rng.integers(0, rows, rows), minlength=rows) for _ in range(size)]).astype(np.float64)
+        block = np.broadcast_to(array, (size,) + array.shape)
+    else:
+        block = array[rng.integers(0, rows, (size, rows))]
+        weights = np.ones((size, rows))
+        for position, kind in spec['perturb']:
+            if kind == 'f':
+                scale = noise * block[:, :, position].std(axis=1, ddof=1)
+                block[:, :, position] += rng.normal(size=(size, rows)) * scale[:, None]
+            else:
+                flipped = rng.uniform(size=(size, rows)) < flips
+                block[:, :, position] = np.where(flipped, 1 - block[:, :, position], block[:, :, position])
+    if spec['method_name'] == 'backdoor.linear_regression':
+        return _bootols(block, weights, spec)
+    return _bootipw(block, weights, spec)
+
+_BOOTSTRAP_STATE = {}
+
+def _bootstrapinit(array, spec, noise, flips):
+    _BOOTSTRAP_STATE['array'] = array
+    _BOOTSTRAP_STATE['spec'] = spec
+    _BOOTSTRAP_STATE['noise'] = noise
+    _BOOTSTRAP_STATE['flips'] = flips
+
+def _bootstrapworker(size, seed):
+    return _bootblock(_BOOTSTRAP_STATE['array'], _BOOTSTRAP_STATE['spec'], size, seed, _BOOTSTRAP_STATE['noise'], _BOOTSTRAP_STATE['flips'])
+
+def bootstrapestimate(estimate, data, replicates=399, scheme='multinomial', noise=0.0, probability_of_change=None,
+                      confidence_level=0.95, random_seed=None, workers=None):
+    estimate = _fittedestimate(estimate)
+    spec = _bootstrapspec(estimate, data)
+    if spec is None:
+        raise ValueError('Native bootstrap supports ' + ', '.join(_BOOTSTRAP_METHODS) + ' with numeric columns and the default propensity model')
+    if scheme not in ('multinomial', 'bayesian'):
+        raise ValueError('Unknown bootstrap scheme: ' + repr(scheme) + " (use 'multinomial' or 'bayesian')")
+    spec['scheme'] = scheme
+    frame = data[spec['columns']]
+    # DoWhy perturbs the adjustment set and effect modifiers: float columns get noise, boolean columns are flipped
+    spec['perturb'] = [(position, frame[c].dtype.kind) for position, c in enumerate(spec['columns'])
+                       if position >= 2 and frame[c].dtype.kind in 'fb']
+    array = np.column_stack([frame[c].to_numpy(dtype=np.float64) for c in spec['columns']])
+    width = len(spec['columns']) + len(spec['modifiers']) + 1
+    blocksize = int(max(1, min(replicates, _BOOTSTRAP_BLOCK_BYTES // (8 * 4 * width * max(len(array), 1)))))
+    sizes = [min(blocksize, replicates - start) for start in range(0, replicates, blocksize)]
+    seeds = np.random.SeedSequence(random_seed).spawn(len(sizes))
+    flips = noise if probability_of_change is None else probability_of_change
+    if workers == -1:
+        workers = os.cpu_count() or 1
+    if workers is None or workers <= 1 or len(sizes) <= 1:
+        blocks = [_bootblock(array, spec, size, seed, noise, flips) for size, seed in zip(sizes, seeds)]
+    else:
+        if 'fork' in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context('fork')
+        else:
+            context = multiprocessing.get_context()
+        with ProcessPoolExecutor(max_workers=min(workers, len(sizes)), mp_context=context,
+                                 initializer=_bootstrapinit, initargs=(array, spec, noise, flips)) as pool:
+            blocks = list(pool.map(_bootstrapworker, sizes, seeds))
+    estimates = np.concatenate(blocks)
+    # Basic (reverse percentile) interval, indexed as in DoWhy's CausalEstimator bootstrap intervals
+    value = float(estimate.value)
+    variations = np.sort(estimates - value)
+    left = (1 - confidence_level) / 2
+    ci_lower = value - variations[int((1 - left) * len(variations))]
+    ci_upper = value - variations[int(left * len(variations))]
+    return BootstrapResult(method_name=spec['method_name'], estimates=estimates, value=value,
+                           std_error=float(np.std(estimates, ddof=1)), ci_lower=float(ci_lower), ci_upper=float(ci_upper),
+                           scheme=scheme, noise=noise, random_seed=random_seed)
+
+def _nativebootstrap(cmodel, estimate, kwargs, seed):
+    # Drop-in for DoWhy's bootstrap_refuter: same defaults (100 resamples, noise 0.1) and significance test
+    from dowhy.causal_refuter import test_significance
+    result = bootstrapestimate(estimate, cmodel._data, replicates=kwargs.get('num_simulations', 100), noise=kwargs.get('noise', 0.1),
+                               probability_of_change=kwargs.get('probability_of_change'), random_seed=seed)
+    significance = test_significance(estimate, result.estimates)
+    return ('Refute: Bootstrap Sample Dataset', estimate.value, float(np.mean(result.estimates)),
+            significance.get('is_statistically_significant'), significance.get('p_value'))
+
+def _modelgraph(cmodel):
+    graph = cmodel._graph
+    return getattr(graph, '_graph', graph)
+
+def _graphhash(graph):
+    # Hash of the parsed graph rather than the DOT text, so node/edge order and whitespace do not matter
+    nodes = sorted((str(node), str(attrs.get('observed', 'yes'))) for node, attrs in graph.nodes(data=True))
+    edges = sorted((str(a), str(b)) for a, b in graph.edges())
+    return hashlib.sha256(json.dumps([nodes, edges]).encode()).hexdigest()
+
+class EstimandCache:
+    def __init__(self, maxsize=128, cachedir=None):
+        self.maxsize = maxsize
+        self.cachedir = cachedir
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, cmodel, identifier):
+        import dowhy
+        parts = [_graphhash(_modelgraph(cmodel)), sorted(cmodel._treatment), sorted(cmodel._outcome),
+                 str(identifier), str(cmodel._estimand_type), dowhy.__version__]
+        return hashlib.sha256(json.dumps(parts).encode()).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        estimand = self._load(key)
+        if estimand is not None:
+            self.hits += 1
+            self._remember(key, estimand)
+            return estimand
+        self.misses += 1
+        return None
+
+    def put(self, key, estimand):
+        self._remember(key, estimand)
+        self._store(key, estimand)
+
+    def clear(self, disk=False):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+        if disk == True and self.cachedir is not None and os.path.isdir(self.cachedir):
+            for name in os.listdir(self.cachedir):
+                if name.endswith('.estimand'):
+                    os.remove(os.path.join(self.cachedir, name))
+
+    def _remember(self, key, estimand):
+        with self._lock:
+            self._entries[key] = estimand
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.cachedir, key + '.estimand')
+
+    def _load(self, key):
+        if self.cachedir is None or not os.path.exists(self._path(key)):
+            return None
+        try:
+            with open(self._path(key), 'rb') as handle:
+                estimand = pickle.load(handle)
+            # The file's mtime is its LRU position on disk
+            os.utime(self._path(key))
+            return estimand
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def _store(self, key, estimand):
+        if self.cachedir is None:
+            return
+        os.makedirs(self.cachedir, exist_ok=True)
+        # Write then rename, so concurrent processes never read a partial file
+        handle, temppath = tempfile.mkstemp(dir=self.cachedir, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as output:
+                pickle.dump(estimand, output, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temppath, self._path(key))
+        except BaseException:
+            if os.path.exists(temppath):
+                os.remove(temppath)
+            raise
+        self._evict()
+
+    def _evict(self):
+        # Same maxsize on disk as in memory: the least recently stored or loaded files go first
+        entries = []
+        for name in os.listdir(self.cachedir):
+            if name.endswith('.estimand'):
+                try:
+                    entries.append((os.stat(os.path.join(self.cachedir, name)).st_mtime_ns, name))
+                except FileNotFoundError:
+                    continue
+        for _, name in sorted(entries)[:max(0, len(entries) - self.maxsize)]:
+            try:
+                os.remove(os.path.join(self.cachedir, name))
+            except FileNotFoundError:
+                # Another process evicted it first
+                pass
+
+_ESTIMAND_CACHE = EstimandCache()
+
+def _identify(cmodel, identifier, cache=True):
+    # Models built by a CompiledGraph take its precomputed backdoor estimand in place of DoWhy's minimal-adjustment search
+    compiled = cmodel.__dict__.get('_causalfast_graph')
+    estimand_type = str(getattr(cmodel._estimand_type, 'value', cmodel._estimand_type))
+    if compiled is not None and identifier == 'minimal-adjustment' and estimand_type == 'nonparametric-ate':
+        identified_estimand = compiled.estimand(cmodel._treatment, cmodel._outcome, cmodel._graph.get_all_nodes(include_unobserved=False))
+        if identified_estimand is not None:
+            return copy.copy(identified_estimand)
+    if cache == False or _ESTIMAND_CACHE.maxsize <= 0:
+        return cmodel.identify_effect(proceed_when_unidentifiable=True, method_name=identifier)
+    key = _ESTIMAND_CACHE.key(cmodel, identifier)
+    identified_estimand = _ESTIMAND_CACHE.get(key)
+    if identified_estimand is None:
+        identified_estimand = cmodel.identify_effect(proceed_when_unidentifiable=True, method_name=identifier)
+        _ESTIMAND_CACHE.put(key, identified_estimand)
+    # estimate_effect sets identifier_method on the estimand, so callers get their own shallow copy
+    return copy.copy(identified_estimand)
+
+def _stablerepr(value, depth=0):
+    # repr without memory addresses, so equal method_params give equal store keys across sessions:
+    # sklearn estimators repr their params, other plain objects their class and attributes
+    if depth > 8:
+        return '...'
+    if isinstance(value, dict):
+        items = sorted(value.items(), key=lambda item: str(item[0]))
+        return '{' + ', '.join(repr(key) + ': ' + _stablerepr(item, depth + 1) for key, item in items) + '}'
+    if isinstance(value, (list, tuple)):
+        return '[' + ', '.join(_stablerepr(item, depth + 1) for item in value) + ']'
+    if hasattr(value, 'get_params') and not isinstance(value, type):
+        return type(value).__name__ + _stablerepr(value.get_params(deep=False), depth + 1)
+    text = repr(value)
+    if ' at 0x' in text and hasattr(value, '__dict__'):
+        return type(value).__module__ + '.' + type(value).__qualname__ + _stablerepr(vars(value), depth + 1)
+    return text
+
+class ResultStore:
+    # Simulator results in one SQLite file (WAL journal), shared by any number of processes on the machine.
+    # Each operation opens its own connection, so forked workers never share one; writers wait up to timeout seconds for the lock.
+    # max_age (seconds) expires entries; max_bytes evicts least recently read entries once the stored payloads exceed it
+    def __init__(self, path, max_age=None, max_bytes=None, timeout=30.0):
+        self.path = os.fspath(path)
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with contextlib.closing(self._connect()) as connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, created REAL, accessed REAL, '
+                               'size INTEGER, payload BLOB)')
+            connection.execute('CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)')
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def key(self, parts):
+        return hashlib.sha256(_stablerepr(parts).encode()).hexdigest()
+
+    def get(self, key):
+        now = time.time()
+        with contextlib.closing(self._connect()) as connection:
+            row = connection.execute('SELECT created, payload FROM results WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            if self.max_age is not None and now - row[0] > self.max_age:
+                connection.execute('DELETE FROM results WHERE key = ?', (key,))
+                return None
+            connection.execute('UPDATE results SET accessed = ? WHERE key = ?', (now, key))
+        try:
+            return pickle.loads(row[1])
+        except Exception:
+            _LOGGER.warning('Unreadable stored result %s ignored', key)
+            return None
+
+    def put(self, key, result):
+        try:
+            payload = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as error:
+            _LOGGER.warning('Result not stored: %r', error)
+            return False
+        now = time.time()
+        with contextlib.closing(self._connect()) as connection:
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                connection.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)', (key, now, now, len(payload), sqlite3.Binary(payload)))
+                self._evict(connection, now)
+                connection.execute('COMMIT')
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+        return True
+
+    def _evict(self, connection, now):
+        if self.max_age is not None:
+            connection.execute('DELETE FROM results WHERE created < ?', (now - self.max_age,))
+        if self.max_bytes is not None:
+            total = 0
+            stale = []
+            for key, size in connection.execute('SELECT key, size FROM results ORDER BY accessed DESC'):
+                total += size
+                if total > self.max_bytes:
+                    stale.append((key,))
+            connection.executemany('DELETE FROM results WHERE key = ?', stale)
+
+    def evict(self):
+        with contextlib.closing(self._connect()) as connection:
+            connection.execute('BEGIN IMMEDIATE')
+            self._evict(connection, time.time())
+            connection.execute('COMMIT')
+
+    def clear(self):
+        with contextlib.closing(self._connect()) as connection:
+            connection.execute('DELETE FROM results')
+
+    def __len__(self):
+        with contextlib.closing(self._connect()) as connection:
+            return connection.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+def _resultstore(store):
+    # ResultStore has a length, so an empty store is falsy and must not be tested for truth
+    if store is None or store is False:
+        return None
+    if isinstance(store, ResultStore):
+        return store
+    return ResultStore(store)
+
+class EstimandKind(typing.NamedTuple):
+    kind: str
+    variables: list
+
+_ESTIMAND_KINDS = [('backdoor', 'get_backdoor_variables'),
+                   ('iv', 'get_instrumental_variables'),
+                   ('frontdoor', 'get_frontdoor_variables')]
+
+def classifyestimand(identified_estimand):
+    # Reads the identified estimand sets directly instead of rendering the sympy expressions
+    estimands = identified_estimand.__dict__.get('estimands') or {}
+    kinds = []
+    for kind, getter in _ESTIMAND_KINDS:
+        if estimands.get(kind) is not None:
+            kinds.append(EstimandKind(kind=kind, variables=list(getattr(identified_estimand, getter)() or [])))
+    return kinds
+
+def _pickestimand(kinds, estimand='auto'):
+    names = [kind.kind for kind in kinds]
+    if estimand == 'auto':
+        return names[0] if len(names) > 0 else None
+    return estimand if estimand in names else None
+
+def _hashblock(digest, values):
+    # Contiguous numpy blocks are hashed straight from their buffer; object and extension blocks via pandas' value hashes
+    if isinstance(values.dtype, np.dtype) and not values.dtype.hasobject:
+        digest.update(np.ascontiguousarray(values.to_numpy()).view(np.uint8).reshape(-1))
+    else:
+        digest.update(pd.util.hash_pandas_object(values, index=False).to_numpy().view(np.uint8))
+
+def datafingerprint(data, blocks=16, blockrows=4096):
+    # Content fingerprint from column names, dtypes, shape and blocks of rows spread evenly over the frame (first and last included).
+    # Only the sampled rows are read, so edits elsewhere go unnoticed; blocks=None hashes every row
+    digest = hashlib.sha256()
+    digest.update(repr((data.shape, [str(c) for c in data.columns], [str(t) for t in data.dtypes])).encode())
+    rows = len(data)
+    if blocks is None or blocks * blockrows >= rows:
+        starts = [0]
+        blockrows = rows
+    else:
+        starts = np.unique(np.linspace(0, rows - blockrows, blocks).astype(np.int64))
+    for position in range(data.shape[1]):
+        column = data.iloc[:, position]
+        for start in starts:
+            _hashblock(digest, column.iloc[start:start + blockrows])
+    return digest.hexdigest()
+
+_PROFILE_SUMMARIES = OrderedDict()
+_PROFILE_SUMMARIES_MAXSIZE = 32
+
+class DataProfile:
+    # Column stats computed once per data object and reused by estimator auto-selection.
+    # A different object, column set or shape invalidates it; in-place value edits are not tracked.
+    # Summaries are also kept by a full-content fingerprint, so an equal DataFrame (a reload of the same file) starts with them;
+    # the sampled fingerprint would hand an edited copy the stats of the original
+    def __init__(self, data):
+        self._ref = weakref.ref(data)
+        self._columns = tuple(data.columns)
+        self._shape = data.shape
+        self._fingerprint = None
+        self._summary = _PROFILE_SUMMARIES.get(self.fingerprint)
+        if self._summary is None:
+            self._summary = pd.DataFrame(columns=_EDA_COLUMNS)
+
+    @property
+    def fingerprint(self):
+        if self._fingerprint is None:
+            data = self._ref()
+            if data is None:
+                raise ValueError('The profiled data object no longer exists')
+            self._fingerprint = datafingerprint(data, blocks=None)
+        return self._fingerprint
+
+    def valid(self, data):
+        return self._ref() is data and tuple(data.columns) == self._columns and data.shape == self._shape
+
+    def summary(self, columns=None):
+        data = self._ref()
+        columns = list(self._columns) if columns is None else columns
+        missing = [c for c in columns if c not in self._summary.index]
+        if len(missing) > 0:
+            if data is None:
+                raise ValueError('The profiled data object no longer exists')
+            computed = edasummary(data[missing])
+            self._summary = computed if len(self._summary) == 0 else pd.concat([self._summary, computed])
+            _PROFILE_SUMMARIES[self.fingerprint] = self._summary
+            _PROFILE_SUMMARIES.move_to_end(self.fingerprint)
+            while len(_PROFILE_SUMMARIES) > _PROFILE_SUMMARIES_MAXSIZE:
+                _PROFILE_SUMMARIES.popitem(last=False)
+        return self._summary.loc[columns]
+
+    def isbinary(self, columns):
+        columns = columns if isinstance(columns, list) else [columns]
+        return bool(self.summary(columns)['binary'].all())
+
+def _profile(cmodel):
+    profile = cmodel.__dict__.get('_causalfast_profile')
+    if profile is None or not profile.valid(cmodel._data):
+        profile = DataProfile(cmodel._data)
+        cmodel._causalfast_profile = profile
+    return profile
+
+def _fingerprint(cmodel):
+    return _profile(cmodel).fingerprint
+
+class NuisanceCache:
+    # Fitted first-stage models keyed by a hash of the fit arrays and the model spec, least recently used evicted first.
+    # Within one process (and in refuter workers forked after the main estimate) a refit on identical inputs is a lookup
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._models = OrderedDict()
+
+    def key(self, estimator, arrays):
+        digest = hashlib.sha256()
+        digest.update(type(estimator).__module__.encode() + b'.' + type(estimator).__name__.encode())
+        digest.update(repr(sorted(estimator.get_params(deep=True).items(), key=lambda item: item[0])).encode())
+        for name, value in arrays:
+            digest.update(str(name).encode())
+            if value is None:
+                digest.update(b'None')
+                continue
+            value = np.ascontiguousarray(value)
+            digest.update(str((value.dtype.str, value.shape)).encode())
+            if value.dtype.hasobject:
+                digest.update(repr(value.tolist()).encode())
+            else:
+                digest.update(value.view(np.uint8).reshape(-1))
+        return digest.hexdigest()
+
+    def get(self, key):
+        model = self._models.get(key)
+        if model is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._models.move_to_end(key)
+        return model
+
+    def put(self, key, model):
+        self._models[key] = model
+        self._models.move_to_end(key)
+        while len(self._models) > self.maxsize:
+            self._models.popitem(last=False)
+
+    def clear(self):
+        self._models.clear()
+        self.hits = 0
+        self.misses = 0
+
+_NUISANCE_CACHE = NuisanceCache()
+
+class CachedModel:
+    # sklearn-clonable wrapper: EconML clones it per fold, and each clone looks its fit up in _NUISANCE_CACHE first.
+    # Refits on the same rows reuse the fitted model (the placebo refuter keeps model_y, repeated calls keep both stages).
+    # get_params/set_params follow the sklearn estimator protocol without subclassing BaseEstimator, so sklearn loads only when fitting
+    def __init__(self, estimator=None, cache=True):
+        self.estimator = estimator
+        self.cache = cache
+
+    def get_params(self, deep=True):
+        params = {'estimator': self.estimator, 'cache': self.cache}
+        if deep == True and hasattr(self.estimator, 'get_params') and not isinstance(self.estimator, type):
+            params.update(('estimator__' + name, value) for name, value in self.estimator.get_params(deep=True).items())
+        return params
+
+    def set_params(self, **params):
+        nested = {}
+        for name, value in params.items():
+            if name.startswith('estimator__'):
+                nested[name[len('estimator__'):]] = value
+            elif name in ('estimator', 'cache'):
+                setattr(self, name, value)
+            else:
+                raise ValueError('Invalid parameter ' + repr(name) + ' for CachedModel')
+        if len(nested) > 0:
+            self.estimator.set_params(**nested)
+        return self
+
+    def __repr__(self):
+        return 'CachedModel(estimator=' + repr(self.estimator) + ', cache=' + repr(self.cache) + ')'
+
+    def fit(self, X, y, **fit_params):
+        from sklearn.base import clone
+        if self.cache != True:
+            self.estimator_ = clone(self.estimator).fit(X, y, **fit_params)
+            return self
+        key = _NUISANCE_CACHE.key(self.estimator, [('X', np.asarray(X)), ('y', np.asarray(y))] +
+                                  [(name, None if value is None else np.asarray(value)) for name, value in sorted(fit_params.items())])
+        model = _NUISANCE_CACHE.get(key)
+        if model is None:
+            model = clone(self.estimator).fit(X, y, **fit_params)
+            _NUISANCE_CACHE.put(key, model)
+        self.estimator_ = model
+        return self
+
+    def predict(self, X):
+        return self.estimator_.predict(X)
+
+    @property
+    def predict_proba(self):
+        # Only classifiers expose predict_proba; EconML rejects first-stage regressors that have it
+        if not hasattr(self.estimator, 'predict_proba'):
+            raise AttributeError('predict_proba')
+        return self._predict_proba
+
+    def _predict_proba(self, X):
+        return self.estimator_.predict_proba(X)
+
+    def __sklearn_tags__(self):
+        return self.estimator.__sklearn_tags__()
+
+    @property
+    def _estimator_type(self):
+        return getattr(self.estimator, '_estimator_type', None)
+
+    def __getattr__(self, name):
+        # Fitted attributes (classes_, feature_importances_, ...) come from the fitted model
+        fitted = self.__dict__.get('estimator_')
+        if fitted is not None and name.endswith('_') and not name.startswith('__'):
+            return getattr(fitted, name)
+        raise AttributeError(name)
+
+_HIST_GBM_ROWS = 10000
+
+def _boostingregressor(rows=None):
+    # Histogram gradient boosting bins features once and is far faster than GradientBoostingRegressor from about 10k rows
+    from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor
+    if rows is not None and rows >= _HIST_GBM_ROWS:
+        return CachedModel(HistGradientBoostingRegressor())
+    return CachedModel(GradientBoostingRegressor())
+
+def _glmparams():
+    import statsmodels.api as sm
+    return {'num_null_simulations':10,
+            'num_simulations':10,
+            'num_quantiles_to_discretize_cont_cols':10,
+            'fit_method': "statsmodels",
+            'glm_family': sm.families.Binomial(),
+            'need_conditional_estimates':False}
+
+def _selectestimator(estimandcheck, method_name, method_params, unit, isbinary, outcome, treatment, verbose=True, rows=None):
+    def say(*args):
+        if verbose == True:
+            print(*args)
+    estmethod = method_name
+    estmethodparam = method_params
+    unitparam = unit
+    if estimandcheck == 'iv':
+        if method_name == 'default':
+            estmethod = 'iv.instrumental_variable'
+            estmethodparam = None
+        elif method_name != 'default' and method_params == 'default':
+            estmethod = 'iv.instrumental_variable'
+            estmethodparam = None
+    elif estimandcheck == 'frontdoor':
+        estmethod = 'frontdoor.two_stage_regression'
+        estmethodparam = None
+    elif estimandcheck == 'backdoor':
+        unitparam = None
+        if estmethod == 'default' or estmethod == 'backdoor.generalized_linear_model' or estmethod == 'backdoor.linear_regression':
+            if isbinary(outcome) == True:
+                say('Detected binary outcome: Selecting GLM logistic regression')
+                estmethod = 'backdoor.generalized_linear_model'
+                if estmethodparam == 'default':
+                    estmethodparam = _glmparams()
+            else:
+                say('Detected nonbinary outcome: Selecting OLS linear regression')
+                estmethod = 'backdoor.linear_regression'
+                estmethodparam = None
+        elif estmethod == 'backdoor.econml.dr.LinearDRLearner':
+            if estmethodparam == 'default':
+                from sklearn.linear_model import LogisticRegressionCV
+                estmethodparam = {"init_params":{
+                    'model_propensity': CachedModel(LogisticRegressionCV(cv=3, solver='lbfgs')),
+                    'random_state': 0},
+                    "fit_params":{}}
+        elif estmethod == 'backdoor.econml.dml.DML':
+            if estmethodparam == 'default':
+                # Fixed cross-fitting folds keep refits on the same rows identical, so cached first stages are reused
+                from sklearn.linear_model import LassoCV
+                from sklearn.preprocessing import PolynomialFeatures
+                from econml.inference import BootstrapInference
+                estmethodparam = {'init_params':{
+                    'model_y':_boostingregressor(rows),
+                    'model_t': _boostingregressor(rows),
+                    'model_final': LassoCV(fit_intercept=False),
+                    'featurizer':PolynomialFeatures(degree=1, include_bias=True),
+                    'random_state': 0},
+                    'fit_params':{'inference': BootstrapInference(n_bootstrap_samples=20, n_jobs=-1)}}
+        elif estmethod == 'backdoor.propensity_score_stratification' or estmethod == 'backdoor.propensity_score_matching'  or estmethod == 'backdoor.propensity_score_weighting':
+            if isbinary(outcome) == False  or  isbinary(treatment) == False:
+                unitparam = None
+                say('Failed to detect both binary treatment and binary outcome')
+                say('Reverting Propensity Score Estimation to Regression')
+                if isbinary(outcome) == True:
+                    say('Detected binary outcome: Selecting GLM logistic regression')
+                    estmethod = 'backdoor.generalized_linear_model'
+                    if estmethodparam == 'default':
+                        estmethodparam = _glmparams()
+                else:
+                    say('Detected nonbinary outcome: Selecting OLS linear regression')
+                    estmethod = 'backdoor.linear_regression'
+                    estmethodparam = None
+            elif estmethod == 'backdoor.propensity_score_stratification':
+                unitparam = 'att'
+                say('Propensity Score Unit: ATT')
+                estmethodparam = {'num_strata':50, 'clipping_threshold':5}
+            elif estmethod == 'backdoor.propensity_score_matching':
+                unitparam = 'atc'
+                say('Propensity Score Unit: ATC')
+                estmethodparam = None
+            elif estmethod == 'backdoor.propensity_score_weighting':
+                unitparam = 'ate'
+                say('Propensity Score Unit: ATE')
+                estmethodparam = {"weighting_scheme":"ips_weight"}
+    return estmethod, estmethodparam, unitparam
+
+def _estimandcolumns(cmodel, identified_estimand):
+    # Treatment, outcome, every variable set the estimand references and the graph's effect modifiers
+    backdoor = identified_estimand.__dict__.get('backdoor_variables') or {}
+    groups = [cmodel._treatment, cmodel._outcome]
+    groups += list(backdoor.values()) if isinstance(backdoor, dict) else [backdoor]
+    for name in ('instrumental_variables', 'frontdoor_variables', 'mediator_variables',
+                 'mediation_first_stage_confounders', 'mediation_second_stage_confounders'):
+        groups.append(identified_estimand.__dict__.get(name))
+    groups.append(cmodel.get_effect_modifiers())
+    available = set(cmodel._data.columns)
+    columns = []
+    for group in groups:
+        for column in group or []:
+            if column in available and column not in columns:
+                columns.append(column)
+    return columns
+
+def _compactcolumn(series):
+    # Lossless down-casts only: integers to the smallest integer type holding their range, floats to float32 when exact
+    kind = series.dtype.kind
+    if kind == 'i':
+        return pd.to_numeric(series, downcast='integer')
+    if kind == 'u':
+        return pd.to_numeric(series, downcast='unsigned')
+    if kind == 'f' and series.dtype.itemsize > 4:
+        narrow = series.astype(np.float32)
+        if np.array_equal(narrow.to_numpy(dtype=np.float64), series.to_numpy(dtype=np.float64), equal_nan=True):
+            return narrow
+    return series
+
+_PANDAS_MAJOR = int(pd.__version__.split('.')[0])
+
+def _copyonwrite():
+    # pandas 3 always copies on write, so a column selection or shallow copy shares the caller's buffers until either side writes.
+    # pandas 2 copies eagerly unless the copy_on_write mode is on, so it is switched on around the blocks that build and use
+    # projected frames (those frames are only written to inside such a block); pandas 1 keeps its eager copies
+    if _PANDAS_MAJOR == 2:
+        return pd.option_context('mode.copy_on_write', True)
+    return contextlib.nullcontext()
+
+def _projectframe(cmodel, columns, compact=False):
+    # Rebuilt on every call: under copy-on-write the model data can change in place (cmodel._data.loc[...] = ...)
+    # without a new object, so a cached projection could hold stale values. With copy-on-write (see _copyonwrite)
+    # the column selection shares the model data's buffers instead of copying them
+    with _copyonwrite():
+        frame = cmodel._data[columns]
+        if compact == True:
+            frame = pd.DataFrame({column: _compactcolumn(frame[column]) for column in columns}, index=frame.index, copy=False)
+    return frame
+
+@contextlib.contextmanager
+def _workingframe(cmodel, frame):
+    # DoWhy estimators add propensity/strata/weight columns to the model data in place; they land on a
+    # shallow copy of the projected frame instead of the caller's DataFrame, which is put back afterwards.
+    # Copy-on-write is on for the whole block, so with project=False the shallow copy of the full frame copies no values
+    # and an estimator writing to an existing column copies that column instead of editing the caller's data
+    with _copyonwrite():
+        original = cmodel._data
+        cmodel._data = frame.copy(deep=False)
+        try:
+            yield cmodel._data
+        finally:
+            cmodel._data = original
+
+def _projection(cmodel, identified_estimand, project=True):
+    if project == False:
+        return list(cmodel._data.columns), False
+    return _estimandcolumns(cmodel, identified_estimand), project == 'compact'
+
+def _propensityarrays(estimate, working):
+    pscores = estimate.__dict__.get('params').get('propensity_scores')
+    if pscores is None and 'propensity_score' in working.columns:
+        pscores = working['propensity_score']
+    strata = working['strata'].to_numpy() if 'strata' in working.columns else None
+    return (None if pscores is None else np.asarray(pscores)), strata
+
+def _batchspecs(specs, identifier):
+    fields = ['treatment', 'outcome', 'identifier', 'method_name', 'method_params', 'estimand']
+    if isinstance(specs, pd.DataFrame):
+        specs = specs.to_dict('records')
+    rows = []
+    for position, spec in enumerate(specs):
+        if not isinstance(spec, dict):
+            spec = dict(zip(fields, spec))
+        row = {'spec':position, 'treatment':spec['treatment'], 'outcome':spec['outcome'],
+               'identifier':spec.get('identifier', identifier),
+               'method_name':spec.get('method_name', 'default'),
+               'method_params':spec.get('method_params', 'default'),
+               'estimand':spec.get('estimand', 'auto')}
+        rows.append(row)
+    return rows
+
+def _batchestimate(cmodel, identified_estimand, task):
+    row = {'spec':task['spec'], 'treatment':task['treatment'], 'outcome':task['outcome'], 'identifier':task['identifier'],
+           'estimand':task['estimand'], 'method_name':task['estmethod'], 'target_units':task['unitparam'],
+           'value':np.nan, 'error':None}
+    try:
+        columns, compact = _projection(cmodel, identified_estimand, task['project'])
+        with _workingframe(cmodel, _projectframe(cmodel, columns, compact=compact)):
+            estimate = cmodel.estimate_effect(identified_estimand, method_name=task['estmethod'],
+                                              method_params=task['estmethodparam'], target_units=task['unitparam'])
+            row['value'] = estimate.value
+            if task.get('confidence_level') is not None:
+                interval = np.asarray(estimate.get_confidence_intervals(confidence_level=task['confidence_level']), dtype=float).ravel()
+                row['ci_lower'], row['ci_upper'] = float(interval[0]), float(interval[-1])
+    except Exception as error:
+        row['error'] = repr(error)
+    return row
+
+def _batchplan(dataset, digraph, rows, cache=True, project=True, profile=None):
+    # One CausalModel per (treatment, outcome), one identification per (treatment, outcome, identifier) and one data profile for all of them
+    from dowhy import CausalModel
+    profile = DataProfile(dataset) if profile is None else profile
+    models = {}
+    estimands = {}
+    estimandkinds = {}
+    tasks = []
+    skipped = []
+    for row in rows:
+        pair = (row['treatment'], row['outcome'])
+        if pair not in models:
+            if isinstance(digraph, CompiledGraph):
+                models[pair] = digraph.causalmodel(dataset, row['treatment'], row['outcome'])
+            else:
+                models[pair] = CausalModel(data=dataset,treatment=row['treatment'],outcome=row['outcome'],graph=digraph)
+            models[pair]._causalfast_profile = profile
+        cmodel = models[pair]
+        key = pair + (row['identifier'],)
+        if key not in estimands:
+            estimands[key] = _identify(cmodel, row['identifier'], cache=cache)
+            estimandkinds[key] = classifyestimand(estimands[key])
+        estimandcheck = _pickestimand(estimandkinds[key], row['estimand'])
+        if estimandcheck is None:
+            skipped.append(dict(row, target_units=None, value=np.nan, error='Unable to identify a ' + str(row['estimand']) + ' estimand'))
+            continue
+        estmethod, estmethodparam, unitparam = _selectestimator(estimandcheck, row['method_name'], row['method_params'], 'default',
+                                                                isbinary=profile.isbinary, outcome=cmodel._outcome, treatment=cmodel._treatment,
+                                                                verbose=False, rows=len(cmodel._data))
+        if unitparam == 'default' or unitparam is None:
+            unitparam = 'ate'
+        tasks.append(dict(row, estimand=estimandcheck, estmethod=estmethod, estmethodparam=estmethodparam, unitparam=unitparam,
+                          project=project))
+    return models, estimands, tasks, skipped
+
+_BATCH_STATE = {}
+
+def _batchinit(models, estimands, tasks):
+    _BATCH_STATE['models'] = models
+    _BATCH_STATE['estimands'] = estimands
+    _BATCH_STATE['tasks'] = tasks
+
+def _batchworker(index):
+    task = _BATCH_STATE['tasks'][index]
+    cmodel = _BATCH_STATE['models'][(task['treatment'], task['outcome'])]
+    identified_estimand = _BATCH_STATE['estimands'][(task['treatment'], task['outcome'], task['identifier'])]
+    return _batchestimate(cmodel, identified_estimand, task)
+
+def _runbatch(models, estimands, tasks, workers=None):
+    if workers == -1:
+        workers = os.cpu_count() or 1
+    if workers is None or workers <= 1 or len(tasks) <= 1:
+        _batchinit(models, estimands, tasks)
+        try:
+            return [_batchworker(index) for index in range(len(tasks))]
+        finally:
+            _BATCH_STATE.clear()
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+    else:
+        context = multiprocessing.get_context()
+    workers = min(workers, len(tasks))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_batchinit, initargs=(models, estimands, tasks)) as pool:
+        return list(pool.map(_batchworker, range(len(tasks)), chunksize=max(1, len(tasks) // (workers * 4))))
+
+def _sharedlinear(dataset, treatment, common_causes, modifiers, outcomes, confidence_level=0.95):
+    # DoWhy's backdoor.linear_regression for several outcomes that share a treatment, adjustment set and effect modifiers:
+    # one design matrix, one pseudo-inverse of X'X and a multi-column solve instead of one statsmodels fit per outcome
+    from scipy import stats
+    design = _streamdesign(dataset, treatment, common_causes, modifiers)
+    responses = dataset[outcomes].to_numpy(dtype=np.float64)
+    xtx = design.T @ design
+    inverse = np.linalg.pinv(xtx, hermitian=True)
+    xty = design.T @ responses
+    params = inverse @ xty
+    dfresid = len(design) - np.linalg.matrix_rank(xtx, hermitian=True)
+    residual = np.maximum((responses * responses).sum(axis=0) - (params * xty).sum(axis=0), 0.0)
+    gradient = np.zeros(design.shape[1])
+    gradient[1] = 1.0
+    if len(modifiers) > 0:
+        gradient[2 + len(common_causes):] = dataset[modifiers].to_numpy(dtype=np.float64).mean(axis=0)
+    values = gradient @ params
+    stderrs = np.sqrt(float(gradient @ inverse @ gradient) * residual / dfresid)
+    critical = stats.t.ppf((1 + confidence_level) / 2, dfresid)
+    return values, stderrs, values - critical * stderrs, values + critical * stderrs
+
+_MATRIX_COLUMNS = ['treatment', 'outcome', 'identifier', 'estimand', 'method_name', 'target_units', 'adjustment', 'value', 'std_error',
+                   'ci_lower', 'ci_upper', 'solver', 'error']
+
+def effectmatrix(dataset, digraph, treatments, outcomes, identifier='default', method_name='default', method_params='default',
+                 confidence_level=0.95, workers=None, cache=True, project=True, instrument=None):
+    # Every treatment x outcome pair over one graph and dataset. Linear backdoor pairs are grouped by (treatment, adjustment set,
+    # effect modifiers) and solved together; every other pair is estimated by DoWhy through the batch worker pool
+    instrument = _instrument(instrument)
+    first = len(instrument.timings)
+    treatments = [treatments] if isinstance(treatments, str) else list(treatments)
+    outcomes = [outcomes] if isinstance(outcomes, str) else list(outcomes)
+    rows = _batchspecs([{'treatment':treatment, 'outcome':outcome, 'method_name':method_name, 'method_params':method_params}
+                        for treatment in treatments for outcome in outcomes if treatment != outcome], identifier)
+    with instrument.stage('matrix.planning'):
+        models, estimands, tasks, skipped = _batchplan(dataset, digraph, rows, cache=cache, project=project)
+        groups = {}
+        others = []
+        for task in tasks:
+            identified_estimand = estimands[(task['treatment'], task['outcome'], task['identifier'])]
+            task['adjustment'] = list(identified_estimand.get_backdoor_variables()) if task['estimand'] == 'backdoor' else None
+            if task['estmethod'] == 'backdoor.linear_regression' and task['estimand'] == 'backdoor':
+                cmodel = models[(task['treatment'], task['outcome'])]
+                modifiers = [c for c in cmodel.get_effect_modifiers() if c in dataset.columns]
+                groups.setdefault((task['treatment'], tuple(task['adjustment']), tuple(modifiers)), []).append(task)
+            else:
+                others.append(dict(task, confidence_level=confidence_level))
+    results = []
+    with instrument.stage('matrix.shared_linear'):
+        for (treatment, common_causes, modifiers), group in groups.items():
+            try:
+                solved = _sharedlinear(dataset, treatment, list(common_causes), list(modifiers), [task['outcome'] for task in group],
+                                       confidence_level=confidence_level)
+            except Exception as error:
+                others.extend(dict(task, confidence_level=confidence_level) for task in group)
+                _LOGGER.warning('Shared linear solve failed for %s, falling back to DoWhy: %r', treatment, error)
+                continue
+            for position, task in enumerate(group):
+                results.append({'spec':task['spec'], 'treatment':task['treatment'], 'outcome':task['outcome'], 'identifier':task['identifier'],
+                                'estimand':task['estimand'], 'method_name':task['estmethod'], 'target_units':task['unitparam'],
+                                'adjustment':task['adjustment'], 'value':float(solved[0][position]), 'std_error':float(solved[1][position]),
+                                'ci_lower':float(solved[2][position]), 'ci_upper':float(solved[3][position]), 'solver':'shared', 'error':None})
+    with instrument.stage('matrix.estimation'):
+        for result, task in zip(_runbatch(models, estimands, others, workers=workers), others):
+            results.append(dict(result, adjustment=task['adjustment'], solver='dowhy'))
+    results = sorted(results + skipped, key=lambda result: result['spec'])
+    results = pd.DataFrame(results, columns=_MATRIX_COLUMNS)
+    results.attrs['timings'] = instrument.summary(first)
+    return results
+
+_EDA_COLUMNS = ['dtype', 'count_na', 'min', 'mean', 'max', 'cardinality', 'binary', 'numeric', 'rows']
+_EDA_SKETCH = 1 << 16
+
+def _edachunks(data, chunksize=None, columns=None):
+    if isinstance(data, pd.DataFrame):
+        if chunksize is None or chunksize >= len(data):
+            yield data if columns is None else data[columns]
+        else:
+            for start in range(0, len(data), chunksize):
+                chunk = data.iloc[start:start + chunksize]
+                yield chunk if columns is None else chunk[columns]
+    elif isinstance(data, (str, os.PathLike)):
+        path = os.fspath(data)
+        if path.endswith('.parquet'):
+            import pyarrow.parquet as pq
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize or 1000000, columns=columns):
+                yield batch.to_pandas()
+        else:
+            yield from pd.read_csv(path, chunksize=chunksize or 1000000, usecols=columns)
+    else:
+        for chunk in data:
+            yield chunk if columns is None else chunk[columns]
+
+def _edadtype(current, dtype):
+    # The dtype two chunks of one column reduce to; numeric stats are float64 sums, so numeric mixes widen numerically
+    try:
+        return str(np.result_type(np.dtype(current), dtype))
+    except TypeError:
+        return 'float64'
+
+def _edacardinality(sketch, sketchsize):
+    # Exact below sketchsize distinct values; above it the k-minimum-values estimate (relative error about 1/sqrt(k))
+    if len(sketch) < sketchsize:
+        return len(sketch)
+    return int(round((sketchsize - 1) / ((float(sketch[sketchsize - 1]) + 1.0) / 2.0 ** 64)))
+
+def edasummary(data, chunksize=None, cardinality=True, sketchsize=_EDA_SKETCH):
+    # Per-column stats merged chunk by chunk; numeric columns are reduced as one 2-D block per chunk
+    columns = None
+    stats = {}
+    hashes = {}
+    for chunk in _edachunks(data, chunksize):
+        if columns is None:
+            columns = list(chunk.columns)
+            for c in columns:
+                stats[c] = {'dtype':str(chunk[c].dtype), 'count_na':0, 'min':np.inf, 'sum':0.0, 'count':0,
+                            'max':-np.inf, 'binary':0, 'numeric':is_numeric_dtype(chunk[c]), 'rows':0}
+                hashes[c] = np.empty(0, dtype=np.uint64)
+        for c in columns:
+            # Chunked CSV readers infer dtypes per chunk: a column stays numeric only while every chunk is
+            entry = stats[c]
+            if str(chunk[c].dtype) == entry['dtype']:
+                continue
+            if entry['numeric'] == True and is_numeric_dtype(chunk[c]):
+                entry['dtype'] = _edadtype(entry['dtype'], chunk[c].dtype)
+            else:
+                entry['numeric'] = False
+                entry['dtype'] = 'object'
+        numeric = [c for c in columns if stats[c]['numeric'] == True]
+        rows = len(chunk)
+        nas = chunk.isna().sum().to_numpy()
+        if len(numeric) > 0:
+            block = chunk[numeric].to_numpy(dtype=np.float64, na_value=np.nan)
+            valid = ~np.isnan(block)
+            mins = np.min(block, axis=0, initial=np.inf, where=valid)
+            maxs = np.max(block, axis=0, initial=-np.inf, where=valid)
+            sums = np.nansum(block, axis=0)
+            counts = valid.sum(axis=0)
+            binaries = ((block == 0) | (block == 1)).sum(axis=0)
+            for i, c in enumerate(numeric):
+                entry = stats[c]
+                entry['min'] = min(entry['min'], mins[i])
+                entry['max'] = max(entry['max'], maxs[i])
+                entry['sum'] += sums[i]
+                entry['count'] += int(counts[i])
+                entry['binary'] += int(binaries[i])
+        for i, c in enumerate(columns):
+            entry = stats[c]
+            entry['count_na'] += int(nas[i])
+            entry['rows'] += rows
+            if entry['numeric'] == False:
+                entry['binary'] += int(chunk[c].isin([0,1]).sum())
+            if cardinality == False:
+                continue
+            # Cardinality keeps only the sketchsize smallest distinct value hashes, so memory is bounded per column
+            # Numeric values are hashed as float64, so 1 and 1.0 from differently inferred chunks are one value
+            values = chunk[c].dropna().to_numpy(dtype=np.float64) if entry['numeric'] == True else chunk[c].dropna().to_numpy()
+            chunkhashes = np.unique(pd.util.hash_array(values))[:sketchsize]
+            hashes[c] = chunkhashes if len(hashes[c]) == 0 else np.union1d(hashes[c], chunkhashes)[:sketchsize]
+    if columns is None:
+        return pd.DataFrame(columns=_EDA_COLUMNS)
+    records = []
+    for c in columns:
+        entry = stats[c]
+        hasvalues = entry['numeric'] and entry['count'] > 0
+        records.append({'dtype':entry['dtype'],
+                        'count_na':entry['count_na'],
+                        'min':entry['min'] if hasvalues else np.nan,
+                        'mean':entry['sum'] / entry['count'] if hasvalues else np.nan,
+                        'max':entry['max'] if hasvalues else np.nan,
+                        'cardinality':_edacardinality(hashes[c], sketchsize) + (1 if entry['count_na'] > 0 else 0) if cardinality == True else np.nan,
+                        'binary':entry['rows'] > 0 and entry['binary'] == entry['rows'],
+                        'numeric':entry['numeric'],
+                        'rows':entry['rows']})
+    return pd.DataFrame(records, index=pd.Index(columns, name='column'), columns=_EDA_COLUMNS)
+
+def _edacell(value, width):
+    return str(value).ljust(width)[:width]
+
+def _edaprint(summary):
+    print('Rounded - 2 decimals / Numeral Length - CtNa:4, Min/Avg/Max:11')
+    nodat = '--      '
+    for columnName, row in summary.iterrows():
+        naopt = _edacell(row['count_na'], 4)
+        dtopt = _edacell(row['dtype'], 7)
+        if row['numeric'] == True and row['count_na'] == 0 and row['rows'] > 0:
+            integral = 'int' in row['dtype'] or 'bool' in row['dtype']
+            minopt, avgopt, maxopt = [_edacell(int(value) if integral and key != 'mean' else round(float(value),2), 11)
+                                      for key, value in (('min', row['min']), ('mean', row['mean']), ('max', row['max']))]
+            print(dtopt,'CtNA:',naopt,'MIN:', minopt,'AVG:',avgopt,'MAX:',maxopt,'Col:',columnName)
+        else:
+            print(dtopt,'CountNA:',naopt,'MIN:',nodat,'AVG:',nodat,'MAX:',nodat,'Col:',columnName)
+
+_DOT_ATTRIBUTES = re.compile(r'\[[^\]]*\]')
+_DOT_KEYWORDS = {'node', 'edge', 'graph', 'digraph', 'subgraph', 'strict'}
+
+def _parsedot(dot):
+    # Nodes and edges of a plain DOT digraph, without pydot; attributes and graph settings are ignored
+    opening = dot.find('{')
+    closing = dot.rfind('}')
+    if opening < 0 or closing < opening:
+        raise ValueError('DOT digraph needs a body enclosed in { and }')
+    body = dot[opening + 1:closing]
+    nodes = []
+    edges = []
+    for statement in re.split(r'[;\n]', _DOT_ATTRIBUTES.sub('', body)):
+        statement = statement.strip()
+        if statement == '' or '=' in statement:
+            continue
+        names = [name.strip().strip('"') for name in statement.split('->')]
+        if len(names) == 1 and names[0] in _DOT_KEYWORDS:
+            continue
+        for name in names:
+            if name not in nodes:
+                nodes.append(name)
+        edges.extend(zip(names, names[1:]))
+    return nodes, edges
+
+def _edgelist(graph):
+    # Accepts a DOT string or a list of (parent, child) / (parent, child, coefficient) tuples
+    if isinstance(graph, str):
+        nodes, edges = _parsedot(graph)
+        return nodes, edges, {}
+    nodes = []
+    edges = []
+    weights = {}
+    for edge in graph:
+        parent, child = edge[0], edge[1]
+        for name in (parent, child):
+            if name not in nodes:
+                nodes.append(name)
+        edges.append((parent, child))
+        if len(edge) > 2:
+            weights[(parent, child)] = edge[2]
+    return nodes, edges, weights
+
+def _toposort(nodes, edges):
+    parents = {node: [] for node in nodes}
+    children = {node: [] for node in nodes}
+    for parent, child in edges:
+        parents[child].append(parent)
+        children[parent].append(child)
+    pending = {node: len(parents[node]) for node in nodes}
+    ready = [node for node in nodes if pending[node] == 0]
+    order = []
+    while len(ready) > 0:
+        node = ready.pop(0)
+        order.append(node)
+        for child in children[node]:
+            pending[child] -= 1
+            if pending[child] == 0:
+                ready.append(child)
+    if len(order) != len(nodes):
+        raise ValueError('Graph contains a cycle through: ' + ', '.join(node for node in nodes if pending[node] > 0))
+    return order, parents
+
+_DOT_NAME = re.compile(r'[A-Za-z_][A-Za-z0-9_]*$')
+
+def _dotname(name):
+    name = str(name)
+    if _DOT_NAME.match(name) and name.lower() not in _DOT_KEYWORDS:
+        return name
+    return '"' + name.replace('"', '\\"') + '"'
+
+def _dotstring(nodes, edges):
+    # DOT text straight from the node and edge lists, in the layout pydot produced for makegraph
+    lines = ['digraph {']
+    lines.extend(_dotname(node) + ';' for node in nodes)
+    lines.extend(_dotname(parent) + ' -> ' + _dotname(child) + ';' for parent, child in edges)
+    lines.append('}')
+    return '\n'.join(lines) + '\n'
+
+def _checkgraph(nodes, edges, columns=None, treatment=None, outcome=None):
+    # ValueError on cycles, or on treatment/outcome missing from the graph or dataset; returns graph nodes without a dataset column (unobserved)
+    _toposort(nodes, edges)
+    for role, name in (('Treatment', treatment), ('Outcome', outcome)):
+        for variable in ([] if name is None else [name] if isinstance(name, str) else list(name)):
+            if variable not in nodes:
+                raise ValueError(role + ' ' + repr(variable) + ' is not a node of the digraph')
+            if columns is not None and variable not in columns:
+                raise ValueError(role + ' ' + repr(variable) + ' is not a dataset column')
+    if columns is None:
+        return []
+    columns = set(columns)
+    return [node for node in nodes if node not in columns]
+
+def _drawgraph(nodes, edges):
+    import networkx as nx
+    G = nx.DiGraph()
+    G.add_nodes_from(nodes)
+    G.add_edges_from(edges)
+    pos = nx.circular_layout(G)
+    nx.draw(G, pos, with_labels = True, width=0.4, edge_color='red', style=':', node_size=400, arrows=True)
+
+def _bitindices(mask):
+    indices = []
+    while mask:
+        low = mask & -mask
+        indices.append(low.bit_length() - 1)
+        mask ^= low
+    return indices
+
+# Most candidate sets CompiledGraph.adjustmentset checks to reproduce DoWhy's tie-break between equally small adjustment sets
+_ADJUSTMENT_SEARCH = 100000
+
+class CompiledGraph:
+    # A digraph parsed once, with node sets held as integer bitsets: ancestor and descendant closures come from one topological
+    # pass, and d-separation, instrument and effect modifier queries are bitset sweeps cached per query. CausalModels made by
+    # causalmodel() share one networkx graph instead of re-parsing DOT text, and identifier='minimal-adjustment' on them reads
+    # the estimands built here
+    def __init__(self, graph, pairs=None, observed=None):
+        if isinstance(graph, str):
+            nodes, edges = _parsedot(graph)
+        elif hasattr(graph, 'nodes') and hasattr(graph, 'edges'):
+            nodes = [str(node) for node in graph.nodes]
+            edges = [(str(parent), str(child)) for parent, child in graph.edges]
+        else:
+            nodes, edges = _edgelist(graph)[:2]
+        order = _toposort(nodes, edges)[0]
+        self.nodes = nodes
+        self.edges = edges
+        self.index = {node: position for position, node in enumerate(nodes)}
+        self.parents = [0] * len(nodes)
+        self.children = [0] * len(nodes)
+        for parent, child in edges:
+            self.parents[self.index[child]] |= 1 << self.index[parent]
+            self.children[self.index[parent]] |= 1 << self.index[child]
+        self._ancestors = [0] * len(nodes)
+        self._descendants = [0] * len(nodes)
+        for node in order:
+            position = self.index[node]
+            for parent in _bitindices(self.parents[position]):
+                self._ancestors[position] |= self._ancestors[parent] | 1 << parent
+        for node in reversed(order):
+            position = self.index[node]
+            for child in _bitindices(self.children[position]):
+                self._descendants[position] |= self._descendants[child] | 1 << child
+        self.observed = None if observed is None else [node for node in nodes if node in set(observed)]
+        self._dseparated = {}
+        self._instruments = {}
+        self._modifiers = {}
+        self._estimands = {}
+        self._networkx = None
+        for treatment, outcome in pairs or []:
+            self.estimand(treatment, outcome, self.observed)
+
+    @property
+    def dot(self):
+        return _dotstring(self.nodes, self.edges)
+
+    def _mask(self, names):
+        mask = 0
+        for name in [names] if isinstance(names, str) else names:
+            if name not in self.index:
+                raise ValueError(repr(name) + ' is not a node of the digraph')
+            mask |= 1 << self.index[name]
+        return mask
+
+    def _names(self, mask):
+        return [self.nodes[position] for position in _bitindices(mask)]
+
+    def ancestors(self, node):
+        return self._names(self._ancestors[self.index[node]])
+
+    def descendants(self, node):
+        return self._names(self._descendants[self.index[node]])
+
+    def _reachable(self, sources, given, cut=0):
+        # Bayes-ball over bitsets: nodes d-connected to sources given the conditioning set, with the edges out of cut removed
+        # (cut=treatment is the backdoor graph). A conditioned node, or an ancestor of one, passes a path in from a parent back up
+        opened = given
+        for position in _bitindices(given):
+            opened |= self._ancestors[position]
+        up, down = sources, 0
+        frontup, frontdown = sources, 0
+        while frontup or frontdown:
+            nextup = nextdown = 0
+            for position in _bitindices(frontup & ~given):
+                nextup |= self.parents[position] & ~cut
+                if not cut >> position & 1:
+                    nextdown |= self.children[position]
+            for position in _bitindices(frontdown):
+                if not (given | cut) >> position & 1:
+                    nextdown |= self.children[position]
+                if opened >> position & 1:
+                    nextup |= self.parents[position] & ~cut
+            frontup = nextup & ~up
+            frontdown = nextdown & ~down
+            up |= frontup
+            down |= frontdown
+        return (up | down) & ~given
+
+    def dseparated(self, x, y, given=()):
+        key = (self._mask(x), self._mask(y), self._mask(given))
+        if key not in self._dseparated:
+            self._dseparated[key] = self._reachable(key[0], key[2]) & key[1] == 0
+        return self._dseparated[key]
+
+    def effectmodifiers(self, treatment, outcome):
+        # DoWhy's rule without its walk over every directed path: ancestors of the outcome that are neither the treatment,
+        # its ancestors, nor on a directed treatment -> outcome path (descendants of the treatment that are outcome ancestors)
+        key = (self._mask(treatment), self._mask(outcome))
+        if key not in self._modifiers:
+            x, y = key
+            causes = 0
+            for position in _bitindices(y):
+                causes |= self._ancestors[position]
+            modifiers = causes & ~x
+            for position in _bitindices(x):
+                modifiers &= ~(self._ancestors[position] | self._descendants[position] & causes)
+            self._modifiers[key] = self._names(modifiers)
+        return list(self._modifiers[key])
+
+    def instruments(self, treatment, outcome):
+        # DoWhy's rule: parents of the treatment that reach the outcome only through it, and are not descendants of a cause of it
+        key = (self._mask(treatment), self._mask(outcome))
+        if key not in self._instruments:
+            x, y = key
+            parents = 0
+            for position in _bitindices(x):
+                parents |= self.parents[position]
+            # Ancestors and descendants with the edges into the treatment removed
+            causes = 0
+            front = y
+            while front:
+                grown = 0
+                for position in _bitindices(front & ~x):
+                    grown |= self.parents[position]
+                front = grown & ~causes
+                causes |= front
+            caused = 0
+            front = causes
+            while front:
+                grown = 0
+                for position in _bitindices(front):
+                    grown |= self.children[position] & ~x
+                front = grown & ~caused
+                caused |= front
+            self._instruments[key] = self._names(parents & ~causes & ~caused)
+        return self._instruments[key]
+
+    def adjustmentset(self, treatment, outcome, observed=None):
+        # DoWhy's minimal-adjustment set, or None when unobserved confounding leaves no valid one. A maximum flow between treatment
+        # and outcome in the moralised ancestral backdoor graph, cutting only observed non-descendants of the treatment, gives the
+        # smallest size k. DoWhy keeps every valid set of size k and picks by instruments and the iteration order of the Python sets
+        # it builds, so _minimalsets replays that over the nodes that can be in such a set; past _ADJUSTMENT_SEARCH candidate sets
+        # the minimum cut itself is returned
+        import networkx as nx
+        x, y = self._mask(treatment), self._mask(outcome)
+        ancestral = x | y
+        front = ancestral
+        while front:
+            grown = 0
+            for position in _bitindices(front):
+                grown |= self.parents[position] & ~x
+            front = grown & ~ancestral
+            ancestral |= front
+        forbidden = x | y
+        for position in _bitindices(x):
+            forbidden |= self._descendants[position]
+        allowed = (1 << len(self.nodes)) - 1 if observed is None else self._mask([node for node in observed if node in self.index])
+        candidates = ancestral & allowed & ~forbidden
+        network = nx.DiGraph()
+        network.add_nodes_from(('source', 'sink'))
+        for position in _bitindices(ancestral):
+            if candidates >> position & 1:
+                network.add_edge(('in', position), ('out', position), capacity=1)
+            else:
+                network.add_edge(('in', position), ('out', position))
+            parents = _bitindices(self.parents[position] & ancestral & ~x)
+            for first, parent in enumerate(parents):
+                for other in [position] + parents[first + 1:]:
+                    network.add_edge(('out', parent), ('in', other))
+                    network.add_edge(('out', other), ('in', parent))
+        for position in _bitindices(x):
+            network.add_edge('source', ('out', position))
+        for position in _bitindices(y):
+            network.add_edge(('in', position), 'sink')
+        try:
+            size, flow = nx.maximum_flow(network, 'source', 'sink')
+        except nx.NetworkXUnbounded:
+            return None
+        if size == 0:
+            return []
+        # A node is in some smallest set exactly when its split edge is saturated and its two ends fall in different strongly
+        # connected components of the residual network (Picard-Queyranne), so only those nodes are combined
+        residual = nx.DiGraph()
+        for tail, heads in network.adjacency():
+            for head, attributes in heads.items():
+                if flow[tail][head] < attributes.get('capacity', float('inf')):
+                    residual.add_edge(tail, head)
+                if flow[tail][head] > 0:
+                    residual.add_edge(head, tail)
+        component = {}
+        for number, members in enumerate(nx.strongly_connected_components(residual)):
+            component.update(dict.fromkeys(members, number))
+        essential = sum(1 << position for position in _bitindices(candidates) if flow[('in', position)][('out', position)] > 0
+                        and component.get(('in', position)) != component.get(('out', position)))
+        chosen = self._minimalsets(treatment, outcome, x, y, observed, essential, int(size))
+        if chosen is not None:
+            return chosen
+        reached = nx.minimum_cut(network, 'source', 'sink')[1][0]
+        return self._names(sum(1 << position for position in _bitindices(candidates)
+                               if ('in', position) in reached and ('out', position) not in reached))
+
+    def _minimalsets(self, treatment, outcome, x, y, observed, essential, size):
+        # DoWhy's identify_backdoor / find_valid_adjustment_sets / get_default_adjustment_set_id for minimal-adjustment, with the
+        # same set expressions (so the same iteration order in this process) and bitset d-separation in place of networkx.
+        # Combinations are drawn only from the essential nodes, in DoWhy's order, which yields its valid sets in its order
+        from math import comb
+        treatment = [treatment] if isinstance(treatment, str) else list(treatment)
+        outcome = [outcome] if isinstance(outcome, str) else list(outcome)
+        observed_nodes = set(self.nodes if observed is None else observed)
+        eligible_variables = set([node for node in self.nodes if node in observed_nodes]) - set(treatment) - set(outcome)
+        descendants = 0
+        for position in _bitindices(x):
+            descendants |= self._descendants[position]
+        eligible_variables -= set(self._names(descendants))
+        filt_eligible_variables = set()
+        for var in eligible_variables:
+            if not self.dseparated(outcome, var) or not self.dseparated(treatment, var):
+                filt_eligible_variables.add(var)
+        pool = [var for var in filt_eligible_variables if essential >> self.index[var] & 1]
+        if comb(len(pool), size) > _ADJUSTMENT_SEARCH:
+            return None
+        found = []
+        for candidate in combinations(pool, size):
+            if self._reachable(x, self._mask(candidate), cut=x) & y == 0:
+                found.append(list(candidate))
+        if len(found) == 0:
+            return None
+        adjustment_sets_dict = {'backdoor' + str(i + 1): candidate for i, candidate in enumerate(found)}
+        instrument_names = set(self.instruments(treatment, outcome))
+        iv_count_dict = {key: len(set(adjustment_set).intersection(instrument_names)) for key, adjustment_set in adjustment_sets_dict.items()}
+        min_iv_count = min(iv_count_dict.values())
+        min_iv_keys = {key for key, iv_count in iv_count_dict.items() if iv_count == min_iv_count}
+        return [adjustment_sets_dict[key] for key in min_iv_keys][0]
+
+    def estimand(self, treatment, outcome, observed=None):
+        # Backdoor and iv estimands for one treatment/outcome pair, cached by observed node set. Frontdoor sets are not searched;
+        # None (no directed path, or no observed backdoor set) leaves identification to DoWhy
+        from dowhy.causal_identifier.auto_identifier import (EstimandType, IdentifiedEstimand, construct_adjustment_estimand,
+                                                             construct_iv_estimand)
+        treatment = [treatment] if isinstance(treatment, str) else list(treatment)
+        outcome = [outcome] if isinstance(outcome, str) else list(outcome)
+        key = (self._mask(treatment), self._mask(outcome), None if observed is None else self._mask([node for node in observed if node in self.index]))
+        if key in self._estimands:
+            return self._estimands[key]
+        descendants = 0
+        for position in _bitindices(key[0]):
+            descendants |= self._descendants[position]
+        adjustment = None
+        if descendants & key[1] != 0:
+            adjustment = self.adjustmentset(treatment, outcome, observed)
+        identified_estimand = None
+        if adjustment is not None:
+            backdoor = construct_adjustment_estimand(treatment, outcome, adjustment)
+            instruments = self.instruments(treatment, outcome)
+            identified_estimand = IdentifiedEstimand(None, treatment_variable=treatment, outcome_variable=outcome,
+                                                     estimand_type=EstimandType.NONPARAMETRIC_ATE,
+                                                     estimands={'backdoor1': backdoor, 'backdoor': backdoor,
+                                                                'iv': construct_iv_estimand(treatment, outcome, instruments) if len(instruments) > 0 else None,
+                                                                'frontdoor': None},
+                                                     backdoor_variables={'backdoor1': adjustment, 'backdoor': adjustment},
+                                                     instrumental_variables=instruments, frontdoor_variables=[],
+                                                     default_backdoor_id='backdoor1')
+        self._estimands[key] = identified_estimand
+        return identified_estimand
+
+    def networkx(self):
+        if self._networkx is None:
+            import networkx as nx
+            self._networkx = nx.DiGraph()
+            self._networkx.add_nodes_from(self.nodes)
+            self._networkx.add_edges_from(self.edges)
+        return self._networkx
+
+    def causalmodel(self, data, treatment, outcome, **kwargs):
+        # DoWhy copies the networkx graph, so every model shares the one parse
+        from dowhy import CausalModel
+        cmodel = CausalModel(data=data, treatment=treatment, outcome=outcome, graph=self.networkx(), **kwargs)
+        cmodel._causalfast_graph = self
+        # DoWhy enumerates every simple treatment -> outcome path for effect modifiers on each estimate_effect call;
+        # the model's graph answers from the bitsets instead
+        cmodel._graph.get_effect_modifiers = self.effectmodifiers
+        return cmodel
+
+def _sigmoid(values):
+    return 1.0 / (1.0 + np.exp(-values))
+
+_SCM_TRANSFORMS = {'linear': lambda values, rng: values,
+                   'tanh': lambda values, rng: np.tanh(values),
+                   'square': lambda values, rng: values * values,
+                   'threshold': lambda values, rng: (values > 0).astype(values.dtype),
+                   'binary': lambda values, rng: (rng.random(len(values), dtype=values.dtype) < _sigmoid(values)).astype(values.dtype)}
+
+def _scmchunks(graph, coefficients=None, noise=1.0, transforms=None, samples=1500, chunksize=1000000, dtype=np.float32, seed=None):
+    nodes, edges, weights = _edgelist(graph)
+    order, parents = _toposort(nodes, edges)
+    weights.update(coefficients or {})
+    transforms = transforms or {}
+    dtype = np.dtype(dtype)
+    rng = np.random.default_rng(seed)
+    for start in range(0, samples, chunksize):
+        size = min(chunksize, samples - start)
+        values = {}
+        for node in order:
+            scale = noise.get(node, 1.0) if isinstance(noise, dict) else noise
+            if callable(scale):
+                column = np.asarray(scale(rng, size), dtype=dtype)
+            else:
+                column = rng.standard_normal(size=size, dtype=dtype)
+                if scale != 1.0:
+                    column *= dtype.type(scale)
+            for parent in parents[node]:
+                column += dtype.type(weights.get((parent, node), 1.0)) * values[parent]
+            transform = transforms.get(node, 'linear')
+            if not callable(transform):
+                transform = _SCM_TRANSFORMS[transform]
+            values[node] = transform(column, rng)
+        yield values
+
+def scmdata(graph, coefficients=None, noise=1.0, transforms=None, samples=1500, chunksize=1000000, dtype=np.float32,
+            seed=None, observed=None, output='dataframe', path=None):
+    nodes = _edgelist(graph)[0]
+    columns = nodes if observed is None else list(observed)
+    chunks = _scmchunks(graph, coefficients=coefficients, noise=noise, transforms=transforms, samples=samples,
+                        chunksize=chunksize, dtype=dtype, seed=seed)
+    if output == 'chunks':
+        return (pd.DataFrame({c: values[c] for c in columns}, copy=False) for values in chunks)
+    if output == 'dataframe':
+        arrays = {c: np.empty(samples, dtype=dtype) for c in columns}
+        start = 0
+        for values in chunks:
+            size = len(values[columns[0]])
+            for c in columns:
+                arrays[c][start:start + size] = values[c]
+            start += size
+        return pd.DataFrame(arrays, copy=False)
+    if path is None:
+        raise ValueError('output=' + repr(output) + ' requires a path')
+    if output == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        writer = None
+        try:
+            for values in chunks:
+                table = pa.table({c: values[c] for c in columns})
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+        return path
+    if output == 'memmap':
+        # Row-major .npy file with one column per observed node, in the order of columns
+        array = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(samples, len(columns)))
+        start = 0
+        for values in chunks:
+            size = len(values[columns[0]])
+            for i, c in enumerate(columns):
+                array[start:start + size, i] = values[c]
+            start += size
+        array.flush()
+        return array
+    raise ValueError('Unknown output: ' + repr(output) + " (use 'dataframe', 'chunks', 'parquet' or 'memmap')")
+
+def _jsonable(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if hasattr(value, '_asdict'):
+        return {key: _jsonable(item) for key, item in value._asdict().items()}
+    if isinstance(value, dict):
+        return {str(key): _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    return repr(value)
+
+class SimulatorResult(typing.NamedTuple):
+    estimand: str
+    estimands: list
+    identifier: str
+    method_name: str
+    method_params: typing.Any
+    target_units: typing.Any
+    value: typing.Any
+    ci_lower: typing.Any
+    ci_upper: typing.Any
+    refutations: list
+    timings: dict
+    propensity_scores: typing.Any
+    strata: typing.Any
+    estimate: typing.Any
+
+    def to_dict(self, arrays=False):
+        # Plain JSON/Arrow-friendly values; the DoWhy estimate object is left out and arrays only on request
+        record = {field: _jsonable(getattr(self, field)) for field in self._fields if field not in ('estimate', 'propensity_scores', 'strata')}
+        if arrays == True:
+            record['propensity_scores'] = _jsonable(self.propensity_scores)
+            record['strata'] = _jsonable(self.strata)
+        return record
+
+    def to_json(self, arrays=False):
+        return json.dumps(self.to_dict(arrays=arrays))
+
+def _fittedestimate(estimate):
+    # The fitted DoWhy estimate from any simulator output; results served by a result store have none, and saying so beats a help menu
+    if isinstance(estimate, SimulatorResult):
+        if estimate.estimate is None:
+            raise ValueError('This SimulatorResult was served by a result store and carries no fitted estimator; '
+                             'run simulator without store= to get one')
+        return estimate.estimate
+    if isinstance(estimate, tuple) and len(estimate) > 0:
+        return _fittedestimate(estimate[0])
+    return estimate
+
+def _simulatorresult(estimate, estimandcheck, estimandkinds, identifier, estmethod, estmethodparam, unitparam, pscores, strata, timings, confidence_intervals):
+    ci_lower = None
+    ci_upper = None
+    if confidence_intervals != False:
+        interval = estimate.__dict__.get('params').get('confidence_intervals')
+        if interval is None:
+            interval = estimate.get_confidence_intervals()
+        interval = np.asarray(interval, dtype=float).ravel()
+        if interval.size >= 2:
+            ci_lower, ci_upper = float(interval[0]), float(interval[-1])
+    value = estimate.__dict__.get('value')
+    return SimulatorResult(estimand=estimandcheck,
+                           estimands=estimandkinds,
+                           identifier=identifier,
+                           method_name=estmethod,
+                           method_params=estmethodparam,
+                           target_units=unitparam,
+                           value=float(value) if np.ndim(value) == 0 and value is not None else value,
+                           ci_lower=ci_lower,
+                           ci_upper=ci_upper,
+                           refutations=list(estimate.__dict__.get('params').get('refutations') or []),
+                           timings=timings,
+                           propensity_scores=pscores,
+                           strata=strata,
+                           estimate=estimate)
+
+class StreamingEstimate(typing.NamedTuple):
+    estimand: str
+    method_name: str
+    treatment: str
+    outcome: str
+    features: list
+    params: typing.Any
+    bse: typing.Any
+    value: float
+    std_error: float
+    ci_lower: float
+    ci_upper: float
+    nobs: int
+    iterations: int
+    converged: bool
+    timings: dict
+
+    def to_dict(self):
+        return {field: _jsonable(getattr(self, field)) for field in self._fields}
+
+    def to_json(self):
+        return json.dumps(self.to_dict())
+
+class _NormalEquations:
+    # Running X'WX, X'Wz and z'Wz, so a least-squares fit never needs its rows held together
+    def __init__(self, width):
+        self.xtx = np.zeros((width, width))
+        self.xty = np.zeros(width)
+        self.yty = 0.0
+        self.nobs = 0
+
+    def update(self, design, response, weights=None):
+        weighted = design if weights is None else design * weights[:, None]
+        self.xtx += weighted.T @ design
+        self.xty += weighted.T @ response
+        self.yty += float(response @ (response if weights is None else weights * response))
+        self.nobs += len(response)
+
+    def solve(self):
+        inverse = np.linalg.pinv(self.xtx, hermitian=True)
+        return inverse @ self.xty, inverse
+
+def _streamdesign(chunk, treatment, common_causes, modifiers, treatment_value=None):
+    # Column layout of DoWhy's RegressionEstimator features: constant, treatment, common causes, treatment x effect modifiers
+    rows = len(chunk)
+    if treatment_value is None:
+        values = chunk[treatment].to_numpy(dtype=np.float64)
+    else:
+        values = np.full(rows, float(treatment_value))
+    design = np.empty((rows, 2 + len(common_causes) + len(modifiers)))
+    design[:, 0] = 1.0
+    design[:, 1] = values
+    if len(common_causes) > 0:
+        design[:, 2:2 + len(common_causes)] = chunk[common_causes].to_numpy(dtype=np.float64)
+    if len(modifiers) > 0:
+        design[:, 2 + len(common_causes):] = values[:, None] * chunk[modifiers].to_numpy(dtype=np.float64)
+    return design
+
+def _streamschema(source):
+    # Zero-row frame with the source's columns, plus a source that still yields every chunk
+    if isinstance(source, pd.DataFrame):
+        return source.iloc[:0], source
+    if isinstance(source, (str, os.PathLike)):
+        path = os.fspath(source)
+        if path.endswith('.parquet'):
+            import pyarrow.parquet as pq
+            return pq.read_schema(path).empty_table().to_pandas(), source
+        return pd.read_csv(path, nrows=0), source
+    chunks = iter(source)
+    first = next(chunks)
+    return first.iloc[:0], chain([first], chunks)
+
+@contextlib.contextmanager
+def _streamsource(source, columns, chunksize=None, spill=True):
+    # Yields a callable returning a fresh pass over the projected chunks. DataFrames and paths are simply re-read;
+    # a one-shot iterator is written once to a float64 scratch file when more than one pass may be needed
+    if spill == False or isinstance(source, (pd.DataFrame, str, os.PathLike)):
+        yield lambda: _edachunks(source, chunksize, columns)
+        return
+    handle, path = tempfile.mkstemp(prefix='causalfast-', suffix='.f64')
+    rows = 0
+    try:
+        with os.fdopen(handle, 'wb') as scratch:
+            for chunk in _edachunks(source, None, columns):
+                block = np.ascontiguousarray(chunk.to_numpy(dtype=np.float64))
+                scratch.write(block.tobytes())
+                rows += len(block)
+        if rows == 0:
+            array = np.empty((0, len(columns)))
+        else:
+            array = np.memmap(path, dtype=np.float64, mode='r', shape=(rows, len(columns)))
+        size = chunksize or 1000000
+        yield lambda: (pd.DataFrame(array[start:start + size], columns=columns, copy=False) for start in range(0, rows, size))
+    finally:
+        array = None
+        with contextlib.suppress(OSError):
+            os.remove(path)
+
+class _LinearState:
+    # OLS sufficient statistics (normal equations, modifier sums, binary outcome flag) that can absorb more rows at any time
+    def __init__(self, treatment, outcome, common_causes, modifiers):
+        self.treatment = treatment
+        self.outcome = outcome
+        self.common_causes = common_causes
+        self.modifiers = modifiers
+        self.normal = _NormalEquations(2 + len(common_causes) + len(modifiers))
+        self.modifiersum = np.zeros(len(modifiers))
+        self.binary = True
+
+    def update(self, chunk):
+        response = chunk[self.outcome].to_numpy(dtype=np.float64)
+        self.normal.update(_streamdesign(chunk, self.treatment, self.common_causes, self.modifiers), response)
+        if len(self.modifiers) > 0:
+            self.modifiersum += chunk[self.modifiers].to_numpy(dtype=np.float64).sum(axis=0)
+        self.binary = self.binary and bool(np.all((response == 0) | (response == 1)))
+
+    def fit(self):
+        normal = self.normal
+        params, inverse = normal.solve()
+        dfresid = normal.nobs - np.linalg.matrix_rank(normal.xtx, hermitian=True)
+        residual = max(normal.yty - params @ normal.xty, 0.0)
+        # Effect of moving every unit from treatment 0 to 1: the treatment coefficient plus interactions at the modifier means
+        gradient = np.zeros(len(params))
+        gradient[1] = 1.0
+        gradient[2 + len(self.common_causes):] = self.modifiersum / max(normal.nobs, 1)
+        return {'params':params, 'cov':inverse * residual / dfresid, 'gradient':gradient, 'nobs':normal.nobs,
+                'dfresid':dfresid, 'binary':self.binary, 'iterations':1, 'converged':True}
+
+def _streamols(chunks, treatment, outcome, common_causes, modifiers):
+    state = _LinearState(treatment, outcome, common_causes, modifiers)
+    for chunk in chunks():
+        state.update(chunk)
+    return state.fit()
+
+class _LogitState:
+    # Logistic fit that absorbs new rows without revisiting old ones. After each fit the rows seen so far are kept as the
+    # second-order expansion of their log-likelihood at the fitted coefficients (score and information), and IRLS over that
+    # expansion plus the new rows gives the next coefficients. The first fit is plain IRLS started and stopped as statsmodels
+    # does (mu = (y + 0.5) / 2, absolute deviance change <= tol); later fits differ from a full refit only by how much the old
+    # rows' curvature moves. Row sums that depend on the coefficients come from statistics(chunk, params) and are carried
+    # forward to first order through their Jacobian the same way
+    def __init__(self, width, design, response, statistics, penalty=0.0):
+        self.design = design
+        self.response = response
+        self.statistics = statistics
+        # L2 weight on every coefficient but the intercept, as sklearn's LogisticRegression applies 1 / C
+        self.penalty = np.full(width, float(penalty))
+        self.penalty[0] = 0.0
+        self.params = None
+        self.score = np.zeros(width)
+        self.information = np.zeros((width, width))
+        self.sums = None
+        self.jacobian = None
+        self.nobs = 0
+
+    def update(self, chunks, maxiter=100, tol=1e-8):
+        base = self.params
+        params = base
+        deviance = np.inf
+        converged = False
+        penalty = np.diag(self.penalty)
+        for iteration in range(maxiter + 1):
+            normal = _NormalEquations(len(self.score))
+            normal.xtx += self.information + penalty
+            normal.xty += self.score
+            current = 0.0
+            sums = None
+            jacobian = None
+            if base is not None:
+                normal.xty += self.information @ base
+                step = params - base
+                current = float(step @ self.information @ step - 2 * self.score @ step + params @ penalty @ params)
+            for chunk in chunks():
+                response = self.response(chunk)
+                design = self.design(chunk)
+                if params is None:
+                    mu = (response + 0.5) / 2
+                    eta = np.log(mu / (1 - mu))
+                else:
+                    eta = design @ params
+                    mu = _sigmoid(eta)
+                    chunksums, chunkjacobian = self.statistics(chunk, params)
+                    sums = chunksums if sums is None else sums + chunksums
+                    jacobian = chunkjacobian if jacobian is None else jacobian + chunkjacobian
+                weights = mu * (1 - mu)
+                normal.update(design, eta + (response - mu) / weights, weights)
+                clipped = np.clip(mu, 1e-15, 1 - 1e-15)
+                current -= 2 * float(np.sum(response * np.log(clipped) + (1 - response) * np.log(1 - clipped)))
+            if params is not None and abs(current - deviance) <= tol:
+                converged = True
+                break
+            if iteration == maxiter:
+                break
+            deviance = current
+            params = normal.solve()[0]
+        information = normal.xtx - penalty
+        if sums is not None and self.sums is not None:
+            sums = sums + self.sums + self.jacobian @ (params - base)
+            jacobian = jacobian + self.jacobian
+        elif sums is None and self.sums is not None:
+            sums = self.sums + self.jacobian @ (params - base)
+            jacobian = self.jacobian
+        self.score = normal.xty - information @ params
+        self.information = information
+        self.params = params
+        self.sums = sums
+        self.jacobian = jacobian
+        self.nobs += normal.nobs
+        return iteration, converged
+
+def _glmstatistics(treatment, common_causes, modifiers):
+    # Sum of p1 - p0 over the rows and its Jacobian in the coefficients
+    def statistics(chunk, params):
+        treated = _streamdesign(chunk, treatment, common_causes, modifiers, treatment_value=1)
+        control = _streamdesign(chunk, treatment, common_causes, modifiers, treatment_value=0)
+        p1 = _sigmoid(treated @ params)
+        p0 = _sigmoid(control @ params)
+        return np.array([p1.sum() - p0.sum()]), ((p1 * (1 - p1)) @ treated - (p0 * (1 - p0)) @ control)[None, :]
+    return statistics
+
+def _glmstate(treatment, outcome, common_causes, modifiers):
+    return _LogitState(2 + len(common_causes) + len(modifiers),
+                       lambda chunk: _streamdesign(chunk, treatment, common_causes, modifiers),
+                       lambda chunk: chunk[outcome].to_numpy(dtype=np.float64),
+                       _glmstatistics(treatment, common_causes, modifiers))
+
+def _glmfit(state, iterations, converged):
+    nobs = max(state.nobs, 1)
+    return {'params':state.params, 'cov':np.linalg.pinv(state.information, hermitian=True), 'gradient':state.jacobian[0] / nobs,
+            'effect':state.sums[0] / nobs, 'nobs':state.nobs, 'dfresid':None, 'binary':True, 'iterations':iterations,
+            'converged':converged}
+
+def _streamlogit(chunks, treatment, outcome, common_causes, modifiers, maxiter=100, tol=1e-8):
+    # IRLS for a Binomial/logit GLM with one pass over the chunks per iteration; each pass also accumulates
+    # mean(p1) - mean(p0) and its gradient
+    state = _glmstate(treatment, outcome, common_causes, modifiers)
+    iterations, converged = state.update(chunks, maxiter=maxiter, tol=tol)
+    return _glmfit(state, iterations, converged)
+
+def _ipwstatistics(treatment, outcome, common_causes, units, lower, upper):
+    # Weighted outcome and weight sums of each arm, as _ipwcontrast forms them, and their Jacobian in the propensity
+    # coefficients (zero where the score is clipped)
+    def statistics(chunk, params):
+        design = np.column_stack([np.ones(len(chunk)), chunk[common_causes].to_numpy(dtype=np.float64)])
+        treated = chunk[treatment].to_numpy(dtype=np.float64)
+        response = chunk[outcome].to_numpy(dtype=np.float64)
+        raw = _sigmoid(design @ params)
+        scores = np.clip(raw, lower, upper)
+        odds = scores / (1 - scores)
+        if units == 'att':
+            weights = treated + (1 - treated) * odds
+            slope = (1 - treated) * odds
+        elif units == 'atc':
+            weights = treated / odds + (1 - treated)
+            slope = -treated / odds
+        else:
+            weights = treated / scores + (1 - treated) / (1 - scores)
+            slope = (1 - treated) * odds - treated / odds
+        slope = slope * ((raw > lower) & (raw < upper))
+        parts = np.vstack([treated * response, treated, (1 - treated) * response, 1 - treated])
+        return parts @ weights, (parts * slope) @ design
+    return statistics
+
+def _fiteffect(fit):
+    value = fit['effect'] if 'effect' in fit else float(fit['gradient'] @ fit['params'])
+    return float(value), float(np.sqrt(fit['gradient'] @ fit['cov'] @ fit['gradient']))
+
+def streamestimate(source, digraph, treatment, outcome, identifier='default', method_name='default', chunksize=1000000,
+                   maxiter=100, tol=1e-8, cache=True, instrument=None):
+    from scipy import stats
+    from dowhy import CausalModel
+    if method_name not in ('default', 'backdoor.linear_regression', 'backdoor.generalized_linear_model'):
+        raise ValueError('Streaming estimation supports backdoor.linear_regression and backdoor.generalized_linear_model, not ' + repr(method_name))
+    instrument = _instrument(instrument)
+    first = len(instrument.timings)
+    with instrument.stage('identification'):
+        schema, source = _streamschema(source)
+        if isinstance(digraph, CompiledGraph):
+            cmodel = digraph.causalmodel(schema, treatment, outcome)
+        else:
+            cmodel = CausalModel(data=schema, treatment=treatment, outcome=outcome, graph=digraph)
+        identified_estimand = _identify(cmodel, identifier, cache=cache)
+        if _pickestimand(classifyestimand(identified_estimand), 'backdoor') is None:
+            raise ValueError('No backdoor estimand identified for ' + str(treatment) + ' -> ' + str(outcome))
+        common_causes = list(identified_estimand.get_backdoor_variables())
+        modifiers = [c for c in cmodel.get_effect_modifiers() if c in schema.columns]
+        columns = list(dict.fromkeys([treatment, outcome] + common_causes + modifiers))
+    with _streamsource(source, columns, chunksize, spill=method_name != 'backdoor.linear_regression') as chunks:
+        fit = None
+        estmethod = method_name
+        if method_name != 'backdoor.generalized_linear_model':
+            with instrument.stage('stream.ols'):
+                fit = _streamols(chunks, treatment, outcome, common_causes, modifiers)
+            estmethod = 'backdoor.linear_regression'
+        if method_name == 'backdoor.generalized_linear_model' or (method_name == 'default' and fit['binary'] == True):
+            with instrument.stage('stream.irls'):
+                fit = _streamlogit(chunks, treatment, outcome, common_causes, modifiers, maxiter=maxiter, tol=tol)
+            estmethod = 'backdoor.generalized_linear_model'
+    value, stderr = _fiteffect(fit)
+    if fit['dfresid'] is None:
+        critical = stats.norm.ppf(0.975)
+    else:
+        critical = stats.t.ppf(0.975, fit['dfresid'])
+    features = ['const', treatment] + common_causes + [treatment + '*' + c for c in modifiers]
+    return StreamingEstimate(estimand='backdoor', method_name=estmethod, treatment=treatment, outcome=outcome, features=features,
+                             params=fit['params'], bse=np.sqrt(np.diag(fit['cov'])), value=float(value), std_error=stderr,
+                             ci_lower=float(value - critical * stderr), ci_upper=float(value + critical * stderr),
+                             nobs=fit['nobs'], iterations=fit['iterations'], converged=fit['converged'],
+                             timings=instrument.summary(first))
+
+class IncrementalEstimate(typing.NamedTuple):
+    method_name: str
+    treatment: str
+    outcome: str
+    value: float
+    std_error: typing.Any
+    nobs: int
+    added: int
+    refit: bool
+    reason: typing.Any
+    iterations: int
+    timings: dict
+
+    def to_dict(self):
+        return {field: _jsonable(getattr(self, field)) for field in self._fields}
+
+    def to_json(self):
+        return json.dumps(self.to_dict())
+
+_INCREMENTAL_METHODS = ('default', 'backdoor.linear_regression', 'backdoor.generalized_linear_model', 'backdoor.propensity_score_weighting')
+
+def _incrementalframes(cmodel):
+    # The model data followed by the rows appended through incrementalestimate, kept as a list instead of concatenated.
+    # The appended chunks are private to incrementalestimate: simulator and the other entry points read only cmodel._data
+    return [cmodel._data] + cmodel.__dict__.get('_causalfast_appended', [])
+
+def _incrementaldata(state, data):
+    # Whether the model data still starts with the rows the state has seen. The same frame object is trusted (in-place value
+    # edits are not tracked, as for DataProfile); a replacement frame must reproduce the fingerprint of those rows
+    if state['data']() is data:
+        return True
+    return datafingerprint(data.iloc[:state['fingerprinted']], blocks=None) == state['fingerprint']
+
+def incrementalestimate(cmodel, rows=None, method_name='default', identifier='default', target_units='ate', chunksize=1000000,
+                        min_ps_score=0.05, max_ps_score=0.95, refit=False, cache=True, instrument=None):
+    if method_name not in _INCREMENTAL_METHODS:
+        raise ValueError('Incremental estimation supports ' + ', '.join(_INCREMENTAL_METHODS[1:]) + ', not ' + repr(method_name))
+    instrument = _instrument(instrument)
+    first = len(instrument.timings)
+    data = cmodel._data
+    if rows is not None:
+        with instrument.stage('append'):
+            missing = [c for c in data.columns if c not in rows.columns]
+            if len(missing) > 0:
+                raise ValueError('Appended rows are missing model data columns: ' + ', '.join(map(str, missing)))
+            # Only the new chunk is touched: appending costs O(new rows), not a copy of everything seen so far
+            cmodel.__dict__.setdefault('_causalfast_appended', []).append(rows[list(data.columns)])
+    appended = cmodel.__dict__.get('_causalfast_appended', [])
+    frames = _incrementalframes(cmodel)
+    nobs = sum(len(frame) for frame in frames)
+    treatment = cmodel._treatment[0]
+    outcome = cmodel._outcome[0]
+    with instrument.stage('identification'):
+        identified_estimand = _identify(cmodel, identifier, cache=cache)
+        if _pickestimand(classifyestimand(identified_estimand), 'backdoor') is None:
+            raise ValueError('No backdoor estimand identified for ' + str(treatment) + ' -> ' + str(outcome))
+        common_causes = list(identified_estimand.get_backdoor_variables())
+        modifiers = []
+        if method_name != 'backdoor.propensity_score_weighting':
+            modifiers = [c for c in cmodel.get_effect_modifiers() if c in data.columns]
+        columns = list(dict.fromkeys([treatment, outcome] + common_causes + modifiers))
+    # Fitted state lives on the model next to its profile. Rows past the model data and appended chunks already seen are new;
+    # a changed graph, column set or setting, fewer rows than before or model data whose seen rows changed forces a full refit
+    key = (_graphhash(_modelgraph(cmodel)), tuple(data.columns), tuple(columns), target_units, min_ps_score, max_ps_score)
+    states = cmodel.__dict__.setdefault('_causalfast_incremental', {})
+    state = states.get((method_name, identifier))
+    with instrument.stage('incremental.check'):
+        if refit == True:
+            reason = 'refit requested'
+        elif state is None:
+            reason = 'initial fit'
+        elif state['key'] != key:
+            reason = 'graph, columns or settings changed'
+        elif len(data) < state['rows'] or len(appended) < state['chunks']:
+            reason = 'rows removed'
+        elif not _incrementaldata(state, data):
+            reason = 'data changed'
+        else:
+            reason = None
+    if reason is None:
+        added = nobs - state['nobs']
+        new = [frame for frame in [data.iloc[state['rows']:]] + appended[state['chunks']:] if len(frame) > 0]
+    else:
+        added = nobs
+        new = frames
+        state = {'key':key, 'nobs':0, 'rows':0, 'chunks':0, 'linear':None, 'logit':None, 'data':None, 'fingerprint':None,
+                 'fingerprinted':0}
+    chunks = lambda: (chunk for frame in new for chunk in _edachunks(frame, chunksize, columns))
+    with instrument.stage('incremental.refit' if reason is not None else 'incremental.update'):
+        stderr = None
+        iterations = 1
+        if method_name == 'backdoor.propensity_score_weighting':
+            # The logistic propensity model (sklearn's default L2 penalty) and the weighted arm sums are updated from the new
+            # rows only, through the score and information the earlier rows left behind
+            if state['logit'] is None:
+                state['logit'] = _LogitState(1 + len(common_causes),
+                                             lambda chunk: np.column_stack([np.ones(len(chunk)), chunk[common_causes].to_numpy(dtype=np.float64)]),
+                                             lambda chunk: chunk[treatment].to_numpy(dtype=np.float64),
+                                             _ipwstatistics(treatment, outcome, common_causes, target_units, min_ps_score, max_ps_score),
+                                             penalty=1.0)
+            iterations = state['logit'].update(chunks)[0]
+            sums = state['logit'].sums
+            value = float(sums[0] / sums[1] - sums[2] / sums[3])
+            estmethod = method_name
+        else:
+            fit = None
+            estmethod = method_name
+            if method_name != 'backdoor.generalized_linear_model':
+                if state['linear'] is None:
+                    state['linear'] = _LinearState(treatment, outcome, common_causes, modifiers)
+                for chunk in chunks():
+                    state['linear'].update(chunk)
+                fit = state['linear'].fit()
+                estmethod = 'backdoor.linear_regression'
+            if method_name == 'backdoor.generalized_linear_model' or (method_name == 'default' and fit['binary'] == True):
+                if state['logit'] is None:
+                    state['logit'] = _glmstate(treatment, outcome, common_causes, modifiers)
+                fit = _glmfit(state['logit'], *state['logit'].update(chunks))
+                estmethod = 'backdoor.generalized_linear_model'
+            value, stderr = _fiteffect(fit)
+            iterations = fit['iterations']
+    if state['data'] is None or state['data']() is not data:
+        # Fingerprinted once per model data frame, so appending through rows= never rehashes the rows already seen
+        with instrument.stage('incremental.fingerprint'):
+            state['data'] = weakref.ref(data)
+            state['fingerprint'] = datafingerprint(data, blocks=None)
+            state['fingerprinted'] = len(data)
+    state['nobs'] = nobs
+    state['rows'] = len(data)
+    state['chunks'] = len(appended)
+    states[(method_name, identifier)] = state
+    return IncrementalEstimate(method_name=estmethod, treatment=treatment, outcome=outcome, value=value, std_error=stderr,
+                               nobs=nobs, added=added, refit=reason is not None, reason=reason, iterations=iterations,
+                               timings=instrument.summary(first))
+
+def _catespec(estimate):
+    # What scoring a fitted simulator estimate on new rows needs: the fitted estimator, its input columns and the contrast
+    from dowhy.causal_estimators.econml import Econml
+    from dowhy.causal_estimators.regression_estimator import RegressionEstimator
+    estimator = estimate.__dict__.get('estimator')
+    target = estimate.__dict__.get('target_estimand')
+    if target is None or len(target.treatment_variable) != 1:
+        raise ValueError('Conditional effects need a fitted single-treatment estimate from simulator')
+    spec = {'estimator':estimator, 'treatment':target.treatment_variable[0], 'treatment_value':estimate.treatment_value,
+            'control_value':estimate.control_value}
+    if isinstance(estimator, RegressionEstimator):
+        spec['kind'] = 'regression'
+        spec['columns'] = list(dict.fromkeys(list(estimator._observed_common_causes_names or []) + list(estimator._effect_modifier_names or [])))
+    elif isinstance(estimator, Econml):
+        spec['kind'] = 'econml'
+        spec['columns'] = list(estimator._effect_modifier_names or [])
+    else:
+        raise ValueError('Conditional effects support linear regression, GLM and EconML (DML, LinearDRLearner) estimates, not ' + type(estimator).__name__)
+    return spec
+
+def _regressioncate(spec, chunk, intervals=False, confidence_level=0.95):
+    # Per-row f(x, treatment_value) - f(x, control_value) from DoWhy's own feature builder (fitted encoders included) and the
+    # statsmodels fit; intervals by the delta method, t for OLS and normal for GLM as statsmodels reports them
+    from scipy import stats
+    estimator = spec['estimator']
+    model = estimator.model
+    rows = len(chunk)
+    # The treatment column is only read for its encoding and then overwritten, so new populations need not carry it
+    frame = chunk.assign(**{spec['treatment']: spec['control_value']})
+    treated = estimator._build_features(frame, treatment_values=np.full(rows, spec['treatment_value'], dtype=np.float64))
+    control = estimator._build_features(frame, treatment_values=np.full(rows, spec['control_value'], dtype=np.float64))
+    params = np.asarray(model.params, dtype=np.float64)
+    treatedeta = treated @ params
+    controleta = control @ params
+    family = getattr(model, 'family', None)
+    if family is None:
+        effect = treatedeta - controleta
+    else:
+        effect = family.link.inverse(treatedeta) - family.link.inverse(controleta)
+    if intervals == False:
+        return effect, None
+    if family is None:
+        gradient = treated - control
+        critical = stats.t.ppf((1 + confidence_level) / 2, model.df_resid)
+    else:
+        gradient = family.link.inverse_deriv(treatedeta)[:, None] * treated - family.link.inverse_deriv(controleta)[:, None] * control
+        critical = stats.norm.ppf((1 + confidence_level) / 2)
+    stderr = np.sqrt(np.einsum('ij,jk,ik->i', gradient, np.asarray(model.cov_params(), dtype=np.float64), gradient))
+    return effect, (effect - critical * stderr, effect + critical * stderr)
+
+def _econmlcate(spec, chunk, intervals=False, confidence_level=0.95):
+    # The fitted EconML estimator is called directly: DoWhy's wrapper fixes alpha to the level used at fit time
+    model = spec['estimator'].estimator
+    rows = len(chunk)
+    features = chunk[spec['columns']].to_numpy() if len(spec['columns']) > 0 else None
+    contrast = {'T0': spec['control_value'], 'T1': spec['treatment_value']}
+    # Fitted without effect modifiers the effect is one constant, broadcast to every row
+    expand = (lambda values: np.full(rows, np.ravel(values)[0])) if features is None else (lambda values: np.asarray(values).reshape(rows, -1)[:, 0])
+    effect = expand(model.effect(features, **contrast))
+    if intervals == False:
+        return effect, None
+    lower, upper = model.effect_interval(features, alpha=1 - confidence_level, **contrast)
+    return effect, (expand(lower), expand(upper))
+
+_CATE_STATE = {}
+
+def _cateinit(spec, keep, intervals, confidence_level):
+    _CATE_STATE.update(spec=spec, keep=keep, intervals=intervals, confidence_level=confidence_level)
+
+def _cateworker(chunk):
+    spec = _CATE_STATE['spec']
+    scorer = _regressioncate if spec['kind'] == 'regression' else _econmlcate
+    effect, interval = scorer(spec, chunk, _CATE_STATE['intervals'], _CATE_STATE['confidence_level'])
+    batch = chunk[_CATE_STATE['keep']].copy() if len(_CATE_STATE['keep']) > 0 else pd.DataFrame(index=chunk.index)
+    batch['effect'] = effect
+    if interval is not None:
+        batch['ci_lower'], batch['ci_upper'] = interval
+    return batch
+
+def _catebatches(chunks, spec, keep, intervals, confidence_level, workers=None):
+    if workers == -1:
+        workers = os.cpu_count() or 1
+    if workers is None or workers <= 1:
+        _cateinit(spec, keep, intervals, confidence_level)
+        try:
+            for chunk in chunks:
+                yield _cateworker(chunk)
+        finally:
+            _CATE_STATE.clear()
+        return
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+    else:
+        context = multiprocessing.get_context()
+    # At most two chunks per worker in flight, in source order, so a large source is never read ahead in full
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_cateinit,
+                             initargs=(spec, keep, intervals, confidence_level)) as pool:
+        pending = []
+        for chunk in chunks:
+            pending.append(pool.submit(_cateworker, chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+def cateestimate(estimate, data, chunksize=100000, workers=None, intervals=False, confidence_level=0.95, keep=None,
+                 output='chunks', path=None):
+    # Conditional (per-row) effects of a fitted simulator estimate on data that may be new, larger than memory and unlabelled:
+    # only the estimator's common causes and effect modifiers (plus keep) are read, chunk by chunk, and nothing is refit
+    spec = _catespec(_fittedestimate(estimate))
+    keep = [] if keep is None else [keep] if isinstance(keep, str) else list(keep)
+    chunks = _edachunks(data, chunksize, columns=list(dict.fromkeys(spec['columns'] + keep)))
+    batches = _catebatches(chunks, spec, keep, intervals, confidence_level, workers=workers)
+    if output == 'chunks':
+        return batches
+    if output == 'dataframe':
+        return pd.concat(list(batches))
+    if path is None:
+        raise ValueError('output=' + repr(output) + ' requires a path')
+    if output == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        writer = None
+        try:
+            for batch in batches:
+                table = pa.Table.from_pandas(batch, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+        return path
+    raise ValueError('Unknown output: ' + repr(output) + " (use 'chunks', 'dataframe' or 'parquet')")
+
+class PropensityEstimate(typing.NamedTuple):
+    treatment: str
+    outcome: str
+    common_causes: list
+    nobs: int
+    treated: int
+    stratification: dict
+    matching: dict
+    weighting: dict
+    strata_kept: int
+    unmatched: dict
+    params: dict
+    timings: dict
+    propensity_scores: typing.Any
+    strata: typing.Any
+
+    def to_dict(self, arrays=False):
+        record = {field: _jsonable(getattr(self, field)) for field in self._fields if field not in ('propensity_scores', 'strata')}
+        if arrays == True:
+            record['propensity_scores'] = _jsonable(self.propensity_scores)
+            record['strata'] = _jsonable(self.strata)
+        return record
+
+    def to_json(self, arrays=False):
+        return json.dumps(self.to_dict(arrays=arrays))
+
+def _propensityscores(data, treatment, common_causes, model=None):
+    # DoWhy's propensity fit: categorical common causes one-hot encoded (first level dropped), LogisticRegression() unless a model is given
+    from sklearn.base import clone
+    from sklearn.linear_model import LogisticRegression
+    features = data[common_causes]
+    categorical = list(features.select_dtypes(include=['object', 'string', 'category']).columns)
+    if len(categorical) > 0:
+        features = pd.get_dummies(features, columns=categorical, drop_first=True, dtype=np.float64)
+    model = LogisticRegression() if model is None else clone(model)
+    model.fit(features.to_numpy(dtype=np.float64), treatment)
+    return model.predict_proba(features.to_numpy(dtype=np.float64))[:, 1]
+
+def _unitcontrasts(effects, treatedweights, controlweights):
+    treatedweights = np.asarray(treatedweights, dtype=np.float64)
+    controlweights = np.asarray(controlweights, dtype=np.float64)
+    return {'att': float((effects * treatedweights).sum() / treatedweights.sum()),
+            'atc': float((effects * controlweights).sum() / controlweights.sum()),
+            'ate': float((effects * (treatedweights + controlweights)).sum() / (treatedweights + controlweights).sum())}
+
+def _stratifyscores(treatment, outcome, scores, order, num_strata=50, clipping_threshold=5):
+    # DoWhy's strata, round(average rank / n * num_strata), from the sorted scores and bincounts instead of pandas rank, groupby and filter;
+    # strata with clipping_threshold or fewer treated or control units are dropped
+    rows = len(scores)
+    ordered = scores[order]
+    starts = np.flatnonzero(np.concatenate([[True], ordered[1:] != ordered[:-1]]))
+    ends = np.append(starts[1:], rows)
+    ranks = np.empty(rows)
+    ranks[order] = np.repeat((starts + ends + 1) / 2.0, ends - starts)
+    strata = np.round(ranks / rows * num_strata).astype(np.int64)
+    size = int(strata.max()) + 1
+    treatedcount = np.bincount(strata, weights=treatment, minlength=size)
+    controlcount = np.bincount(strata, weights=1 - treatment, minlength=size)
+    keep = np.minimum(treatedcount, controlcount) > clipping_threshold
+    if not keep.any():
+        raise ValueError('No strata have more than ' + str(clipping_threshold) + ' treated and control units; lower num_strata or clipping_threshold')
+    treatedmean = np.bincount(strata, weights=treatment * outcome, minlength=size)[keep] / treatedcount[keep]
+    controlmean = np.bincount(strata, weights=(1 - treatment) * outcome, minlength=size)[keep] / controlcount[keep]
+    return _unitcontrasts(treatedmean - controlmean, treatedcount[keep], controlcount[keep]), strata, int(keep.sum())
+
+def _nearestscores(scores, pool, queries):
+    # Nearest pool row (pool: row indices in score order) for every query row by a 1-D searchsorted; ties go to the earlier row
+    ordered = scores[pool]
+    values = scores[queries]
+    right = np.clip(np.searchsorted(ordered, values), 0, len(ordered) - 1)
+    left = np.clip(right - 1, 0, len(ordered) - 1)
+    pick = np.where(values - ordered[left] <= ordered[right] - values, left, right)
+    return pool[pick], np.abs(values - ordered[pick])
+
+def _matchscores(treatment, outcome, scores, order, caliper=None):
+    # DoWhy's one-nearest-neighbour matching with replacement on the score: ATT matches treated to controls, ATC controls to treated,
+    # ATE weights the two by unit counts. Units without a match within caliper are left out.
+    # Both pools come out of the one stable sort of all scores, so neither group is sorted again
+    treatedrows = order[treatment[order] == 1]
+    controlrows = order[treatment[order] == 0]
+    controlmatch, controldistance = _nearestscores(scores, controlrows, treatedrows)
+    treatedmatch, treateddistance = _nearestscores(scores, treatedrows, controlrows)
+    treatedkeep = np.ones(len(treatedrows), dtype=bool) if caliper is None else controldistance <= caliper
+    controlkeep = np.ones(len(controlrows), dtype=bool) if caliper is None else treateddistance <= caliper
+    if not treatedkeep.any() or not controlkeep.any():
+        raise ValueError('No treated or control units matched within caliper=' + str(caliper))
+    att = float((outcome[treatedrows] - outcome[controlmatch])[treatedkeep].mean())
+    atc = float((outcome[treatedmatch] - outcome[controlrows])[controlkeep].mean())
+    matchedtreated = int(treatedkeep.sum())
+    matchedcontrol = int(controlkeep.sum())
+    ate = (att * matchedtreated + atc * matchedcontrol) / (matchedtreated + matchedcontrol)
+    unmatched = {'treated': len(treatedkeep) - matchedtreated, 'control': len(controlkeep) - matchedcontrol}
+    return {'att': att, 'atc': atc, 'ate': float(ate)}, unmatched
+
+def propensityestimate(cmodel, identifier='default', num_strata=50, clipping_threshold=5, caliper=None, min_ps_score=0.05,
+                       max_ps_score=0.95, propensity_model=None, propensity_scores=None, cache=True, instrument=None):
+    instrument = _instrument(instrument)
+    first = len(instrument.timings)
+    data = cmodel._data
+    treatment = cmodel._treatment[0]
+    outcome = cmodel._outcome[0]
+    with instrument.stage('identification'):
+        identified_estimand = _identify(cmodel, identifier, cache=cache)
+        if _pickestimand(classifyestimand(identified_estimand), 'backdoor') is None:
+            raise ValueError('No backdoor estimand identified for ' + str(treatment) + ' -> ' + str(outcome))
+        common_causes = list(identified_estimand.get_backdoor_variables())
+        if len(common_causes) == 0 and propensity_scores is None:
+            raise ValueError('No common causes/confounders present. Propensity score based methods are not applicable')
+    treated = data[treatment].to_numpy(dtype=np.float64)
+    if not np.isin(treated, (0, 1)).all():
+        raise ValueError('Propensity score methods are applicable only for binary treatments')
+    response = data[outcome].to_numpy(dtype=np.float64)
+    # One score vector feeds all three estimators; only weighting clips it, as DoWhy's weighting estimator does
+    with instrument.stage('propensity.fit'):
+        if propensity_scores is None:
+            scores = _propensityscores(data, treated, common_causes, propensity_model)
+        elif isinstance(propensity_scores, str):
+            scores = data[propensity_scores].to_numpy(dtype=np.float64)
+        else:
+            scores = np.asarray(propensity_scores, dtype=np.float64)
+    with instrument.stage('propensity.stratification'):
+        order = np.argsort(scores, kind='stable')
+        stratification, strata, kept = _stratifyscores(treated, response, scores, order, num_strata, clipping_threshold)
+    with instrument.stage('propensity.matching'):
+        matching, unmatched = _matchscores(treated, response, scores, order, caliper)
+    with instrument.stage('propensity.weighting'):
+        clipped = np.clip(scores, min_ps_score, max_ps_score)
+        weighting = {units: float(_ipwcontrast(treated, response, clipped, units)) for units in ('att', 'atc', 'ate')}
+    params = {'num_strata': num_strata, 'clipping_threshold': clipping_threshold, 'caliper': caliper,
+              'min_ps_score': min_ps_score, 'max_ps_score': max_ps_score}
+    return PropensityEstimate(treatment=treatment, outcome=outcome, common_causes=common_causes, nobs=len(data), treated=int(treated.sum()),
+                              stratification=stratification, matching=matching, weighting=weighting, strata_kept=kept,
+                              unmatched=unmatched, params=params, timings=instrument.summary(first),
+                              propensity_scores=scores, strata=strata)
+
+class PreviewStage(typing.NamedTuple):
+    sample_size: int
+    fraction: float
+    value: typing.Any
+    std_error: typing.Any
+    ci_lower: typing.Any
+    ci_upper: typing.Any
+    fold_values: list
+    change: typing.Any
+    seconds: float
+
+class PreviewEstimate(typing.NamedTuple):
+    estimand: str
+    method_name: str
+    method_params: typing.Any
+    target_units: typing.Any
+    treatment: str
+    outcome: str
+    value: typing.Any
+    std_error: typing.Any
+    ci_lower: typing.Any
+    ci_upper: typing.Any
+    confidence_level: float
+    nobs: int
+    sample_size: int
+    stratify: list
+    stages: list
+    converged: typing.Any
+    refutations: list
+    timings: dict
+    estimate: typing.Any
+
+    def to_dict(self):
+        return {field: _jsonable(getattr(self, field)) for field in self._fields if field != 'estimate'}
+
+    def to_json(self):
+        return json.dumps(self.to_dict())
+
+_PREVIEW_MIN_ROWS = 1000
+
+def _previeworder(data, columns, seed=None):
+    # One random order per stratum, drawn once: every preview sample takes a prefix of each, so larger samples contain the smaller ones
+    if len(columns) > 0:
+        codes = data.groupby(columns, sort=True, dropna=False).ngroup().to_numpy()
+    else:
+        codes = np.zeros(len(data), dtype=np.int64)
+    order = np.random.default_rng(seed).permutation(len(data))
+    order = order[np.argsort(codes[order], kind='stable')]
+    counts = np.bincount(codes)
+    return order, np.concatenate([[0], np.cumsum(counts)[:-1]]), counts
+
+def _previewsample(order, starts, counts, size, folds):
+    # Proportional allocation (largest remainder) across strata; folds are dealt round-robin within each stratum, so they are stratified too
+    quota = counts * (size / counts.sum())
+    take = np.floor(quota).astype(np.int64)
+    short = size - int(take.sum())
+    if short > 0:
+        take[np.argsort(take - quota, kind='stable')[:short]] += 1
+    positions = np.concatenate([order[start:start + k] for start, k in zip(starts, take)])
+    foldids = np.concatenate([np.arange(k) % folds for k in take])
+    arranged = np.argsort(positions, kind='stable')
+    return positions[arranged], foldids[arranged]
+
+def _previewvalue(cmodel, identified_estimand, frame, estmethod, estmethodparam, unitparam):
+    cmodel._data = frame.copy(deep=False)
+    estimate = cmodel.estimate_effect(identified_estimand, method_name=estmethod, method_params=estmethodparam, target_units=unitparam)
+    value = estimate.__dict__.get('value')
+    return estimate, float(value) if np.ndim(value) == 0 and value is not None else float(np.mean(value))
+
+def previewestimate(cmodel, size=None, fraction=0.1, stratify='auto', folds=4, confidence_level=0.95, tolerance=None, growth=4,
+                    max_stages=5, identifier='default', method_name='default', method_params='default', unit='default',
+                    estimand='auto', refute=True, refute_workers=None, random_seed=None, cache=True, project=True, instrument=None):
+    from scipy import stats
+    if folds < 2:
+        raise ValueError('folds must be at least 2 to derive an error band')
+    instrument = _instrument(instrument)
+    first = len(instrument.timings)
+    nobs = len(cmodel._data)
+    # Identification and estimator selection see the full graph and the full data, so the preview runs what the full simulator would
+    with instrument.stage('identification'):
+        identified_estimand = _identify(cmodel, identifier, cache=cache)
+        estimandkinds = classifyestimand(identified_estimand)
+        estimandcheck = _pickestimand(estimandkinds, estimand)
+        if estimandcheck is None:
+            raise ValueError('Unable to identify a ' + str(estimand) + ' estimand for ' + str(cmodel._treatment) + ' -> ' + str(cmodel._outcome))
+    with instrument.stage('estimator_selection'):
+        profile = _profile(cmodel)
+        estmethod, estmethodparam, unitparam = _selectestimator(estimandcheck, method_name, method_params, unit, isbinary=profile.isbinary,
+                                                                outcome=cmodel._outcome, treatment=cmodel._treatment, verbose=False,
+                                                                rows=nobs)
+        if stratify == 'auto':
+            stratify = [c for c in cmodel._treatment + cmodel._outcome if profile.isbinary(c)]
+        elif stratify is None or stratify == False:
+            stratify = []
+        else:
+            stratify = [stratify] if isinstance(stratify, str) else list(stratify)
+    with instrument.stage('preview.sample'):
+        columns, compact = _projection(cmodel, identified_estimand, project)
+        frame = _projectframe(cmodel, list(dict.fromkeys(columns + stratify)), compact=compact)
+        order, starts, counts = _previeworder(frame, stratify, random_seed)
+    sample_size = min(nobs, int(size) if size is not None else max(int(np.ceil(fraction * nobs)), _PREVIEW_MIN_ROWS))
+    critical = stats.t.ppf(0.5 + confidence_level / 2, folds - 1)
+    original = cmodel._data
+    stages = []
+    converged = None if tolerance is None else False
+    try:
+        while True:
+            with instrument.stage('preview.estimate.' + str(sample_size)):
+                positions, foldids = _previewsample(order, starts, counts, sample_size, folds)
+                sample = frame.iloc[positions]
+                estimate, value = _previewvalue(cmodel, identified_estimand, sample, estmethod, estmethodparam, unitparam)
+                foldvalues = []
+                stderr = 0.0
+                if sample_size < nobs:
+                    # Each fold estimate has folds times the variance of the sample estimate; the finite-population factor
+                    # turns that into the spread of the sample estimate around the full-data one
+                    foldvalues = [_previewvalue(cmodel, identified_estimand, sample.iloc[foldids == fold], estmethod, estmethodparam, unitparam)[1]
+                                  for fold in range(folds)]
+                    stderr = float(np.std(foldvalues, ddof=1) / np.sqrt(folds) * np.sqrt(1 - sample_size / nobs))
+            change = None if len(stages) == 0 else value - stages[-1].value
+            stages.append(PreviewStage(sample_size=sample_size, fraction=sample_size / nobs, value=value, std_error=stderr,
+                                       ci_lower=value - critical * stderr, ci_upper=value + critical * stderr, fold_values=foldvalues,
+                                       change=change, seconds=instrument.timings[-1].wall_seconds))
+            if tolerance is None:
+                break
+            if critical * stderr <= tolerance and (change is None or abs(change) <= tolerance):
+                converged = True
+                break
+            if sample_size >= nobs or len(stages) >= max_stages:
+                break
+            sample_size = min(nobs, sample_size * growth)
+        refutations = []
+        if refute == True:
+            with instrument.stage('refuters'):
+                cmodel._data = sample.copy(deep=False)
+                plan = _refuterplan(estimandcheck)
+                refutations = _runrefuters(cmodel, identified_estimand, estimate, plan, _refuterseeds(random_seed, len(plan)), workers=refute_workers)
+                for refutation in refutations:
+                    instrument.record(refutation.timing)
+                estimate.add_params(refutations=refutations)
+    finally:
+        cmodel._data = original
+    final = stages[-1]
+    return PreviewEstimate(estimand=estimandcheck, method_name=estmethod, method_params=estmethodparam, target_units=unitparam,
+                           treatment=cmodel._treatment[0], outcome=cmodel._outcome[0], value=final.value, std_error=final.std_error,
+                           ci_lower=final.ci_lower, ci_upper=final.ci_upper, confidence_level=confidence_level, nobs=nobs,
+                           sample_size=final.sample_size, stratify=stratify, stages=stages, converged=converged,
+                           refutations=refutations, timings=instrument.summary(first), estimate=estimate)
 
 class functions:
     def __init__(
@@ -45,380 +2797,583 @@ class functions:
         self.logger = logging.getLogger(__name__)
         self._estimator_cache = {}
 
-    def simulator(causalmodel='causalmodel',identifier='default',method_name='default',method_params='default',unit='default',full_output=True,refute=True):
+    def simulator(causalmodel='causalmodel',identifier='default',method_name='default',method_params='default',unit='default',full_output=True,refute=True,refute_workers=None,random_seed=None,cache=True,estimand='auto',instrument=None,verbose=True,confidence_intervals=False,project=True,bootstrap='dowhy',store=None,effect_modifiers='default',conditional_estimates='default'):
+        def say(*args):
+            if verbose == True:
+                print(*args)
         def newline():
-            print('')
+            say('')
         def menubreak():
             newline()
-            print('____________________________________________')
+            say('____________________________________________')
         def helpmenu0():
-            print('CausalFast Simulator():')
+            say('CausalFast Simulator():')
         def idbreak():
-            print('Identify: ')
-            print('==================================================')
+            say('Identify: ')
+            say('==================================================')
         def estbreak():
-            print('Estimate: ')
-            print('==================================================')
+            say('Estimate: ')
+            say('==================================================')
         def refbreak():
-            print('Refute: ')
-            print('==================================================')
+            say('Refute: ')
+            say('==================================================')
         def ivstatement():
-            print('Note: method_name=\'default\' uses \'iv.instrumental_variable\'')
-            print('DoWhy has other iv estimation methods: ')
-            print('   Binary Instrument/Wald Estimator')
-            print('   Two-stage least squares')
-            print('   Regression discontinuity')
-            print('')
+            say('Note: method_name=\'default\' uses \'iv.instrumental_variable\'')
+            say('DoWhy has other iv estimation methods: ')
+            say('   Binary Instrument/Wald Estimator')
+            say('   Two-stage least squares')
+            say('   Regression discontinuity')
+            say('')
         def frontdoorstatement():
-            print('DoWhy has one frontdoor estimation method: \'frontdoor.two_stage_regression\'')
+            say('DoWhy has one frontdoor estimation method: \'frontdoor.two_stage_regression\'')
         def backdoorstatement():
-            print('Note: method_name=\'default\' uses \'backdoor.linear_regression\' or \'backdoor.generalized_linear_model\'')
-            print('Note: method_name=\'default\' override options include: ')
-            print('   OLS Linear:  \'backdoor.linear_regression\'')
-            print('   LogisticGLM: \'backdoor.generalized_linear_model\'')
-            print('   LogisticML:  \'backdoor.econml.dr.LinearDRLearner\'')
-            print('   DoubleML:    \'backdoor.econml.dml.DML\'')
-            print('   Propensity:  \'backdoor.propensity_score_stratification\'')
-            print('   Propensity:  \'backdoor.propensity_score_matching\'')
-            print('   Propensity:  \'backdoor.propensity_score_weighting\'')
+            say('Note: method_name=\'default\' uses \'backdoor.linear_regression\' or \'backdoor.generalized_linear_model\'')
+            say('Note: method_name=\'default\' override options include: ')
+            say('   OLS Linear:  \'backdoor.linear_regression\'')
+            say('   LogisticGLM: \'backdoor.generalized_linear_model\'')
+            say('   LogisticML:  \'backdoor.econml.dr.LinearDRLearner\'')
+            say('   DoubleML:    \'backdoor.econml.dml.DML\'')
+            say('   Propensity:  \'backdoor.propensity_score_stratification\'')
+            say('   Propensity:  \'backdoor.propensity_score_matching\'')
+            say('   Propensity:  \'backdoor.propensity_score_weighting\'')
             newline()
-            print('Note: Propensity Scores require both binary outcome and binary treatment variables')
-            print('Note: generalized_linear_model (Logistic) & econml.dr.LinearDRLearner require a binary outcome variable')
+            say('Note: Propensity Scores require both binary outcome and binary treatment variables')
+            say('Note: generalized_linear_model (Logistic) & econml.dr.LinearDRLearner require a binary outcome variable')
         def nodag():
-            print('Unable to identify DAG Estimand. Please input a valid DAG.')
+            say('Unable to identify DAG Estimand. Please input a valid DAG.')
         def returnstatement():
-            print('Returned: simulator[0] = DoWhyEstimateObj, simulator[1] = PropensityScores')
+            say('Returned: simulator[0] = DoWhyEstimateObj, simulator[1] = PropensityScores')
         def mainmenu():
             helpmenu0()
             menubreak()
-            print('Note:')
-            print('You have not provided a valid CausalModel object')
-            print('Create a valid CausalModel using causalfast makegraph()')
-            print('Return this object and use it as a parameter in causalfast.simulator()')
+            say('Note:')
+            say('You have not provided a valid CausalModel object')
+            say('Create a valid CausalModel using causalfast makegraph()')
+            say('Return this object and use it as a parameter in causalfast.simulator()')
             newline()
-            print('The CausalFast simulator will attempt to automatically run DoWhy analysis.')
-            print('By default, the CausalFast simulator will identify the correct estimand and assign a relevant estimator')
-            print('Syntax: causalfast.simulator(causalmodel=makegraphobj[0])')
-            print('Syntax: causalfast.simulator(causalmodel=\'causalmodel\',identifier=\'default\',method_name=\'default\',full_output=True')
+            say('The CausalFast simulator will attempt to automatically run DoWhy analysis.')
+            say('By default, the CausalFast simulator will identify the correct estimand and assign a relevant estimator')
+            say('Syntax: causalfast.simulator(causalmodel=makegraphobj[0])')
+            say('Syntax: causalfast.simulator(causalmodel=\'causalmodel\',identifier=\'default\',method_name=\'default\',full_output=True')
             newline()
-            print('Available DoWhy Identifier algorithms:')
-            print('   minimal-adjustment, maximal-adjustment, exhaustive-search, default')
+            say('Available DoWhy Identifier algorithms:')
+            say('   minimal-adjustment, maximal-adjustment, exhaustive-search, default')
             newline()
-            print('Automatically Selected DoWhy Estimators:')
-            print('   Backdoor:  backdoor.linear_regression')
-            print('   Frontdoor: frontdoor.two_stage_regression')
-            print('   Instrumental Variable: iv.instrumental_variable')
+            say('Estimand selection (estimand=):')
+            say('   auto (first identified of backdoor, iv, frontdoor), backdoor, iv, frontdoor')
+            say('   all: runs every identified estimand and returns a dict keyed by estimand')
             newline()
-            print('Overrideable Estimators: Additional Required parameters (method_params) are automatically generated')
-            print('   Backdoor + binary outcome (logistic):  backdoor.generalized_linear_model')
-            print('   Backdoor + binary outcome (logistic):  backdoor.econml.dr.LinearDRLearner')
-            print('   Backdoor + MachineLearning (DoubleML): backdoor.econml.dml.DML')
-            print('   Backdoor + binary treatment (Propensity Score ATT): backdoor.propensity_score_stratification')
-            print('   Backdoor + binary treatment (Propensity Score ATC): backdoor.propensity_score_matching')
-            print('   Backdoor + binary treatment (Propensity Score ATE): backdoor.propensity_score_weighting')
+            say('Automatically Selected DoWhy Estimators:')
+            say('   Backdoor:  backdoor.linear_regression')
+            say('   Frontdoor: frontdoor.two_stage_regression')
+            say('   Instrumental Variable: iv.instrumental_variable')
             newline()
-            print('Note: Logistic Regression requires a binary outcome variable')
-            print('Note: Propensity Scores require both binary outcome and binary treatment variables')
+            say('Overrideable Estimators: Additional Required parameters (method_params) are automatically generated')
+            say('   Backdoor + binary outcome (logistic):  backdoor.generalized_linear_model')
+            say('   Backdoor + binary outcome (logistic):  backdoor.econml.dr.LinearDRLearner')
+            say('   Backdoor + MachineLearning (DoubleML): backdoor.econml.dml.DML')
+            say('   Backdoor + binary treatment (Propensity Score ATT): backdoor.propensity_score_stratification')
+            say('   Backdoor + binary treatment (Propensity Score ATC): backdoor.propensity_score_matching')
+            say('   Backdoor + binary treatment (Propensity Score ATE): backdoor.propensity_score_weighting')
+            newline()
+            say('Note: Logistic Regression requires a binary outcome variable')
+            say('Note: Propensity Scores require both binary outcome and binary treatment variables')
             return
-        def estcheck(identified_estimand):
-                estimandchk = str(identified_estimand)
-                estimandchk2 = estimandchk.split("Estimand expression:")
-                estimandchk = estimandchk.replace(estimandchk2[1], '')
-                estimandchk = estimandchk[:-20]
-                estimandchk = estimandchk[-30:]
-                estimandchk = estimandchk.split("Estimand name: ")
-                estimandchk = estimandchk[1].strip()
-                return estimandchk
-        #note ESTIMAND CHECK IS BROKEN IF WRONG DAG IS USED (CORRUPTED OUTPUT WHEN TWO ESTIMAND ARE DETECTED BACKDOOR + IV/FRONTDOOR)
-
         def idstep(identified_estimand):
-            print('Treatment Variable:       ',identified_estimand.__dict__.get('treatment_variable'))
-            print('Outcome Variable:         ',identified_estimand.__dict__.get('outcome_variable'))
-            print('Backdoor Variabless:      ',identified_estimand.__dict__.get('backdoor_variables'))
-            print('Instrumental Variables:   ',identified_estimand.__dict__.get('instrumental_variables'))
-            print('Frontdoor Variables:      ',identified_estimand.__dict__.get('frontdoor_variables'))
-            print('Mediator Variables:       ',identified_estimand.__dict__.get('mediator_variables'))
-            print('First Stage Confounders:  ',identified_estimand.__dict__.get('mediation_first_stage_confounders'))
-            print('Second Stage Confounders: ',identified_estimand.__dict__.get('mediation_second_stage_confounders'))
+            say('Treatment Variable:       ',identified_estimand.__dict__.get('treatment_variable'))
+            say('Outcome Variable:         ',identified_estimand.__dict__.get('outcome_variable'))
+            say('Backdoor Variabless:      ',identified_estimand.__dict__.get('backdoor_variables'))
+            say('Instrumental Variables:   ',identified_estimand.__dict__.get('instrumental_variables'))
+            say('Frontdoor Variables:      ',identified_estimand.__dict__.get('frontdoor_variables'))
+            say('Mediator Variables:       ',identified_estimand.__dict__.get('mediator_variables'))
+            say('First Stage Confounders:  ',identified_estimand.__dict__.get('mediation_first_stage_confounders'))
+            say('Second Stage Confounders: ',identified_estimand.__dict__.get('mediation_second_stage_confounders'))
             newline()
-            print('Estimand:', identified_estimand)
-        def eststep(model, identified_estimand, estmethod, estmethodparam,verbose=True):
-            estimate = model.estimate_effect(identified_estimand,
-            method_name=estmethod, method_params = estmethodparam)
-            print('Estimate Value:           ',estimate.__dict__.get('value'))
-            print('Estimand Expression:      ',estimate.__dict__.get('realized_estimand_expr'))
-            print('Control Value:            ',estimate.__dict__.get('control_value'))
-            print('Treatment Value:          ',estimate.__dict__.get('treatment_value'))
-            print('Conditional Estimate:     ',estimate.__dict__.get('conditional_estimates'))
-            print('Intercept:                ',estimate.__dict__.get('intercept'))
-            print('Effect Strength:          ',estimate.__dict__.get('effect_strength'))
-            print('Estimator:                ',estimate.__dict__.get('estimator'))
-            print('Intercept:                ',estimate.__dict__.get('params').get('intercept'))
-            print('Estimand Type:            ',estimate.__dict__.get('params').get('estimand_type'))
-            print('Estimator Class:          ',estimate.__dict__.get('params').get('estimator_class'))
-            print('Test Significance:        ',estimate.__dict__.get('params').get('test_significance'))
-            print('Evaluate Effect Strength: ',estimate.__dict__.get('params').get('evaluate_effect_strength'))
-            print('Confidence Intervals:     ',estimate.__dict__.get('params').get('confidence_intervals'))
-            print('Target Units:             ',estimate.__dict__.get('params').get('target_units'))
-            print('Effect Modifiers:         ',estimate.__dict__.get('params').get('effect_modifiers'))
-            print('Propensity Scores:        ',estimate.__dict__.get('params').get('propensity_scores'))
-            pscores = estimate.__dict__.get('params').get('propensity_scores')
-            return estimate, pscores
-        def refuterbattery(estimate,method,placebo_type2='default',subset_fraction2='default'):
-            if placebo_type2 != 'default':
-                refute_results=cmodel.refute_estimate(identified_estimand, estimate=estimate,method_name=method, placebo_type=placebo_type2)
-            elif subset_fraction2 != 'default':
-                refute_results=cmodel.refute_estimate(identified_estimand, estimate=estimate,method_name=method, subset_fraction=subset_fraction2)
-            else:
-                refute_results=cmodel.refute_estimate(identified_estimand, estimate=estimate,method_name=method)
-            print('Refuter Type:             ',refute_results.__dict__.get('refutation_type'))
-            print('Estimated Effect:         ',refute_results.__dict__.get('estimated_effect'))
-            print('New Effect:               ',refute_results.__dict__.get('new_effect'))
-            print('Statistical Significance: ',refute_results.__dict__.get('refutation_result').get('is_statistically_significant'))
-            print('P-Value:                  ',refute_results.__dict__.get('refutation_result').get('p_value'))
+            say('Estimand:', identified_estimand)
+        def eststep(estimate):
+            say('Estimate Value:           ',estimate.__dict__.get('value'))
+            say('Estimand Expression:      ',estimate.__dict__.get('realized_estimand_expr'))
+            say('Control Value:            ',estimate.__dict__.get('control_value'))
+            say('Treatment Value:          ',estimate.__dict__.get('treatment_value'))
+            say('Conditional Estimate:     ',estimate.__dict__.get('conditional_estimates'))
+            say('Intercept:                ',estimate.__dict__.get('intercept'))
+            say('Effect Strength:          ',estimate.__dict__.get('effect_strength'))
+            say('Estimator:                ',estimate.__dict__.get('estimator'))
+            say('Intercept:                ',estimate.__dict__.get('params').get('intercept'))
+            say('Estimand Type:            ',estimate.__dict__.get('params').get('estimand_type'))
+            say('Estimator Class:          ',estimate.__dict__.get('params').get('estimator_class'))
+            say('Test Significance:        ',estimate.__dict__.get('params').get('test_significance'))
+            say('Evaluate Effect Strength: ',estimate.__dict__.get('params').get('evaluate_effect_strength'))
+            say('Confidence Intervals:     ',estimate.__dict__.get('params').get('confidence_intervals'))
+            say('Target Units:             ',estimate.__dict__.get('params').get('target_units'))
+            say('Effect Modifiers:         ',estimate.__dict__.get('params').get('effect_modifiers'))
+            say('Propensity Scores:        ',estimate.__dict__.get('params').get('propensity_scores'))
+        def timingstep(timings):
+            say('Stage Timings (wall s / cpu s / peak RSS MB):')
+            for timing in timings.values():
+                say('  ',timing.stage.ljust(38),round(timing.wall_seconds,3),'/',round(timing.cpu_seconds,3),'/',
+                      round(timing.peak_rss_mb,1) if timing.peak_rss_mb is not None else '--')
+        def storedstep(result):
+            helpmenu0()
+            say('Stored Result (no estimation run): ')
+            say('==================================================')
+            say('Estimand Type:            ',result.estimand)
+            say('Estimator:                ',result.method_name)
+            say('Target Units:             ',result.target_units)
+            say('Estimate Value:           ',result.value)
+            if result.ci_lower is not None:
+                say('Confidence Interval:      ',(result.ci_lower, result.ci_upper))
+            say('Propensity Scores:        ',result.propensity_scores)
             newline()
+            for refutation in result.refutations:
+                say('Refuter Type:             ',refutation.refutation_type)
+                say('New Effect:               ',refutation.new_effect)
+                say('P-Value:                  ',refutation.p_value)
+                newline()
+            say('Returned: simulator[0] = SimulatorResult (stored), simulator[1] = PropensityScores')
+        def refuterbattery(estimate,estimandcheck):
+            plan = _refuterplan(estimandcheck, bootstrap=bootstrap)
+            seeds = _refuterseeds(random_seed, len(plan))
+            refutations = _runrefuters(cmodel, identified_estimand, estimate, plan, seeds, workers=refute_workers)
+            for refutation in refutations:
+                instrument.record(refutation.timing)
+                say('Refuter Type:             ',refutation.refutation_type)
+                say('Estimated Effect:         ',refutation.estimated_effect)
+                say('New Effect:               ',refutation.new_effect)
+                say('Statistical Significance: ',refutation.is_statistically_significant)
+                say('P-Value:                  ',refutation.p_value)
+                say('Random Seed:              ',refutation.random_seed)
+                newline()
+            estimate.add_params(refutations=refutations)
+            return refutations
 
         idparam = identifier
         estmethod = method_name
-        estmethodparam = method_params
-        unitparam = unit
 
         if str(type(causalmodel)) == '<class \'dowhy.causal_model.CausalModel\'>':
             cmodel = causalmodel
         else:
             mainmenu()
             return
-        if full_output == False:
-            identified_estimand = cmodel.identify_effect(proceed_when_unidentifiable=True, method_name=idparam)
-            estimandcheck = estcheck(identified_estimand)
-            print('Simulator Mode (Default DoWhy) Parameters: ')
-            print('Identification Using: identifier=\'',idparam,'\'')
-            print('Estimation Using: method_name=\'',estmethod,'\'')
-            newline()
-            idbreak()
-            print('Detected Estimand:',estimandcheck,'- Estimation Options:')
-            if estimandcheck == 'iv': 
-                ivstatement()
-                if method_name == 'default':
-                    estmethod = 'iv.instrumental_variable'
-                    estmethodparam = None
-                elif method_name != 'default' and method_params == 'default':
-                    estmethod = 'iv.instrumental_variable'
-                    estmethodparam = None
-            elif estimandcheck == 'frontdoor': 
-                frontdoorstatement()
-                estmethod = 'frontdoor.two_stage_regression'
-                estmethodparam = None
-            elif estimandcheck == 'backdoor': 
-                backdoorstatement()
-                unitparam = None
-                if estmethod == 'default' or estmethod == 'backdoor.generalized_linear_model' or estmethod == 'backdoor.linear_regression':
-                    if cmodel._data[cmodel._outcome].isin([0,1]).all()[0] == True:
-                        print('Detected binary outcome: Selecting GLM logistic regression')
-                        estmethod = 'backdoor.generalized_linear_model'
-                        if estmethodparam == 'default':
-                            estmethodparam = {'num_null_simulations':10,
-                            'num_simulations':10,
-                            'num_quantiles_to_discretize_cont_cols':10,
-                            'fit_method': "statsmodels",
-                            'glm_family': sm.families.Binomial(),
-                            'need_conditional_estimates':False}
-                    else:
-                        print('Detected nonbinary outcome: Selecting OLS linear regression')
-                        estmethod = 'backdoor.linear_regression'
-                        estmethodparam = None
-                elif estmethod == 'backdoor.econml.dr.LinearDRLearner':
-                    if estmethodparam == 'default':
-                        estmethodparam = {"init_params":{
-                            'model_propensity': LogisticRegressionCV(cv=3, solver='lbfgs', multi_class='auto')},
-                            "fit_params":{}}
-                elif estmethod == 'backdoor.econml.dml.DML':
-                    if estmethodparam == 'default':
-                        estmethodparam = {'init_params':{
-                            'model_y':GradientBoostingRegressor(),
-                            'model_t': GradientBoostingRegressor(),
-                            'model_final': LassoCV(fit_intercept=False),
-                            'featurizer':PolynomialFeatures(degree=1, include_bias=True)},
-                            'fit_params':{'inference': BootstrapInference(n_bootstrap_samples=20, n_jobs=-1)}}
-                elif estmethod == 'backdoor.propensity_score_stratification' or estmethod == 'backdoor.propensity_score_matching'  or estmethod == 'backdoor.propensity_score_weighting':
-                    if cmodel._data[cmodel._outcome].isin([0,1]).all()[0] == False  or  cmodel._data[cmodel._treatment].isin([0,1]).all()[0] == False:
-                        unitparam = None
-                        print('Failed to detect both binary treatment and binary outcome')
-                        print('Reverting Propensity Score Estimation to Regression')
-                        if cmodel._data[cmodel._outcome].isin([0,1]).all()[0] == True:
-                            print('Detected binary outcome: Selecting GLM logistic regression')
-                            estmethod = 'backdoor.generalized_linear_model'
-                            if estmethodparam == 'default':
-                                estmethodparam = {'num_null_simulations':10,
-                                'num_simulations':10,
-                                'num_quantiles_to_discretize_cont_cols':10,
-                                'fit_method': "statsmodels",
-                                'glm_family': sm.families.Binomial(),
-                                'need_conditional_estimates':False}
-                        else:
-                            print('Detected nonbinary outcome: Selecting OLS linear regression')
-                            estmethod = 'backdoor.linear_regression'
-                            estmethodparam = None
-                    elif estmethod == 'backdoor.propensity_score_stratification':
-                        unitparam = 'att'
-                        print('Propensity Score Unit: ATT')
-                        estmethodparam = {'num_strata':50, 'clipping_threshold':5}
-                    elif estmethod == 'backdoor.propensity_score_matching':
-                        unitparam = 'atc'
-                        print('Propensity Score Unit: ATC')
-                        estmethodparam = None
-                    elif estmethod == 'backdoor.propensity_score_weighting':
-                        unitparam = 'ate'
-                        print('Propensity Score Unit: ATE')
-                        estmethodparam = {"weighting_scheme":"ips_weight"}
-
-                #else:
-                #    unitparam = None
-                #    estmethodparam = None
-            elif estimandcheck != 'iv' and estimandcheck != 'frontdoor' and estimandcheck != 'backdoor':
+        if full_output != True and full_output != False:
+            mainmenu()
+            return
+        if not (isinstance(effect_modifiers, str) and effect_modifiers == 'default'):
+            effect_modifiers = [effect_modifiers] if isinstance(effect_modifiers, str) else list(effect_modifiers)
+            unknown = [c for c in effect_modifiers if c not in cmodel._data.columns]
+            if len(unknown) > 0:
+                raise ValueError('effect_modifiers are not dataset columns: ' + ', '.join(map(str, unknown)))
+        instrument = _instrument(instrument)
+        if estimand == 'all':
+            # One full simulator run per identified estimand kind, keyed by kind
+            results = {}
+            for kind in classifyestimand(_identify(cmodel, idparam, cache=cache)):
+                results[kind.kind] = functions.simulator(causalmodel=cmodel,identifier=identifier,method_name=method_name,method_params=method_params,
+                                                         unit=unit,full_output=full_output,refute=refute,refute_workers=refute_workers,
+                                                         random_seed=random_seed,cache=cache,estimand=kind.kind,instrument=instrument,
+                                                         verbose=verbose,confidence_intervals=confidence_intervals,project=project,
+                                                         bootstrap=bootstrap,store=store,effect_modifiers=effect_modifiers,
+                                                         conditional_estimates=conditional_estimates)
+            if len(results) == 0:
                 nodag()
-                return
-            print('Detected Estimator method_name (DoWhy): \'',estmethod,'\'')
-            print('Detected Estimator method_params (DoWhy): ',estmethodparam)
-            newline()
-            estbreak()
-            estimate = cmodel.estimate_effect(identified_estimand,
-            method_name=estmethod, method_params = estmethodparam, target_units = unitparam)
-            print(estimate)
-            print('Propensity Scores:        ',estimate.__dict__.get('params').get('propensity_scores'))
-            pscores = estimate.__dict__.get('params').get('propensity_scores')
+            return results
+        first = len(instrument.timings)
+        def select(estimandcheck, verbose):
+            estmethod, estmethodparam, unitparam = _selectestimator(estimandcheck, method_name, method_params, unit,
+                                                                    isbinary=_profile(cmodel).isbinary,
+                                                                    outcome=cmodel._outcome, treatment=cmodel._treatment, verbose=verbose,
+                                                                    rows=len(cmodel._data))
+            if full_output == True:
+                # Full output estimates with DoWhy's default target units; only the default DoWhy mode passes the selected unit
+                unitparam = 'ate'
+            return estmethod, estmethodparam, unitparam
+        identified_estimand = None
+        resultstore = _resultstore(store)
+        if resultstore is not None:
+            # Everything that changes the result; refute_workers and verbosity do not
+            with instrument.stage('store.lookup'):
+                import dowhy
+                # The key holds the target units the run estimates with, which depend on full_output and the selected estimator
+                identified_estimand = _identify(cmodel, idparam, cache=cache)
+                estimandcheck = _pickestimand(classifyestimand(identified_estimand), estimand)
+                unitparam = select(estimandcheck, False)[2] if estimandcheck is not None else None
+                # Every row is hashed: the sampled profile fingerprint would miss edits between its blocks and serve a stale result
+                storekey = resultstore.key([_graphhash(_modelgraph(cmodel)), datafingerprint(cmodel._data, blocks=None), cmodel._treatment, cmodel._outcome,
+                                            idparam, method_name, method_params, unitparam, full_output, estimand, refute, random_seed,
+                                            confidence_intervals, project, bootstrap, effect_modifiers, conditional_estimates,
+                                            dowhy.__version__])
+                stored = resultstore.get(storekey)
+            if stored is not None:
+                stored = stored._replace(timings=instrument.summary(first))
+                if verbose == False:
+                    return stored
+                storedstep(stored)
+                return stored, stored.propensity_scores
+        with instrument.stage('identification'):
+            if identified_estimand is None:
+                identified_estimand = _identify(cmodel, idparam, cache=cache)
+            estimandkinds = classifyestimand(identified_estimand)
+            estimandcheck = _pickestimand(estimandkinds, estimand)
+        if full_output == True:
+            say('Simulator Mode (Full) Parameters: ')
+        else:
+            say('Simulator Mode (Default DoWhy) Parameters: ')
+        say('Identification Using: identifier=\'',idparam,'\'')
+        say('Estimation Using: method_name=\'',estmethod,'\'')
+        newline()
+        idbreak()
+        say('Identified Estimands:     ',', '.join(kind.kind + ' ' + str(kind.variables) for kind in estimandkinds))
+        say('Detected Estimand:',estimandcheck,'- Estimation Options:')
+        if estimandcheck == 'iv':
+            ivstatement()
+        elif estimandcheck == 'frontdoor':
+            frontdoorstatement()
+        elif estimandcheck == 'backdoor':
+            backdoorstatement()
+        else:
+            nodag()
+            return
+        with instrument.stage('estimator_selection'):
+            estmethod, estmethodparam, unitparam = select(estimandcheck, verbose)
+        if conditional_estimates != 'default' and estmethod in _DOWHY_METHODS and (estmethodparam is None or isinstance(estmethodparam, dict)):
+            # DoWhy's own estimators take the flag directly; EconML estimates always carry per-unit (CATE) effects
+            estmethodparam = dict(estmethodparam or {}, need_conditional_estimates=conditional_estimates)
+        say('Detected Estimator method_name (DoWhy): \'',estmethod,'\'')
+        say('Detected Estimator method_params (DoWhy): ',estmethodparam)
+        newline()
+        estbreak()
+        if full_output == True:
+            idstep(identified_estimand=identified_estimand)
+        with instrument.stage('projection'):
+            columns, compact = _projection(cmodel, identified_estimand, project)
+            if effect_modifiers != 'default':
+                columns = list(dict.fromkeys(columns + effect_modifiers))
+            frame = _projectframe(cmodel, columns, compact=compact)
+        with _workingframe(cmodel, frame) as working:
+            # DoWhy bootstraps propensity-weighting intervals (and linear ones on request) by refitting per resample;
+            # those are computed natively from the fitted estimate instead
+            nativeci = confidence_intervals != False and bootstrap == 'native' and (estmethod == 'backdoor.propensity_score_weighting'
+                       or (estmethod == 'backdoor.linear_regression' and confidence_intervals == 'bootstrap'))
+            with instrument.stage('estimate_effect'):
+                estimate = cmodel.estimate_effect(identified_estimand,
+                method_name=estmethod, method_params = estmethodparam, target_units = unitparam,
+                confidence_intervals = False if nativeci == True else confidence_intervals,
+                effect_modifiers = None if effect_modifiers == 'default' else effect_modifiers)
+            if nativeci == True:
+                with instrument.stage('confidence_intervals'):
+                    if _bootstrapspec(estimate, working) is not None:
+                        interval = bootstrapestimate(estimate, working, random_seed=random_seed, workers=refute_workers)
+                        estimate.add_params(confidence_intervals=(interval.ci_lower, interval.ci_upper), bootstrap=interval)
+                    else:
+                        estimate.add_params(confidence_intervals=tuple(np.ravel(estimate.get_confidence_intervals(method='bootstrap'))))
+                say('Confidence Interval:      ',estimate.__dict__.get('params').get('confidence_intervals'))
+            pscores, strata = _propensityarrays(estimate, working)
+            if full_output == True:
+                eststep(estimate)
+            else:
+                say(estimate)
+                say('Propensity Scores:        ',pscores)
             newline()
             refbreak()
             if refute==True:
-                if estimandcheck == 'iv':
-                    refuterbattery(estimate=estimate,method='data_subset_refuter', subset_fraction2=0.9)
-                    refuterbattery(estimate=estimate,method='placebo_treatment_refuter', placebo_type2="permute")
-                    refuterbattery(estimate=estimate,method='bootstrap_refuter')
-                elif estimandcheck != 'iv':
-                    refuterbattery(estimate=estimate,method='random_common_cause')
-                    refuterbattery(estimate=estimate,method='data_subset_refuter', subset_fraction2=0.9)
-                    refuterbattery(estimate=estimate,method='placebo_treatment_refuter', placebo_type2="permute")
-                    refuterbattery(estimate=estimate,method='bootstrap_refuter')
-            returnstatement()
-            checkdat = cmodel._data
-            cols_to_keep = [c for c in checkdat.columns if c != 'propensity_score' and c != 'strata' and c != 'dbar' and c != 'd_y' and c != 'dbar_y']
-            cmodel._data = cmodel._data[cols_to_keep]
-            return estimate, pscores
-
-        elif full_output == True:
-            identified_estimand = cmodel.identify_effect(proceed_when_unidentifiable=True, method_name=idparam)
-            estimandcheck = estcheck(identified_estimand)
-            print('Simulator Mode (Full) Parameters: ')
-            print('Identification Using: identifier=\'',idparam,'\'')
-            print('Estimation Using: method_name=\'',estmethod,'\'')
+                with instrument.stage('refuters'):
+                    refuterbattery(estimate=estimate,estimandcheck=estimandcheck)
+        estimate.add_params(strata=strata)
+        if resultstore is not None:
+            with instrument.stage('store.write'):
+                resultstore.put(storekey, _simulatorresult(estimate, estimandcheck, estimandkinds, idparam, estmethod, estmethodparam, unitparam,
+                                                           pscores, strata, instrument.summary(first), confidence_intervals)._replace(estimate=None))
+        timings = instrument.summary(first)
+        estimate.add_params(timings=timings)
+        if verbose == False:
+            return _simulatorresult(estimate, estimandcheck, estimandkinds, idparam, estmethod, estmethodparam, unitparam,
+                                    pscores, strata, timings, confidence_intervals)
+        if full_output == True:
+            timingstep(timings)
             newline()
-            idbreak()
-            print('Detected Estimand:',estimandcheck,'- Estimation Options:')
-            if estimandcheck == 'iv': 
-                ivstatement()
-                if method_name == 'default':
-                    estmethod = 'iv.instrumental_variable'
-                    estmethodparam = None
-                elif method_name != 'default' and method_params == 'default':
-                    estmethod = 'iv.instrumental_variable'
-                    estmethodparam = None
-            elif estimandcheck == 'frontdoor': 
-                frontdoorstatement()
-                estmethod = 'frontdoor.two_stage_regression'
-                estmethodparam = None
-            elif estimandcheck == 'backdoor': 
-                backdoorstatement()
-                unitparam = None
-                if estmethod == 'default' or estmethod == 'backdoor.generalized_linear_model' or estmethod == 'backdoor.linear_regression':
-                    if cmodel._data[cmodel._outcome].isin([0,1]).all()[0] == True:
-                        print('Detected binary outcome: Selecting GLM logistic regression')
-                        estmethod = 'backdoor.generalized_linear_model'
-                        if estmethodparam == 'default':
-                            estmethodparam = {'num_null_simulations':10,
-                            'num_simulations':10,
-                            'num_quantiles_to_discretize_cont_cols':10,
-                            'fit_method': "statsmodels",
-                            'glm_family': sm.families.Binomial(),
-                            'need_conditional_estimates':False}
-                    else:
-                        print('Detected nonbinary outcome: Selecting OLS linear regression')
-                        estmethod = 'backdoor.linear_regression'
-                        estmethodparam = None
-                elif estmethod == 'backdoor.econml.dr.LinearDRLearner':
-                    if estmethodparam == 'default':
-                        estmethodparam = {"init_params":{
-                            'model_propensity': LogisticRegressionCV(cv=3, solver='lbfgs', multi_class='auto')},
-                            "fit_params":{}}
-                elif estmethod == 'backdoor.econml.dml.DML':
-                    if estmethodparam == 'default':
-                        estmethodparam = {'init_params':{
-                            'model_y':GradientBoostingRegressor(),
-                            'model_t': GradientBoostingRegressor(),
-                            'model_final': LassoCV(fit_intercept=False),
-                            'featurizer':PolynomialFeatures(degree=1, include_bias=True)},
-                            'fit_params':{'inference': BootstrapInference(n_bootstrap_samples=20, n_jobs=-1)}}
-                elif estmethod == 'backdoor.propensity_score_stratification' or estmethod == 'backdoor.propensity_score_matching'  or estmethod == 'backdoor.propensity_score_weighting':
-                    if cmodel._data[cmodel._outcome].isin([0,1]).all()[0] == False  or  cmodel._data[cmodel._treatment].isin([0,1]).all()[0] == False:
-                        unitparam = None
-                        print('Failed to detect both binary treatment and binary outcome')
-                        print('Reverting Propensity Score Estimation to Regression')
-                        if cmodel._data[cmodel._outcome].isin([0,1]).all()[0] == True:
-                            print('Detected binary outcome: Selecting GLM logistic regression')
-                            estmethod = 'backdoor.generalized_linear_model'
-                            if estmethodparam == 'default':
-                                estmethodparam = {'num_null_simulations':10,
-                                'num_simulations':10,
-                                'num_quantiles_to_discretize_cont_cols':10,
-                                'fit_method': "statsmodels",
-                                'glm_family': sm.families.Binomial(),
-                                'need_conditional_estimates':False}
-                        else:
-                            print('Detected nonbinary outcome: Selecting OLS linear regression')
-                            estmethod = 'backdoor.linear_regression'
-                            estmethodparam = None
-                    elif estmethod == 'backdoor.propensity_score_stratification':
-                        unitparam = 'att'
-                        print('Propensity Score Unit: ATT')
-                        estmethodparam = {'num_strata':50, 'clipping_threshold':5}
-                    elif estmethod == 'backdoor.propensity_score_matching':
-                        unitparam = 'atc'
-                        print('Propensity Score Unit: ATC')
-                        estmethodparam = None
-                    elif estmethod == 'backdoor.propensity_score_weighting':
-                        unitparam = 'ate'
-                        print('Propensity Score Unit: ATE')
-                        estmethodparam = {"weighting_scheme":"ips_weight"}
-
-            elif estimandcheck != 'iv' and estimandcheck != 'frontdoor' and estimandcheck != 'backdoor':
-                nodag()
-                return
-            print('Detected Estimator method_name (DoWhy): \'',estmethod,'\'')
-            print('Detected Estimator method_params (DoWhy): ',estmethodparam)
+        if resultstore is not None:
+            # With a store a miss returns what a hit returns, a SimulatorResult (here still carrying the fitted estimate)
+            say('Returned: simulator[0] = SimulatorResult, simulator[1] = PropensityScores')
+            return _simulatorresult(estimate, estimandcheck, estimandkinds, idparam, estmethod, estmethodparam, unitparam,
+                                    pscores, strata, timings, confidence_intervals), pscores
+        returnstatement()
+        return estimate, pscores
+
+    def batchsimulator(dataset='dataset',digraph='graph',specs='specs',identifier='default',workers=None,cache=True,verbose=True,instrument=None,project=True):
+        def newline():
+            print('')
+        def mainmenu():
+            print('CausalFast batchsimulator():')
             newline()
-            estbreak()
-            idstep(identified_estimand=identified_estimand)
-            estimate = eststep(model=cmodel,identified_estimand=identified_estimand,estmethod=estmethod,estmethodparam=estmethodparam)
+            print('   Estimate many treatment/outcome/method combinations over one dataset and DAG')
+            print('   Each distinct (treatment, outcome, identifier) estimand is identified once')
+            print('   Syntax: batchsimulator(dataset=dataset, digraph=digraph, specs=speclist, workers=4)')
             newline()
-            refbreak()
-            if refute==True:
-                if estimandcheck == 'iv':
-                    refuterbattery(estimate=estimate[0],method='data_subset_refuter', subset_fraction2=0.9)
-                    refuterbattery(estimate=estimate[0],method='placebo_treatment_refuter', placebo_type2="permute")
-                    refuterbattery(estimate=estimate[0],method='bootstrap_refuter')
-                elif estimandcheck != 'iv':
-                    refuterbattery(estimate=estimate[0],method='random_common_cause')
-                    refuterbattery(estimate=estimate[0],method='data_subset_refuter', subset_fraction2=0.9)
-                    refuterbattery(estimate=estimate[0],method='placebo_treatment_refuter', placebo_type2="permute")
-                    refuterbattery(estimate=estimate[0],method='bootstrap_refuter')
-            returnstatement()
-            checkdat = cmodel._data
-            cols_to_keep = [c for c in checkdat.columns if c != 'propensity_score' and c != 'strata' and c != 'dbar' and c != 'd_y' and c != 'dbar_y']
-            cmodel._data = cmodel._data[cols_to_keep]
-            return estimate[0], estimate[1]
-        else:
+            print('   specs: a list of dicts, tuples or a DataFrame with the fields')
+            print('      treatment, outcome, identifier, method_name, method_params, estimand')
+            print('   identifier, method_name and method_params are optional and default to \'default\'')
+            print('   estimand is optional: \'auto\' (default), \'backdoor\', \'iv\' or \'frontdoor\'')
+            print('   speclist = [(\'X\',\'Y\'), (\'X\',\'Y\',\'default\',\'backdoor.econml.dml.DML\')]')
+            newline()
+            print('Returned: DataFrame with one row per spec')
+        if not isinstance(dataset, pd.DataFrame) or not isinstance(digraph, (str, CompiledGraph)) or digraph == 'graph' or isinstance(specs, str):
             mainmenu()
+            return
+        instrument = _instrument(instrument)
+        first = len(instrument.timings)
+        rows = _batchspecs(specs, identifier)
+        with instrument.stage('batch.planning'):
+            models, estimands, tasks, skipped = _batchplan(dataset, digraph, rows, cache=cache, project=project)
+        if verbose == True:
+            print('CausalFast batchsimulator():')
+            print('Specs: ', len(rows), '  Models: ', len(models), '  Identified Estimands: ', len(estimands))
+        with instrument.stage('batch.estimation'):
+            results = _runbatch(models, estimands, tasks, workers=workers) + skipped
+        results = sorted(results, key=lambda result: result['spec'])
+        results = pd.DataFrame(results, columns=['spec','treatment','outcome','identifier','estimand','method_name','target_units','value','error'])
+        results.attrs['timings'] = instrument.summary(first)
+        if verbose == True:
+            print('Failed Specs: ', int(results['error'].notna().sum()))
+            newline()
+            print('Returned: DataFrame with one row per spec')
+        return results
+
+    def matrixsimulator(dataset='dataset',digraph='graph',treatments='treatments',outcomes='outcomes',identifier='default',method_name='default',method_params='default',confidence_level=0.95,workers=None,cache=True,verbose=True,instrument=None,project=True):
+        if not isinstance(dataset, pd.DataFrame) or not isinstance(digraph, (str, CompiledGraph)) or digraph == 'graph' or isinstance(treatments, str) and treatments == 'treatments':
+            print('CausalFast matrixsimulator(): treatment x outcome effect matrix over one dataset and DAG')
+            print('   Syntax: matrixsimulator(dataset=dataset, digraph=digraph, treatments=[\'T1\',\'T2\'], outcomes=[\'Y1\',\'Y2\'], workers=4)')
+            print('   Every pair shares the data profile and identified estimands; linear backdoor pairs with the same treatment,')
+            print('   adjustment set and effect modifiers are solved together from one factorization of the design matrix')
+            print('   Other pairs (GLM, propensity, iv, frontdoor, EconML) are estimated by DoWhy, over workers processes')
+            print('Returned: DataFrame with one row per pair (value, std_error, ci_lower, ci_upper, solver, error)')
+            return
+        results = effectmatrix(dataset, digraph, treatments, outcomes, identifier=identifier, method_name=method_name, method_params=method_params,
+                               confidence_level=confidence_level, workers=workers, cache=cache, project=project, instrument=instrument)
+        if verbose == True:
+            print('CausalFast matrixsimulator():')
+            print('Pairs: ', len(results), '  Shared Linear: ', int((results['solver'] == 'shared').sum()),
+                  '  DoWhy: ', int((results['solver'] == 'dowhy').sum()), '  Failed: ', int(results['error'].notna().sum()))
+            print('')
+            print(results.pivot(index='treatment', columns='outcome', values='value'))
+            print('')
+            print('Returned: DataFrame with one row per pair; results.pivot(index=\'treatment\', columns=\'outcome\', values=\'value\') gives the matrix')
+        return results
+
+    def streamsimulator(source='source',digraph='graph',treatment='treatment',outcome='outcome',identifier='default',method_name='default',chunksize=1000000,maxiter=100,tol=1e-8,cache=True,verbose=True,instrument=None):
+        if isinstance(source, str) and source == 'source':
+            print('CausalFast streamsimulator(): out-of-core backdoor estimation in bounded memory')
+            print('   OLS from accumulated sufficient statistics (one pass); logistic GLM by chunked IRLS (one pass per iteration)')
+            print('   Syntax: streamsimulator(source=\'events.parquet\', digraph=graph, treatment=\'X\', outcome=\'Y\', chunksize=1000000)')
+            print('   source:      DataFrame, CSV/Parquet path or an iterable of DataFrame chunks (spilled once to a scratch file for IRLS)')
+            print('   method_name: \'default\' (OLS, or GLM logistic regression for a binary outcome), \'backdoor.linear_regression\',')
+            print('                \'backdoor.generalized_linear_model\' (effect on the probability scale: mean(p1) - mean(p0))')
+            print('Returned: StreamingEstimate(value, std_error, ci_lower, ci_upper, params, bse, nobs, iterations, ...)')
+            return
+        result = streamestimate(source, digraph, treatment, outcome, identifier=identifier, method_name=method_name, chunksize=chunksize,
+                                maxiter=maxiter, tol=tol, cache=cache, instrument=instrument)
+        if verbose == True:
+            print('CausalFast streamsimulator():')
+            print('Estimand:    ', result.estimand, '   Method: ', result.method_name)
+            print('Features:    ', result.features)
+            print('Rows:        ', result.nobs, '   Iterations: ', result.iterations, '   Converged: ', result.converged)
+            print('Estimate:    ', result.value)
+            print('Std. Error:  ', result.std_error)
+            print('95% CI:      ', (result.ci_lower, result.ci_upper))
+            print('')
+            print('Returned: StreamingEstimate')
+        return result
+
+    def incrementalsimulator(causalmodel='causalmodel',rows=None,method_name='default',identifier='default',target_units='ate',chunksize=1000000,min_ps_score=0.05,max_ps_score=0.95,refit=False,cache=True,verbose=True,instrument=None):
+        if str(type(causalmodel)) != '<class \'dowhy.causal_model.CausalModel\'>':
+            print('CausalFast incrementalsimulator(): update a backdoor estimate as rows are appended to a model\'s data')
+            print('   Syntax: incrementalsimulator(causalmodel=causalmodel[0], rows=newrows)')
+            print('   rows:        DataFrame of new rows, kept on the model as a chunk (causalmodel._causalfast_appended), not concatenated')
+            print('                into causalmodel._data; or append to causalmodel._data yourself and pass rows=None')
+            print('                Chunks are private to incrementalsimulator: simulator() and the other functions see only causalmodel._data')
+            print('   method_name: \'default\', \'backdoor.linear_regression\', \'backdoor.generalized_linear_model\', \'backdoor.propensity_score_weighting\'')
+            print('   Every update reads the new rows only: OLS sufficient statistics are exact; the GLM and propensity logistic fits keep')
+            print('   the earlier rows as the score and information at the previous coefficients, so they track a full refit closely')
+            print('   min_ps_score=0.05, max_ps_score=0.95: propensity score clipping')
+            print('   refit=True refits on all rows; a changed graph, column set or setting, or changed model data, also does')
+            print('Returned: IncrementalEstimate(value, std_error, nobs, added, refit, reason, iterations, timings)')
+            return
+        result = incrementalestimate(causalmodel, rows=rows, method_name=method_name, identifier=identifier, target_units=target_units,
+                                     chunksize=chunksize, min_ps_score=min_ps_score, max_ps_score=max_ps_score, refit=refit,
+                                     cache=cache, instrument=instrument)
+        if verbose == True:
+            print('CausalFast incrementalsimulator():')
+            print('Method:      ', result.method_name)
+            print('Rows:        ', result.nobs, '   Added: ', result.added, '   Iterations: ', result.iterations)
+            print('Full Refit:  ', result.refit, '' if result.reason is None else '(' + result.reason + ')')
+            print('Estimate:    ', result.value)
+            print('Std. Error:  ', result.std_error)
+            print('')
+            print('Returned: IncrementalEstimate')
+        return result
+
+    def propensitysimulator(causalmodel='causalmodel',identifier='default',num_strata=50,clipping_threshold=5,caliper=None,min_ps_score=0.05,max_ps_score=0.95,propensity_model=None,propensity_scores=None,cache=True,verbose=True,instrument=None):
+        if str(type(causalmodel)) != '<class \'dowhy.causal_model.CausalModel\'>':
+            print('CausalFast propensitysimulator(): stratification, matching and weighting estimates from one propensity fit')
+            print('   Syntax: propensitysimulator(causalmodel=causalmodel[0])')
+            print('   Requires a binary treatment and a backdoor estimand with at least one common cause')
+            print('   num_strata=50, clipping_threshold=5: stratification settings (the simulator\'s defaults)')
+            print('   caliper=None:   maximum score distance for a nearest-neighbour match (None matches every unit)')
+            print('   min_ps_score=0.05, max_ps_score=0.95: score clipping for inverse propensity weighting')
+            print('   propensity_model=None fits LogisticRegression(); propensity_scores=array or column name skips the fit')
+            print('Returned: PropensityEstimate(stratification, matching, weighting, ...) each with att, atc and ate')
+            return
+        result = propensityestimate(causalmodel, identifier=identifier, num_strata=num_strata, clipping_threshold=clipping_threshold,
+                                    caliper=caliper, min_ps_score=min_ps_score, max_ps_score=max_ps_score,
+                                    propensity_model=propensity_model, propensity_scores=propensity_scores, cache=cache, instrument=instrument)
+        if verbose == True:
+            print('CausalFast propensitysimulator():')
+            print('Rows:         ', result.nobs, '   Treated: ', result.treated, '   Common Causes: ', result.common_causes)
+            print('                      ATT                   ATC                   ATE')
+            for name in ('stratification', 'matching', 'weighting'):
+                effects = getattr(result, name)
+                print('%-15s %-21r %-21r %r' % (name.capitalize() + ':', effects['att'], effects['atc'], effects['ate']))
+            print('Strata Kept:  ', result.strata_kept, '   Unmatched: ', result.unmatched)
+            print('')
+            print('Returned: PropensityEstimate')
+        return result
+
+    def catesimulator(estimate='estimate',data='dataset',chunksize=100000,workers=None,intervals=False,confidence_level=0.95,keep=None,output='dataframe',path=None,verbose=True):
+        estimate = _fittedestimate(estimate)
+        if estimate is None or isinstance(estimate, str) or (isinstance(data, str) and data == 'dataset'):
+            print('CausalFast catesimulator(): per-row conditional effects of a fitted simulator estimate, without refitting')
+            print('   Syntax: catesimulator(estimate=simulator(...), data=customers, chunksize=100000, workers=4)')
+            print('   estimate: simulator output (estimate, pscores) or SimulatorResult from linear regression, GLM, DML or LinearDRLearner')
+            print('   data:     DataFrame, CSV/Parquet path or an iterable of DataFrame chunks; the treatment column is not needed')
+            print('   intervals=True adds ci_lower/ci_upper per row; keep=[\'id\'] carries input columns into the result')
+            print('   output:   \'dataframe\', \'chunks\' (generator of result batches) or \'parquet\' (written batch by batch to path)')
+            print('   Pass effect_modifiers=[...] to simulator to choose the variables the conditional effect varies with')
+            print('Returned: DataFrame/generator of batches with effect (and ci_lower, ci_upper) per row, or the parquet path')
+            return
+        result = cateestimate(estimate, data, chunksize=chunksize, workers=workers, intervals=intervals, confidence_level=confidence_level,
+                              keep=keep, output=output, path=path)
+        if verbose == True and output == 'dataframe':
+            print('CausalFast catesimulator():')
+            print('Rows:         ', len(result))
+            print('Mean Effect:  ', float(result['effect'].mean()))
+            print('Effect Range: ', (float(result['effect'].min()), float(result['effect'].max())))
+            print('')
+            print('Returned: DataFrame of conditional effects')
+        return result
 
-    def makegraph(function='main',edges='edges',digraph='graph',dataset='dataset',treatment='treatmentX0',outcome='outcomeY0',model='model',eda=False,verbose=True):
+    def previewsimulator(causalmodel='causalmodel',size=None,fraction=0.1,stratify='auto',folds=4,confidence_level=0.95,tolerance=None,growth=4,max_stages=5,identifier='default',method_name='default',method_params='default',unit='default',estimand='auto',refute=True,refute_workers=None,random_seed=None,cache=True,project=True,verbose=True,instrument=None):
+        if str(type(causalmodel)) != '<class \'dowhy.causal_model.CausalModel\'>':
+            print('CausalFast previewsimulator(): a quick look at what simulator() will say, estimated on a stratified subsample')
+            print('   Syntax: previewsimulator(causalmodel=causalmodel[0], fraction=0.1, tolerance=0.01)')
+            print('   Identification and estimator selection use the full graph and data; estimation and refutation use the sample')
+            print('   size=None, fraction=0.1: sample rows (size wins; at least 1000 rows when sized by fraction)')
+            print('   stratify=\'auto\' stratifies on a binary treatment and outcome; a column list, or None for a simple random sample')
+            print('   folds=4: the sample is split into stratified folds whose spread gives the error band around the full-data estimate')
+            print('   tolerance=0.01 escalates the sample by growth=4 (up to max_stages=5) until the band half-width and the change')
+            print('   from the previous stage are both within tolerance')
+            print('   identifier, method_name, method_params, unit, estimand, refute and random_seed work as in simulator()')
+            print('Returned: PreviewEstimate(value, ci_lower, ci_upper, stages, converged, refutations, ...)')
+            return
+        result = previewestimate(causalmodel, size=size, fraction=fraction, stratify=stratify, folds=folds, confidence_level=confidence_level,
+                                 tolerance=tolerance, growth=growth, max_stages=max_stages, identifier=identifier, method_name=method_name,
+                                 method_params=method_params, unit=unit, estimand=estimand, refute=refute, refute_workers=refute_workers,
+                                 random_seed=random_seed, cache=cache, project=project, instrument=instrument)
+        if verbose == True:
+            print('CausalFast previewsimulator():')
+            print('Estimand:     ', result.estimand, '   Estimator: ', result.method_name, '   Target Units: ', result.target_units)
+            print('Rows:         ', result.nobs, '   Stratified On: ', result.stratify)
+            print('   Sample Rows   Fraction        Estimate       Std Error           Band Low          Band High      Seconds')
+            for stage in result.stages:
+                print('%14d %10.4f %15.6g %15.6g %18.6g %18.6g %12.2f' % (stage.sample_size, stage.fraction, stage.value, stage.std_error,
+                                                                        stage.ci_lower, stage.ci_upper, stage.seconds))
+            if result.converged is not None:
+                print('Converged:    ', result.converged)
+            print('')
+            for refutation in result.refutations:
+                print('Refuter Type:             ', refutation.refutation_type)
+                print('New Effect:               ', refutation.new_effect)
+                print('P-Value:                  ', refutation.p_value)
+                print('')
+            print('Returned: PreviewEstimate')
+        return result
+
+    def estimandcache(maxsize='default',cachedir='default',clear=False):
+        if maxsize != 'default':
+            _ESTIMAND_CACHE.maxsize = maxsize
+        if cachedir != 'default':
+            _ESTIMAND_CACHE.cachedir = cachedir
+        if clear == True:
+            _ESTIMAND_CACHE.clear(disk=True)
+        return _ESTIMAND_CACHE
+
+    def nuisancecache(maxsize='default',clear=False):
+        if maxsize != 'default':
+            _NUISANCE_CACHE.maxsize = maxsize
+        if clear == True:
+            _NUISANCE_CACHE.clear()
+        return _NUISANCE_CACHE
+
+    def compilegraph(digraph='graph',pairs=None,dataset=None,verbose=True):
+        if isinstance(digraph, str) and digraph == 'graph':
+            print('CausalFast compilegraph(): parse a DAG once and precompute adjustment sets for the pairs you will estimate')
+            print('   Syntax: compiled = compilegraph(digraph=graph, pairs=[(\'X1\',\'Y\'),(\'X2\',\'Y\')], dataset=dataset)')
+            print('   digraph:  DOT string, edge list or networkx DiGraph; dataset columns mark the observed nodes')
+            print('   compiled.causalmodel(dataset, treatment, outcome) builds a CausalModel without re-parsing the DOT text')
+            print('   simulator(model, identifier=\'minimal-adjustment\') on such a model uses the precomputed backdoor set')
+            print('   batchsimulator, matrixsimulator, streamsimulator and makegraph(function=\'makecausalmodel\') accept it as digraph')
+            print('   compiled.ancestors(node), compiled.descendants(node), compiled.dseparated(x, y, given) are cached queries')
+            print('Returned: CompiledGraph')
+            return
+        compiled = CompiledGraph(digraph, pairs=pairs, observed=None if dataset is None else list(dataset.columns))
+        if verbose == True:
+            print('CausalFast compilegraph():')
+            print('Nodes:        ', len(compiled.nodes), '   Edges: ', len(compiled.edges))
+            for treatment, outcome in pairs or []:
+                identified_estimand = compiled.estimand(treatment, outcome, compiled.observed)
+                adjustment = None if identified_estimand is None else identified_estimand.get_backdoor_variables()
+                print('  ', treatment, '->', outcome, '  Adjustment Set: ', 'left to DoWhy' if adjustment is None else adjustment)
+            print('')
+            print('Returned: CompiledGraph')
+        return compiled
+
+    def eda(data='dataset',chunksize=None,cardinality=True,verbose=True):
+        if isinstance(data, str) and data == 'dataset':
+            print('CausalFast eda():')
+            print('   Vectorized per-column summary: dtype, count_na, min, mean, max, cardinality, binary')
+            print('   Syntax: eda(data=dataset)')
+            print('   Syntax: eda(data=\'events.parquet\', chunksize=1000000)')
+            print('   cardinality=False skips the distinct-value count, the most expensive statistic')
+            print('   cardinality is exact up to 65,536 distinct values per column and estimated (about 0.4% error) above that')
+            print('   data may be a DataFrame, a CSV/Parquet path or an iterable of DataFrame chunks')
+            print('Returned: DataFrame summary indexed by column name')
+            return
+        summary = edasummary(data, chunksize=chunksize, cardinality=cardinality)
+        if verbose == True:
+            print('Basic EDA:')
+            print('Dimensionality: ', (int(summary['rows'].iloc[0]) if len(summary) > 0 else 0, len(summary)))
+            print('Column Names:', list(summary.index))
+            print('')
+            _edaprint(summary)
+            print('')
+            print('Returned: DataFrame summary indexed by column name')
+        return summary
+
+    def scm(graph='graph',coefficients=None,noise=1.0,transforms=None,samples=1500,chunksize=1000000,dtype=np.float32,seed=None,observed=None,output='dataframe',path=None):
+        if isinstance(graph, str) and graph == 'graph':
+            print('CausalFast scm(): structural causal model data generator')
+            print('   Each node is the sum of coefficient * parent over its parents plus scaled standard normal noise')
+            print('   Syntax: scm(graph=[(\'U\',\'X\',0.19),(\'U\',\'Y\',0.36),(\'X\',\'Y\',0.65)], samples=1000000, seed=0)')
+            print('   graph:        edge list of (parent, child) or (parent, child, coefficient), or a DOT digraph string')
+            print('   coefficients: {(parent, child): value}, overrides edge coefficients (default 1.0)')
+            print('   noise:        scale for every node, {node: scale}, or {node: callable(rng, size)}')
+            print('   transforms:   {node: \'linear\'|\'tanh\'|\'square\'|\'threshold\'|\'binary\'|callable(values, rng)}')
+            print('   dtype:        np.float32 (default) or np.float64')
+            print('   observed:     columns to return (drop unobserved confounders)')
+            print('   output:       \'dataframe\', \'chunks\' (generator), \'parquet\' or \'memmap\' (.npy) with path=')
+            return
+        return scmdata(graph, coefficients=coefficients, noise=noise, transforms=transforms, samples=samples, chunksize=chunksize,
+                       dtype=dtype, seed=seed, observed=observed, output=output, path=path)
+
+    def makegraph(function='main',edges='edges',digraph='graph',dataset='dataset',treatment='treatmentX0',outcome='outcomeY0',model='model',eda=False,verbose=True,samples=1500,seed=None,draw=False,instrument=None):
         def newline():
             print('')
         def menubreak():
@@ -437,6 +3392,9 @@ class functions:
             newline()
             print('   Create a CausalModel for causal analysis in CausalFast Simulator or DoWhy')
             print('   Syntax: makegraph(function=\'makecausalmodel\',digraph=\'graph\',dataset=\'dataset\',treatment=\'treatment\',outcome=\'outcome\')')
+            print('   Syntax: makegraph(function=\'makecausalmodel\',edges=edgelist,dataset=\'dataset\',treatment=\'treatment\',outcome=\'outcome\')')
+            print('   Optional: draw=True (render the DAG with matplotlib; nothing is drawn by default)')
+            print('   Optional: digraph=compilegraph(graph) (parsed once; identifier=\'minimal-adjustment\' reads its adjustment sets)')
             newline()
         def helpmenu2():
             print('   Tutorial Mode:')
@@ -444,6 +3402,7 @@ class functions:
             print('   Syntax: makegraph(function=\'tutorial\', model=\'backdoor\')')
             print('   Syntax: makegraph(function=\'tutorial\', model=\'frontdoor\')')
             print('   Syntax: makegraph(function=\'tutorial\', model=\'iv\')')
+            print('   Optional: samples=1500 (rows generated), seed=None (reproducible data), draw=True (render the graph)')
             newline()
         def causalmodelmenu0():
             print('CausalFast makegraph() Causal Model Maker')
@@ -454,6 +3413,7 @@ class functions:
             print('outcome:                \'Y\'')
             print('(un)observed-confounder:\'U\'')
         def edalabel(data,edalen=False):
+            summary = edasummary(data)
             print('Basic EDA:')
             print('Dimensionality: ', data.shape)
             print('Column Names:', list(data.columns))
@@ -461,39 +3421,9 @@ class functions:
                 newline()
                 print(data.head())
             newline()
-            print('Rounded - 2 decimals / Numeral Length - CtNa:4, Min/Avg/Max:11')
-            for (columnName, columnData) in data.items():
-                naopt = str(data[columnName].isna().sum())
-                nodat = '--      '
-                if len(naopt) <= 4:
-                    naopt = naopt + (" " * (4-len(naopt)))
-                elif len(naopt) > 4:
-                    naopt = naopt[:4]
-                dtopt = str(data[columnName].dtype)
-                if len(dtopt) <= 7:
-                    dtopt = dtopt + (" " * (7-len(dtopt)))
-                elif len(dtopt) > 7:
-                    dtopt = dtopt[:7]
-                minopt = str(round(min(columnData),2))
-                if len(minopt) <= 11:
-                    minopt = minopt + (" " * (11-len(minopt)))
-                elif len(minopt) > 11:
-                    minopt = minopt[:11]
-                avgopt = str(round(columnData.mean(),2))
-                if len(avgopt) <= 11:
-                    avgopt = avgopt + (" " * (11-len(avgopt)))
-                elif len(avgopt) > 11:
-                    avgopt = avgopt[:11]
-                maxopt = str(round(max(columnData),2))
-                if len(maxopt) <= 11:
-                    maxopt = maxopt + (" " * (11-len(maxopt)))
-                elif len(maxopt) > 11:
-                    maxopt = maxopt[:11]
-                if is_numeric_dtype(data[columnName]) and data[columnName].isna().sum() == 0:
-                    print(dtopt,'CtNA:',naopt,'MIN:', minopt,'AVG:',avgopt,'MAX:',maxopt,'Col:',columnName)
-                else:
-                    print(dtopt,'CountNA:',naopt,'MIN:',nodat,'AVG:',nodat,'MAX:',nodat,'Col:',columnName)
+            _edaprint(summary)
             menubreak()
+            return summary
         def startstring():
             print('Start of Digraph string:')
         def endstring():
@@ -513,7 +3443,7 @@ class functions:
             print('      outcome   - A string containing the outcome variable name (must match digraph and dataset variable)')
         def causalmodeldesc():
             option1()
-            print('   Create a Directed Acyclic Graph / DAG using NetworkX to visualize a causal system')
+            print('   Create a Directed Acyclic Graph / DAG of a causal system (draw=True also plots it with NetworkX)')
             print('   Returns a digraph as a string object used to build the casualmodel object')
             newline()
             print('   Provide the following parameters (as a list object): edges')
@@ -541,18 +3471,11 @@ class functions:
             makemodelfailed()
             newline()
 
-        samples = 1500
-        rng = np.random.default_rng()
-
         if function == 'tutorial':
+            from dowhy import CausalModel
             if model == 'backdoor':
-                U = rng.standard_normal(size = samples, dtype = np.float32)
-                X = 0.19*U + rng.standard_normal(size = samples, dtype = np.float32)
-                Y = 0.36*U + 0.65*X + 0.25*rng.standard_normal(size = samples, dtype = np.float32)
-                data = pd.DataFrame()
-                data['X'] = X
-                data['Y'] = Y
-                data['U'] = U
+                data = scmdata([('U','X',0.19),('U','Y',0.36),('X','Y',0.65)], noise={'Y':0.25},
+                               samples=samples, seed=seed, observed=['X','Y','U'])
                 strValue ="""digraph {
                 U;
                 X;
@@ -582,19 +3505,14 @@ class functions:
                     newline()
                     stringcomment()
                 cmodel = CausalModel(data=data,treatment='X',outcome='Y',graph=strValue)
-                cmodel.view_model()
+                if draw == True:
+                    cmodel.view_model()
                 newline()
                 returnstatement()
                 return cmodel, strValue, data
             elif model == 'frontdoor':
-                U = rng.standard_normal(size = samples, dtype = np.float32)
-                X = 0.19*U + rng.standard_normal(size = samples, dtype = np.float32)
-                Z = 0.75*X + 0.2*rng.standard_normal(size = samples, dtype = np.float32)
-                Y = 0.36*U + 0.90*Z + 0.25*rng.standard_normal(size = samples, dtype = np.float32)
-                data = pd.DataFrame()
-                data['X'] = X
-                data['Y'] = Y
-                data['Z'] = Z
+                data = scmdata([('U','X',0.19),('X','Z',0.75),('U','Y',0.36),('Z','Y',0.90)], noise={'Z':0.2,'Y':0.25},
+                               samples=samples, seed=seed, observed=['X','Y','Z'])
                 strValue ="""digraph {
                 X;
                 Y;
@@ -627,19 +3545,14 @@ class functions:
                     newline()
                     stringcomment()
                 cmodel = CausalModel(data=data,treatment='X',outcome='Y',graph=strValue)
-                cmodel.view_model()
+                if draw == True:
+                    cmodel.view_model()
                 newline()
                 returnstatement()
                 return cmodel, strValue, data
             elif model == 'iv':
-                U = rng.standard_normal(size = samples, dtype = np.float32)
-                Z = rng.standard_normal(size = samples, dtype = np.float32)
-                X = 0.19*U + 0.70*Z + rng.standard_normal(size = samples, dtype = np.float32)
-                Y = 0.36*U + 0.90*X + 0.25*rng.standard_normal(size = samples, dtype = np.float32)
-                data = pd.DataFrame()
-                data['X'] = X
-                data['Y'] = Y
-                data['Z'] = Z
+                data = scmdata([('U','X',0.19),('Z','X',0.70),('U','Y',0.36),('X','Y',0.90)], noise={'Y':0.25},
+                               samples=samples, seed=seed, observed=['X','Y','Z'])
                 strValue ="""digraph {
                 X;
                 Y;
@@ -671,7 +3584,8 @@ class functions:
                     newline()
                     stringcomment()
                 cmodel = CausalModel(data=data,treatment='X',outcome='Y',graph=strValue)
-                cmodel.view_model()
+                if draw == True:
+                    cmodel.view_model()
                 newline()
                 returnstatement()
                 return cmodel, strValue, data
@@ -687,9 +3601,32 @@ class functions:
                 causalmodelmenu0()
                 menubreak()
             if isinstance(dataset, pd.DataFrame):
+                instrument = _instrument(instrument)
                 if eda == True:
-                    edalabel(data=dataset,edalen=False)
-                if digraph != 'graph' and treatment != 'treatmentX0' and outcome != 'outcomeX0':
+                    with instrument.stage('makegraph.eda'):
+                        edalabel(data=dataset,edalen=False)
+                if isinstance(digraph, str) and digraph == 'graph' and isinstance(edges, list):
+                    with instrument.stage('makegraph.dot'):
+                        digraph = _dotstring(*_edgelist(edges)[:2])
+                compiled = None
+                if isinstance(digraph, CompiledGraph):
+                    compiled = digraph
+                    digraph = compiled.dot
+                if digraph != 'graph' and treatment != 'treatmentX0' and outcome != 'outcomeY0':
+                    unobserved = []
+                    if '{' in digraph:
+                        # DOT graphs are checked here; DoWhy validates GML itself
+                        with instrument.stage('makegraph.validation'):
+                            try:
+                                nodes, graphedges = _parsedot(digraph)
+                                unobserved = _checkgraph(nodes, graphedges, dataset.columns, treatment, outcome)
+                            except ValueError as error:
+                                print('Invalid Digraph: ', error)
+                                newline()
+                                makemodelfailed()
+                                return
+                        if draw == True:
+                            _drawgraph(nodes, graphedges)
                     strValue = digraph
                     n = 7
                     replacementStr = '\"\"\"digraph'
@@ -701,6 +3638,8 @@ class functions:
                         print('Digraph Detected')
                         print('Treatment: ', treatment, '  (Verify your treatment parameter with the Digraph and Dataset column name)')
                         print('Outcome: ', outcome, '  (Verify your outcome parameter with the Digraph and Dataset column name)')
+                        if len(unobserved) > 0:
+                            print('Unobserved: ', unobserved, '  (Digraph variables without a Dataset column)')
                         newline()
                         startstring()
                         print(strValue2)
@@ -708,7 +3647,17 @@ class functions:
                         newline()
                         stringcomment()
                         newline()
-                    cmodel = CausalModel(data=dataset,treatment=treatment,outcome=outcome,graph=digraph)
+                    with instrument.stage('makegraph.causal_model'):
+                        from dowhy import CausalModel
+                        if compiled is not None:
+                            cmodel = compiled.causalmodel(dataset, treatment, outcome)
+                        else:
+                            cmodel = CausalModel(data=dataset,treatment=treatment,outcome=outcome,graph=digraph)
+                    # The profile carries the dataset fingerprint that estimand, profile and result caches are keyed on
+                    with instrument.stage('makegraph.profile'):
+                        cmodel._causalfast_profile = DataProfile(dataset)
+                    if verbose == True:
+                        print('Data Fingerprint: ', cmodel._causalfast_profile.fingerprint)
                     newline()
                     returnstatement()
                     strValue2 = strValue2[3:-3]
@@ -738,18 +3687,15 @@ class functions:
                     print('Edges List: ')
                     print(edges)
                     newline()
-                seed = 42
-                G = nx.DiGraph()
-                G.add_edges_from(edges)
-                pos = nx.circular_layout(G)
-                visual = nx.draw(G, pos, with_labels = True, width=0.4, edge_color='red', style=':', node_size=400, arrows=True)
-                DOTG = nx.nx_pydot.to_pydot(G).to_string()
-                n = 14
-                replacementStr = '\"\"\"digraph'
-                strValue = replacementStr + DOTG[n:]
-                strValue = strValue.replace("--", "->")
-                endstr = '\"\"\"'
-                strValue = strValue + endstr
+                nodes, edgelist = _edgelist(edges)[:2]
+                try:
+                    _checkgraph(nodes, edgelist)
+                except ValueError as error:
+                    print('Invalid Digraph: ', error)
+                    return
+                if draw == True:
+                    _drawgraph(nodes, edgelist)
+                strValue = '\"\"\"' + _dotstring(nodes, edgelist) + '\"\"\"'
                 newline()
                 if verbose == True:
                     startstring()
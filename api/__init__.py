@@ -1,13 +1,32 @@
-"""An API of DoWhy.
-
-Detailed documentation and user guides are available at
-[https://github.com/TejuOye/CausalFast](https://github.com/TejuOye/CausalFast).
-"""
-__version__ = "0.3.5"
-from causalfast.causalfastapi import functions
-simulator = functions.simulator
-makegraph = functions.makegraph
-
-
-import dowhy
-from dowhy import CausalModel
+"""An API of DoWhy.
+
+Detailed documentation and user guides are available at
+[https://github.com/TejuOye/CausalFast](https://github.com/TejuOye/CausalFast).
+"""
+__version__ = "0.3.5"
+from causalfast.causalfastapi import functions, classifyestimand, datafingerprint, edasummary, scmdata, streamestimate, bootstrapestimate, incrementalestimate, propensityestimate, effectmatrix, cateestimate, previewestimate, CachedModel, CompiledGraph, Instrument, ResultStore, JsonLinesSink, SimulatorResult, StreamingEstimate, BootstrapResult, IncrementalEstimate, PropensityEstimate, PreviewEstimate
+simulator = functions.simulator
+batchsimulator = functions.batchsimulator
+streamsimulator = functions.streamsimulator
+incrementalsimulator = functions.incrementalsimulator
+propensitysimulator = functions.propensitysimulator
+matrixsimulator = functions.matrixsimulator
+catesimulator = functions.catesimulator
+previewsimulator = functions.previewsimulator
+compilegraph = functions.compilegraph
+estimandcache = functions.estimandcache
+nuisancecache = functions.nuisancecache
+eda = functions.eda
+scm = functions.scm
+makegraph = functions.makegraph
+
+
+def __getattr__(name):
+    # dowhy and CausalModel stay importable from causalfast without loading dowhy on import causalfast
+    if name == 'dowhy':
+        import dowhy
+        return dowhy
+    if name == 'CausalModel':
+        from dowhy import CausalModel
+        return CausalModel
+    raise AttributeError("module 'causalfast' has no attribute " + repr(name))
@@ -0,0 +1,66 @@
+import contextlib
+import io
+import os
+import sys
+import types
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import CausalFastAPI as cf  # noqa: E402
+
+# The package __init__ imports the published module name; point it at the source tree
+sys.modules.setdefault('causalfast', types.ModuleType('causalfast'))
+sys.modules.setdefault('causalfast.causalfastapi', cf)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_caches():
+    # Module-level caches would otherwise carry results from one test into the next
+    cf._ESTIMAND_CACHE.clear()
+    cf._NUISANCE_CACHE.clear()
+    cf._PROFILE_SUMMARIES.clear()
+    yield
+
+
+@pytest.fixture
+def quiet():
+    # The simulators print their menus and results; tests only look at return values
+    return lambda: contextlib.redirect_stdout(io.StringIO())
+
+
+@pytest.fixture
+def tutorial(quiet):
+    def build(model, samples=500, seed=0):
+        with quiet():
+            return cf.functions.makegraph(function='tutorial', model=model, samples=samples, seed=seed, verbose=False)[0]
+    return build
+
+
+BACKDOOR = 'digraph {U->X; U->Y; W->X; W->Y; X->Y;}'
+
+
+@pytest.fixture
+def backdoor():
+    # Confounded treatment with a continuous (Y) and a binary (B) outcome, and a binary treatment for propensity methods
+    def build(rows=2000, seed=0):
+        rng = np.random.default_rng(seed)
+        U = rng.normal(size=rows)
+        W = rng.normal(size=rows)
+        X = (rng.random(rows) < 1 / (1 + np.exp(-(0.8 * U + 0.4 * W)))).astype(int)
+        Y = 0.65 * X + 0.4 * U - 0.3 * W + rng.normal(size=rows)
+        B = (rng.random(rows) < 1 / (1 + np.exp(-(0.7 * X + 0.5 * U - 0.3 * W)))).astype(int)
+        return pd.DataFrame({'U': U, 'W': W, 'X': X, 'Y': Y, 'B': B})
+    return build
+
+
+@pytest.fixture
+def causalmodel():
+    def build(data, outcome='Y', treatment='X', graph=BACKDOOR):
+        from dowhy import CausalModel
+        graph = graph.replace('Y', outcome) if outcome != 'Y' else graph
+        return CausalModel(data=data, treatment=treatment, outcome=outcome, graph=graph)
+    return build
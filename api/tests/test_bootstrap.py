@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+import CausalFastAPI as cf
+
+
+def _dowhyreplicates(causalmodel, data, outcome, method_name, method_params, replicates, seed):
+    # Refit DoWhy on the exact resamples the native multinomial scheme draws for a single block; propensity
+    # weighting writes its scores back into the frame, and DoWhy would reuse them, so only the source columns are kept
+    data = data[['U', 'W', 'X', 'Y', 'B']]
+    rng = np.random.default_rng(np.random.SeedSequence(seed).spawn(1)[0])
+    values = []
+    for _ in range(replicates):
+        resample = data.iloc[rng.integers(0, len(data), len(data))].reset_index(drop=True)
+        cmodel = causalmodel(resample, outcome=outcome)
+        identified_estimand = cmodel.identify_effect(proceed_when_unidentifiable=True)
+        values.append(cmodel.estimate_effect(identified_estimand, method_name=method_name, method_params=method_params).value)
+    return np.array(values)
+
+
+@pytest.mark.parametrize('outcome, method_name, method_params, tolerance', [
+    ('Y', 'backdoor.linear_regression', None, 1e-8),
+    ('B', 'backdoor.propensity_score_weighting', {'weighting_scheme': 'ips_weight'}, 1e-4),
+])
+def test_native_replicates_match_dowhy_refits(backdoor, causalmodel, outcome, method_name, method_params, tolerance):
+    data = backdoor(rows=600)
+    cmodel = causalmodel(data, outcome=outcome)
+    identified_estimand = cmodel.identify_effect(proceed_when_unidentifiable=True)
+    estimate = cmodel.estimate_effect(identified_estimand, method_name=method_name, method_params=method_params)
+    result = cf.bootstrapestimate(estimate, data, replicates=8, random_seed=3)
+    expected = _dowhyreplicates(causalmodel, data, outcome, method_name, method_params, 8, 3)
+    assert np.allclose(result.estimates, expected, atol=tolerance)
+    assert result.ci_lower <= estimate.value <= result.ci_upper
+
+
+def test_unsupported_estimators_fall_back_to_dowhy(tutorial):
+    for model in ('frontdoor', 'iv'):
+        cmodel = tutorial(model)
+        identified_estimand = cmodel.identify_effect(proceed_when_unidentifiable=True)
+        method_name = 'frontdoor.two_stage_regression' if model == 'frontdoor' else 'iv.instrumental_variable'
+        estimate = cmodel.estimate_effect(identified_estimand, method_name=method_name)
+        assert cf._bootstrapspec(estimate, cmodel._data) is None
+        with pytest.raises(ValueError):
+            cf.bootstrapestimate(estimate, cmodel._data)
+
+
+@pytest.mark.parametrize('model', ['backdoor', 'frontdoor', 'iv'])
+@pytest.mark.parametrize('bootstrap', ['dowhy', 'native'])
+def test_tutorial_models_run_with_refuters(tutorial, model, bootstrap):
+    result = cf.functions.simulator(tutorial(model), refute=True, random_seed=0, verbose=False, bootstrap=bootstrap)
+    assert result.estimand == model
+    assert np.isfinite(result.value)
+    refuters = [refutation.refuter for refutation in result.refutations]
+    assert refuters[-1] == 'bootstrap_refuter'
+    assert ('random_common_cause' in refuters) == (model != 'iv')
+    assert all(refutation.new_effect is not None for refutation in result.refutations)
@@ -0,0 +1,52 @@
+import importlib
+
+import numpy as np
+import pytest
+
+import CausalFastAPI as cf
+
+
+def _run(cmodel, effect_modifiers):
+    return cf.functions.simulator(cmodel, method_name='backdoor.linear_regression', refute=False, verbose=False,
+                                  effect_modifiers=effect_modifiers)
+
+
+def test_single_modifier_string_is_one_modifier(backdoor, causalmodel):
+    # A multi-character name, so list('WW') would have split it into characters
+    data = backdoor(rows=800).rename(columns={'W': 'WW'})
+    graph = 'digraph {U->X; U->Y; WW->X; WW->Y; X->Y;}'
+    single = _run(causalmodel(data, graph=graph), 'WW')
+    listed = _run(causalmodel(data, graph=graph), ['WW'])
+    assert single.estimate.estimator._effect_modifier_names == ['WW']
+    assert single.value == listed.value
+
+
+def test_unknown_modifiers_raise(backdoor, causalmodel):
+    with pytest.raises(ValueError, match='segment'):
+        _run(causalmodel(backdoor(rows=200)), ['W', 'segment'])
+
+
+def test_conditional_effects_average_to_the_estimate(backdoor, causalmodel):
+    data = backdoor(rows=800)
+    result = _run(causalmodel(data), ['W'])
+    scored = cf.functions.catesimulator(result, data.drop(columns=['X', 'Y']), chunksize=300, verbose=False)
+    assert len(scored) == len(data) and scored['effect'].nunique() > 1
+    assert np.isclose(scored['effect'].mean(), result.value)
+
+
+@pytest.mark.parametrize('method_name', cf._DOWHY_METHODS)
+def test_native_methods_are_dowhy_estimators(method_name):
+    # method_name resolves to dowhy.causal_estimators.<name>_estimator, as CausalModel.estimate_effect looks it up
+    importlib.import_module('dowhy.causal_estimators.' + method_name.split('.')[-1] + '_estimator')
+
+
+def test_econml_and_causalml_methods_are_not_native():
+    for method_name in ('backdoor.econml.dml.DML', 'backdoor.econml.dr.LinearDRLearner', 'backdoor.causalml.inference.meta.LRSRegressor'):
+        assert method_name not in cf._DOWHY_METHODS
+
+
+@pytest.mark.parametrize('method_name', ['backdoor.generalized_linear_model', 'backdoor.propensity_score_stratification'])
+def test_conditional_estimates_reach_native_estimators(backdoor, causalmodel, method_name):
+    result = cf.functions.simulator(causalmodel(backdoor(rows=800), outcome='B'), method_name=method_name, refute=False,
+                                    verbose=False, full_output=False, effect_modifiers=['W'], conditional_estimates=True)
+    assert result.estimate.estimator.need_conditional_estimates == True
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+import CausalFastAPI as cf
+
+
+def test_chunked_summary_matches_whole_frame():
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({'x': rng.normal(size=1000), 'b': rng.integers(0, 2, 1000), 's': rng.choice(['u', 'v', 'w'], 1000)})
+    data.loc[::97, 'x'] = np.nan
+    whole = cf.edasummary(data)
+    chunked = cf.edasummary(data, chunksize=128)
+    pd.testing.assert_frame_equal(whole, chunked)
+    assert whole.loc['x', 'cardinality'] == data['x'].nunique() + 1
+    assert whole.loc['b', 'binary'] == True and whole.loc['s', 'numeric'] == False
+
+
+def test_dtype_changes_between_chunks():
+    chunks = [pd.DataFrame({'n': [1, 2, 3], 'm': [1, 2, 3]}),
+              pd.DataFrame({'n': [4.5, np.nan, 1.0], 'm': ['a', 'b', 'c']})]
+    summary = cf.edasummary(iter(chunks))
+    # Widening keeps the stats; 1 and 1.0 are one distinct value
+    assert summary.loc['n', 'dtype'] == 'float64' and summary.loc['n', 'numeric'] == True
+    assert summary.loc['n', 'max'] == 4.5 and summary.loc['n', 'cardinality'] == 5
+    # A non-numeric chunk demotes the column instead of coercing it into the numeric block
+    assert summary.loc['m', 'dtype'] == 'object' and summary.loc['m', 'numeric'] == False
+    assert np.isnan(summary.loc['m', 'mean']) and summary.loc['m', 'cardinality'] == 6
+
+
+def test_cardinality_sketch_is_bounded():
+    rng = np.random.default_rng(1)
+    data = pd.DataFrame({'id': rng.permutation(200000), 'small': rng.integers(0, 40, 200000)})
+    summary = cf.edasummary(data, chunksize=25000, sketchsize=4096)
+    assert summary.loc['small', 'cardinality'] == 40
+    assert abs(summary.loc['id', 'cardinality'] / 200000 - 1) < 0.05
@@ -0,0 +1,50 @@
+import os
+
+import CausalFastAPI as cf
+
+
+def _files(directory):
+    return sorted(name[:-len('.estimand')] for name in os.listdir(directory) if name.endswith('.estimand'))
+
+
+def test_disk_entries_follow_maxsize_lru(tmp_path):
+    cache = cf.EstimandCache(maxsize=2, cachedir=str(tmp_path))
+    cache.put('a', 'estimand a')
+    os.utime(tmp_path / 'a.estimand', (1, 1))
+    cache.put('b', 'estimand b')
+    os.utime(tmp_path / 'b.estimand', (2, 2))
+    # A fresh process only sees the directory; loading 'a' makes it the most recently used file
+    assert cf.EstimandCache(maxsize=2, cachedir=str(tmp_path)).get('a') == 'estimand a'
+    cache.put('c', 'estimand c')
+    assert _files(tmp_path) == ['a', 'c']
+    cache.maxsize = 1
+    cache.put('d', 'estimand d')
+    assert _files(tmp_path) == ['d']
+
+
+def test_estimands_shared_through_cachedir_and_invalidated_by_graph(backdoor, causalmodel, tmp_path):
+    cache = cf.functions.estimandcache(cachedir=str(tmp_path))
+    try:
+        data = backdoor(rows=300)
+        cf.functions.simulator(causalmodel(data), refute=False, verbose=False)
+        assert (cache.hits, cache.misses) == (0, 1)
+        cache.clear()
+        cf.functions.simulator(causalmodel(data), refute=False, verbose=False)
+        assert (cache.hits, cache.misses) == (1, 0)
+        # A different graph is a different key, never the cached estimand
+        result = cf.functions.simulator(causalmodel(data, graph='digraph {U->X; U->Y; W->X; X->Y;}'), refute=False, verbose=False)
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert len(_files(tmp_path)) == 2
+        assert result.estimate.target_estimand.get_backdoor_variables() == ['U']
+    finally:
+        cache.clear(disk=True)
+        cf.functions.estimandcache(cachedir=None)
+
+
+def test_maxsize_zero_disables_the_cache(backdoor, causalmodel):
+    cache = cf.functions.estimandcache(maxsize=0)
+    try:
+        cf.functions.simulator(causalmodel(backdoor(rows=300)), refute=False, verbose=False)
+        assert (cache.hits, cache.misses) == (0, 0)
+    finally:
+        cf.functions.estimandcache(maxsize=128)
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+import CausalFastAPI as cf
+
+
+def test_fingerprint_tracks_content_not_identity():
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({'a': rng.normal(size=1000), 'b': rng.integers(0, 5, 1000)})
+    fingerprint = cf.datafingerprint(data)
+    assert cf.datafingerprint(data.copy()) == fingerprint
+    assert cf.datafingerprint(data.rename(columns={'b': 'c'})) != fingerprint
+    assert cf.datafingerprint(data.astype({'b': np.int32})) != fingerprint
+    edited = data.copy()
+    edited.loc[0, 'a'] += 1.0
+    assert cf.datafingerprint(edited) != fingerprint
+
+
+def test_sampled_fingerprint_misses_edits_a_full_one_sees():
+    data = pd.DataFrame({'a': np.arange(1000, dtype=np.float64)})
+    edited = data.copy()
+    edited.loc[500, 'a'] = -1.0
+    assert cf.datafingerprint(edited, blocks=2, blockrows=10) == cf.datafingerprint(data, blocks=2, blockrows=10)
+    assert cf.datafingerprint(edited, blocks=None) != cf.datafingerprint(data, blocks=None)
+
+
+def test_profiles_follow_the_model_data(backdoor, causalmodel):
+    data = backdoor(rows=500)
+    cmodel = causalmodel(data)
+    profile = cf._profile(cmodel)
+    assert cf._profile(cmodel) is profile and profile.isbinary('X') == True
+    # A new data object gets a new profile; an equal one starts from the summaries already computed
+    cmodel._data = data.assign(X=data['X'] * 2)
+    assert cf._profile(cmodel) is not profile and cf._profile(cmodel).isbinary('X') == False
+    assert len(cf.DataProfile(data.copy())._summary) > 0
+
+
+def test_profiles_are_not_shared_across_edits_between_sampled_blocks():
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({'X': rng.normal(size=200000), 'Y': rng.integers(0, 2, 200000).astype(float)})
+    assert cf.DataProfile(data).isbinary('Y') == True
+    edited = data.copy()
+    edited.loc[5000:5100, 'Y'] = 3.7
+    # The edit sits between the sampled blocks, so only a full-content key tells the frames apart
+    assert cf.datafingerprint(edited) == cf.datafingerprint(data)
+    assert cf.DataProfile(edited).isbinary('Y') == False
@@ -0,0 +1,44 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+API = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loads CausalFastAPI and the package __init__ (as the published causalfast package) in a fresh interpreter, runs a light
+# job, and prints which heavy dependencies ended up imported
+SCRIPT = '''
+import importlib.util, sys
+sys.path.insert(0, {api!r})
+import CausalFastAPI
+sys.modules['causalfast.causalfastapi'] = CausalFastAPI
+spec = importlib.util.spec_from_file_location('causalfast', {init!r}, submodule_search_locations=[{api!r}])
+causalfast = importlib.util.module_from_spec(spec)
+sys.modules['causalfast'] = causalfast
+spec.loader.exec_module(causalfast)
+{job}
+print(' '.join(name for name in ('dowhy', 'econml', 'sklearn', 'statsmodels', 'matplotlib', 'networkx', 'scipy.stats') if name in sys.modules))
+'''
+
+
+def _loaded(job=''):
+    script = SCRIPT.format(api=API, init=os.path.join(API, '__init__.py'), job=job)
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True)
+    return result.stdout.split()
+
+
+def test_import_loads_no_heavy_dependency():
+    assert _loaded() == []
+
+
+def test_graph_and_fingerprint_work_stays_light():
+    job = ("import pandas as pd\n"
+           "causalfast.datafingerprint(pd.DataFrame({'X': [0.0, 1.0], 'Y': [1.0, 2.0]}))\n"
+           "causalfast.makegraph(function='makecausalmodel', edges=[('U', 'X'), ('X', 'Y')], verbose=False)")
+    assert _loaded(job) == []
+
+
+@pytest.mark.parametrize('name', ['dowhy', 'CausalModel'])
+def test_dowhy_is_loaded_on_first_use(name):
+    assert 'dowhy' in _loaded('getattr(causalfast, ' + repr(name) + ')')
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+
+import CausalFastAPI as cf
+
+
+def _dowhy(causalmodel, data, outcome, method_name, method_params=None):
+    cmodel = causalmodel(data, outcome=outcome)
+    identified_estimand = cmodel.identify_effect(proceed_when_unidentifiable=True)
+    return cmodel.estimate_effect(identified_estimand, method_name=method_name, method_params=method_params)
+
+
+def test_ols_absorbs_appended_chunks_without_concatenating(backdoor, causalmodel):
+    data = backdoor(rows=1600)
+    cmodel = causalmodel(data.iloc[:400].reset_index(drop=True))
+    first = cf.incrementalestimate(cmodel, method_name='backdoor.linear_regression')
+    assert first.refit == True and first.nobs == 400
+    for start in (400, 800, 1200):
+        result = cf.incrementalestimate(cmodel, rows=data.iloc[start:start + 400], method_name='backdoor.linear_regression')
+        assert result.refit == False and result.added == 400
+    # The model data is never copied; the appended rows are kept as chunks
+    assert len(cmodel._data) == 400 and [len(chunk) for chunk in cmodel._causalfast_appended] == [400, 400, 400]
+    expected = _dowhy(causalmodel, data, 'Y', 'backdoor.linear_regression')
+    assert result.nobs == 1600 and np.isclose(result.value, expected.value)
+    assert np.isclose(result.std_error, np.ravel(expected.get_standard_error())[0])
+    # Rows appended to the model data directly still count as new
+    cmodel._data = pd.concat([cmodel._data, data.iloc[:100]], ignore_index=True)
+    assert cf.incrementalestimate(cmodel, method_name='backdoor.linear_regression').added == 100
+
+
+def _counting(monkeypatch):
+    # Rows read by the incremental passes, to show an update never revisits the rows already seen
+    seen = []
+    chunks = cf._edachunks
+
+    def counted(frame, chunksize, columns):
+        for chunk in chunks(frame, chunksize, columns):
+            seen.append(len(chunk))
+            yield chunk
+    monkeypatch.setattr(cf, '_edachunks', counted)
+    return seen
+
+
+def test_glm_updates_from_new_rows_only_and_tracks_a_full_fit(backdoor, causalmodel, monkeypatch):
+    data = backdoor(rows=2000)
+    cmodel = causalmodel(data.iloc[:800].reset_index(drop=True), outcome='B')
+    cf.incrementalestimate(cmodel, method_name='backdoor.generalized_linear_model')
+    seen = _counting(monkeypatch)
+    for start in (800, 1200, 1600):
+        del seen[:]
+        updated = cf.incrementalestimate(cmodel, rows=data.iloc[start:start + 400], method_name='backdoor.generalized_linear_model')
+        assert updated.refit == False and set(seen) == {400}
+    full = cf.incrementalestimate(causalmodel(data, outcome='B'), method_name='backdoor.generalized_linear_model')
+    assert updated.nobs == full.nobs == 2000
+    assert abs(updated.value - full.value) < 0.01 * full.std_error
+    assert np.isclose(updated.std_error, full.std_error, rtol=1e-2)
+    # A requested refit reads every row and reproduces the full fit
+    exact = cf.incrementalestimate(cmodel, method_name='backdoor.generalized_linear_model', refit=True)
+    assert exact.reason == 'refit requested' and np.isclose(exact.value, full.value, atol=1e-8)
+
+
+def test_propensity_updates_from_new_rows_only_with_configurable_clipping(backdoor, causalmodel, monkeypatch):
+    data = backdoor(rows=1500)
+    cmodel = causalmodel(data.iloc[:500].reset_index(drop=True), outcome='B')
+    first = cf.incrementalestimate(cmodel, method_name='backdoor.propensity_score_weighting')
+    expected = _dowhy(causalmodel, data.iloc[:500].reset_index(drop=True), 'B', 'backdoor.propensity_score_weighting',
+                      {'weighting_scheme': 'ips_weight'})
+    assert np.isclose(first.value, expected.value, atol=1e-4)
+    seen = _counting(monkeypatch)
+    for start in (500, 1000):
+        del seen[:]
+        result = cf.incrementalestimate(cmodel, rows=data.iloc[start:start + 500], method_name='backdoor.propensity_score_weighting')
+        assert result.refit == False and set(seen) == {500}
+    expected = _dowhy(causalmodel, data, 'B', 'backdoor.propensity_score_weighting', {'weighting_scheme': 'ips_weight'})
+    assert result.nobs == 1500 and np.isclose(result.value, expected.value, atol=1e-3)
+    clipped = cf.incrementalestimate(cmodel, method_name='backdoor.propensity_score_weighting', min_ps_score=0.3, max_ps_score=0.7)
+    expected = _dowhy(causalmodel, data, 'B', 'backdoor.propensity_score_weighting',
+                      {'weighting_scheme': 'ips_weight', 'min_ps_score': 0.3, 'max_ps_score': 0.7})
+    assert clipped.reason == 'graph, columns or settings changed' and np.isclose(clipped.value, expected.value, atol=1e-4)
+
+
+def test_replaced_model_data_of_the_same_length_forces_a_refit(backdoor, causalmodel):
+    data = backdoor(rows=1000)
+    cmodel = causalmodel(data)
+    cf.incrementalestimate(cmodel, method_name='backdoor.linear_regression')
+    # The same rows in a new frame are reused; different rows of the same length are not
+    cmodel._data = data.copy()
+    assert cf.incrementalestimate(cmodel, method_name='backdoor.linear_regression').reason is None
+    other = backdoor(rows=1000, seed=1)
+    cmodel._data = other
+    result = cf.incrementalestimate(cmodel, method_name='backdoor.linear_regression')
+    assert result.refit == True and result.reason == 'data changed' and result.nobs == 1000
+    expected = _dowhy(causalmodel, other, 'Y', 'backdoor.linear_regression')
+    assert np.isclose(result.value, expected.value)
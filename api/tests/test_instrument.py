@@ -0,0 +1,59 @@
+import time
+
+import numpy as np
+import pytest
+
+import CausalFastAPI as cf
+
+
+def test_stage_timings_recorded_and_sent_to_sink(backdoor, causalmodel, quiet):
+    events = []
+    cmodel = causalmodel(backdoor())
+    result = cf.functions.simulator(cmodel, method_name='backdoor.linear_regression', refute=False, verbose=False, instrument=events.append)
+    assert {'identification', 'estimator_selection', 'estimate_effect'} <= set(result.timings)
+    assert [event['stage'] for event in events] == list(result.timings)
+    assert all(event['event'] == 'causalfast.stage' and event['wall_seconds'] >= 0 for event in events)
+
+
+def test_full_output_estimates_dowhy_default_units(backdoor, causalmodel, quiet):
+    # Full output has always estimated with DoWhy's default (ate) units; only full_output=False passes the selected unit
+    data = backdoor()
+    cmodel = causalmodel(data, outcome='B')
+    identified_estimand = cmodel.identify_effect(proceed_when_unidentifiable=True)
+    params = {'num_strata': 50, 'clipping_threshold': 5}
+    with quiet():
+        full, _ = cf.functions.simulator(cmodel, method_name='backdoor.propensity_score_stratification', refute=False)
+        default, _ = cf.functions.simulator(cmodel, method_name='backdoor.propensity_score_stratification', refute=False,
+                                            full_output=False)
+    ate = causalmodel(data, outcome='B').estimate_effect(identified_estimand, method_name='backdoor.propensity_score_stratification',
+                                                         method_params=params)
+    att = causalmodel(data, outcome='B').estimate_effect(identified_estimand, method_name='backdoor.propensity_score_stratification',
+                                                         method_params=params, target_units='att')
+    assert full.value == ate.value
+    assert default.value == att.value
+
+
+@pytest.mark.skipif(cf._currentrss() is None, reason='no /proc resident set size')
+def test_peak_rss_is_tracked_per_stage():
+    instrument = cf.Instrument()
+    with instrument.stage('large'):
+        block = np.ones(25_000_000)
+    del block
+    with instrument.stage('transient'):
+        block = np.ones(25_000_000)
+        time.sleep(0.05)
+        del block
+    with instrument.stage('small'):
+        np.ones(1000)
+    large, transient, small = instrument.timings
+    # Each block is 200 MB; the process high-water mark would report the same peak for all three stages
+    assert large.peak_rss_mb - small.peak_rss_mb > 100
+    assert transient.peak_rss_mb - small.peak_rss_mb > 100
+
+
+def test_makegraph_records_its_stages(backdoor, quiet):
+    instrument = cf.Instrument()
+    with quiet():
+        cf.functions.makegraph(function='makecausalmodel', edges=[('U', 'X'), ('W', 'X'), ('U', 'Y'), ('W', 'Y'), ('X', 'Y')], dataset=backdoor(),
+                               treatment='X', outcome='Y', verbose=False, instrument=instrument)
+    assert list(instrument.summary()) == ['makegraph.dot', 'makegraph.validation', 'makegraph.causal_model', 'makegraph.profile']
@@ -0,0 +1,58 @@
+import contextlib
+import io
+
+import matplotlib
+import pytest
+from dowhy import CausalModel
+
+import CausalFastAPI as cf
+
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt  # noqa: E402
+
+
+def _makemodel(dataset, digraph, treatment='X', outcome='Y', draw=False):
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        result = cf.functions.makegraph(function='makecausalmodel', digraph=digraph, dataset=dataset, treatment=treatment,
+                                        outcome=outcome, verbose=False, draw=draw)
+    return result, output.getvalue()
+
+
+@pytest.mark.parametrize('digraph, treatment, outcome, message', [
+    ('digraph {U->X; U->Y; X->Y; Y->U;}', 'X', 'Y', 'cycle through'),
+    ('digraph {U->X; U->Y; X->Y;}', 'Z', 'Y', "Treatment 'Z' is not a node of the digraph"),
+    ('digraph {U->X; U->Y; X->Y; X->V;}', 'X', 'V', "Outcome 'V' is not a dataset column"),
+    ('digraph {U->X; U->Y; X->Y;', 'X', 'Y', 'enclosed in { and }'),
+])
+def test_invalid_digraphs_are_reported_not_modelled(backdoor, digraph, treatment, outcome, message):
+    result, output = _makemodel(backdoor(rows=200), digraph, treatment, outcome)
+    assert result is None
+    assert 'Invalid Digraph: ' in output and message in output
+
+
+def test_parsedot_rejects_an_unclosed_body():
+    with pytest.raises(ValueError, match='enclosed in'):
+        cf._parsedot('digraph {U->X; X->Y;')
+    with pytest.raises(ValueError, match='enclosed in'):
+        cf._parsedot('digraph U->X')
+
+
+def test_graph_nodes_without_a_column_are_unobserved(backdoor):
+    (cmodel, dot, dataset), output = _makemodel(backdoor(rows=200), 'digraph {H->X; H->Y; U->X; U->Y; X->Y;}')
+    assert isinstance(cmodel, CausalModel) and output.count('Invalid Digraph') == 0
+    assert cf._checkgraph(*cf._parsedot(dot), dataset.columns, 'X', 'Y') == ['H']
+
+
+def test_makegraph_is_headless_unless_asked_to_draw(backdoor, monkeypatch):
+    drawn = []
+    monkeypatch.setattr(cf, '_drawgraph', lambda nodes, edges: drawn.append((nodes, edges)))
+    plt.close('all')
+    with contextlib.redirect_stdout(io.StringIO()):
+        cf.functions.makegraph(function='makecausalmodel', edges=[('U', 'X'), ('U', 'Y'), ('X', 'Y')], verbose=False)
+        cf.functions.makegraph(function='tutorial', model='backdoor', samples=200, seed=0, verbose=False)
+    result, _ = _makemodel(backdoor(rows=200), 'digraph {U->X; U->Y; X->Y;}')
+    assert isinstance(result[0], CausalModel)
+    assert drawn == [] and plt.get_fignums() == []
+    _makemodel(backdoor(rows=200), 'digraph {U->X; U->Y; X->Y;}', draw=True)
+    assert drawn == [(['U', 'X', 'Y'], [('U', 'X'), ('U', 'Y'), ('X', 'Y')])]
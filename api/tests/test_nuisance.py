@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from sklearn.base import clone
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor
+
+import CausalFastAPI as cf
+
+
+def _arrays(rows=300, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(rows, 3))
+    return X, X @ [0.5, -0.2, 0.1] + rng.normal(size=rows)
+
+
+def test_cache_hit_returns_the_model_a_refit_would_produce():
+    X, y = _arrays()
+    estimator = GradientBoostingRegressor(n_estimators=20, random_state=0)
+    first = cf.CachedModel(estimator).fit(X, y)
+    # EconML clones the wrapper per fold; a clone fitted on the same rows is a lookup
+    second = clone(cf.CachedModel(estimator)).fit(X, y)
+    assert cf._NUISANCE_CACHE.hits == 1 and cf._NUISANCE_CACHE.misses == 1
+    assert second.estimator_ is first.estimator_
+    refit = cf.CachedModel(estimator, cache=False).fit(X, y)
+    assert refit.estimator_ is not first.estimator_
+    assert np.array_equal(second.predict(X), refit.predict(X))
+
+
+def test_changed_rows_or_parameters_miss():
+    X, y = _arrays()
+    cf.CachedModel(GradientBoostingRegressor(n_estimators=20, random_state=0)).fit(X, y)
+    edited = X.copy()
+    edited[150, 1] += 1.0
+    cf.CachedModel(GradientBoostingRegressor(n_estimators=20, random_state=0)).fit(edited, y)
+    cf.CachedModel(GradientBoostingRegressor(n_estimators=20, random_state=0)).fit(X, y + 1.0)
+    cf.CachedModel(GradientBoostingRegressor(n_estimators=21, random_state=0)).fit(X, y)
+    cf.CachedModel(GradientBoostingRegressor(n_estimators=20, random_state=0)).fit(X, y, sample_weight=np.full(len(y), 2.0))
+    assert cf._NUISANCE_CACHE.hits == 0 and cf._NUISANCE_CACHE.misses == 5
+
+
+@pytest.mark.parametrize('rows, expected', [(9999, GradientBoostingRegressor), (10000, HistGradientBoostingRegressor)])
+def test_dml_defaults_fix_the_folds_and_switch_boosting_on_large_data(rows, expected):
+    estmethod, params, _ = cf._selectestimator('backdoor', 'backdoor.econml.dml.DML', 'default', 'ate', lambda column: False,
+                                               'Y', 'X', verbose=False, rows=rows)
+    assert params['init_params']['random_state'] == 0
+    assert type(params['init_params']['model_y'].estimator) is expected
+    assert type(params['init_params']['model_t'].estimator) is expected
+    _, params, _ = cf._selectestimator('backdoor', 'backdoor.econml.dr.LinearDRLearner', 'default', 'ate', lambda column: True,
+                                       'Y', 'X', verbose=False, rows=rows)
+    assert params['init_params']['random_state'] == 0
+
+
+def test_repeated_dml_reuses_its_first_stages(backdoor, causalmodel, quiet):
+    cmodel = causalmodel(backdoor(rows=400))
+    with quiet():
+        first = cf.functions.simulator(cmodel, method_name='backdoor.econml.dml.DML', refute=False, verbose=False)
+        misses = cf._NUISANCE_CACHE.misses
+        second = cf.functions.simulator(cmodel, method_name='backdoor.econml.dml.DML', refute=False, verbose=False)
+    # The cross-fitted first stages of the point estimate are lookups; bootstrap resamples are new rows and refit
+    assert cf._NUISANCE_CACHE.hits >= 4 and cf._NUISANCE_CACHE.misses - misses < misses
+    assert second.value == first.value
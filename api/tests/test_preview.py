@@ -0,0 +1,45 @@
+import numpy as np
+
+import CausalFastAPI as cf
+
+
+def _preview(cmodel, **kwargs):
+    return cf.functions.previewsimulator(cmodel, method_name='backdoor.linear_regression', refute=False, verbose=False, **kwargs)
+
+
+def _full(cmodel):
+    return cf.functions.simulator(cmodel, method_name='backdoor.linear_regression', refute=False, verbose=False).value
+
+
+def test_preview_bands_cover_the_full_data_estimate(backdoor, causalmodel):
+    cmodel = causalmodel(backdoor(rows=40000))
+    full = _full(cmodel)
+    previews = [_preview(cmodel, fraction=0.05, random_seed=seed) for seed in range(20)]
+    assert all(preview.sample_size == 2000 and preview.std_error > 0 for preview in previews)
+    # Nominal 95% bands: allow a few misses out of 20
+    covered = sum(preview.ci_lower <= full <= preview.ci_upper for preview in previews)
+    assert covered >= 16
+    # And the band is an honest size, not one so wide that covering is trivial
+    assert np.median([preview.std_error for preview in previews]) < 0.05
+
+
+def test_escalating_preview_converges_towards_the_full_estimate(backdoor, causalmodel):
+    cmodel = causalmodel(backdoor(rows=40000))
+    full = _full(cmodel)
+    result = _preview(cmodel, fraction=0.025, tolerance=0.08, random_seed=0)
+    sizes = [stage.sample_size for stage in result.stages]
+    # Stops on a subsample once the band half-width and the stage-to-stage change are within tolerance
+    assert result.converged == True and sizes == sorted(sizes) and 1 < len(sizes) and result.sample_size < result.nobs
+    assert result.stages[-1].std_error < result.stages[0].std_error
+    assert result.ci_lower <= full <= result.ci_upper and result.ci_upper - result.ci_lower <= 2 * 0.08
+
+
+def test_small_data_passes_straight_through(backdoor, causalmodel):
+    cmodel = causalmodel(backdoor(rows=600))
+    result = _preview(cmodel, fraction=0.1, tolerance=0.01)
+    # Below the minimum preview size the sample is the whole dataset: one stage, no band, the simulator's own estimate
+    assert result.sample_size == result.nobs == 600 and len(result.stages) == 1
+    assert result.std_error == 0.0 and result.stages[0].fold_values == [] and result.converged == True
+    assert result.ci_lower == result.ci_upper == result.value
+    assert np.isclose(result.value, _full(cmodel))
+    assert len(cmodel._data) == 600
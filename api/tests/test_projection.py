@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+import CausalFastAPI as cf
+
+
+@pytest.mark.parametrize('project', [True, False, 'compact'])
+def test_in_place_edits_reach_the_next_run(backdoor, causalmodel, project):
+    cmodel = causalmodel(backdoor(rows=500))
+    before = cf.functions.simulator(cmodel, method_name='backdoor.linear_regression', refute=False, verbose=False, project=project)
+    # Copy-on-write keeps the same DataFrame object, so nothing but the values tells the runs apart
+    cmodel._data.loc[:, 'Y'] *= 10
+    after = cf.functions.simulator(cmodel, method_name='backdoor.linear_regression', refute=False, verbose=False, project=project)
+    assert np.isclose(after.value, 10 * before.value)
+
+
+def test_projection_keeps_estimator_columns_off_the_caller_frame(backdoor, causalmodel):
+    data = backdoor(rows=500)
+    cmodel = causalmodel(data, outcome='B')
+    result = cf.functions.simulator(cmodel, method_name='backdoor.propensity_score_weighting', refute=False, verbose=False)
+    assert result.propensity_scores is not None and len(result.propensity_scores) == len(data)
+    assert list(cmodel._data.columns) == ['U', 'W', 'X', 'Y', 'B']
+
+
+def test_working_frame_shares_the_model_data(backdoor, causalmodel):
+    cmodel = causalmodel(backdoor(rows=500))
+    data = cmodel._data
+    # project=False works on the whole frame; a write inside the block copies the column instead of editing the caller's data
+    with cf._workingframe(cmodel, data) as working:
+        assert np.shares_memory(working['Y'].to_numpy(), data['Y'].to_numpy())
+        working.loc[0, 'Y'] = 99.0
+    assert cmodel._data is data and data.loc[0, 'Y'] != 99.0
+
+
+def test_projected_frame_shares_the_model_data(backdoor, causalmodel):
+    cmodel = causalmodel(backdoor(rows=500))
+    frame = cf._projectframe(cmodel, ['X', 'Y'])
+    assert np.shares_memory(frame['Y'].to_numpy(), cmodel._data['Y'].to_numpy())
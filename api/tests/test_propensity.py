@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+import CausalFastAPI as cf
+
+METHODS = {'stratification': ('backdoor.propensity_score_stratification', {'num_strata': 50, 'clipping_threshold': 5}),
+           'matching': ('backdoor.propensity_score_matching', None),
+           'weighting': ('backdoor.propensity_score_weighting', {'weighting_scheme': 'ips_weight'})}
+
+
+def test_one_fit_matches_dowhy_for_every_method_and_unit(backdoor, causalmodel):
+    data = backdoor(rows=1500)
+    result = cf.propensityestimate(causalmodel(data))
+    assert result.nobs == 1500 and result.treated == int(data['X'].sum())
+    for name, (method_name, method_params) in METHODS.items():
+        for units in ('att', 'atc', 'ate'):
+            cmodel = causalmodel(data.copy())
+            identified_estimand = cmodel.identify_effect(proceed_when_unidentifiable=True)
+            expected = cmodel.estimate_effect(identified_estimand, method_name=method_name, method_params=method_params, target_units=units)
+            assert np.isclose(getattr(result, name)[units], expected.value, atol=1e-6), (name, units)
+
+
+def test_caliper_leaves_out_distant_matches(backdoor, causalmodel):
+    data = backdoor(rows=1500)
+    loose = cf.propensityestimate(causalmodel(data))
+    tight = cf.propensityestimate(causalmodel(data), caliper=1e-4)
+    assert sum(loose.unmatched.values()) == 0 and sum(tight.unmatched.values()) > 0
+
+
+def test_binary_treatment_required(backdoor, causalmodel):
+    data = backdoor(rows=300)
+    data['X'] = data['X'] * 2.0
+    with pytest.raises(ValueError, match='binary'):
+        cf.propensityestimate(causalmodel(data))
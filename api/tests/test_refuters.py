@@ -0,0 +1,22 @@
+import numpy as np
+
+import CausalFastAPI as cf
+
+
+def test_refutations_do_not_depend_on_worker_count(tutorial):
+    cmodel = tutorial('backdoor')
+    serial = cf.functions.simulator(cmodel, refute=True, random_seed=0, verbose=False)
+    parallel = cf.functions.simulator(cmodel, refute=True, random_seed=0, verbose=False, refute_workers=2)
+    assert [r.random_seed for r in serial.refutations] == [r.random_seed for r in parallel.refutations]
+    for one, other in zip(serial.refutations, parallel.refutations):
+        assert one.refuter == other.refuter and np.isclose(one.new_effect, other.new_effect), one.refuter
+        assert one.p_value == other.p_value or np.isclose(one.p_value, other.p_value), one.refuter
+
+
+def test_serial_refuters_leave_the_global_generator_alone(tutorial):
+    cmodel = tutorial('backdoor')
+    np.random.seed(123)
+    expected = np.random.random(3)
+    np.random.seed(123)
+    cf.functions.simulator(cmodel, refute=True, random_seed=0, verbose=False)
+    assert np.array_equal(np.random.random(3), expected)
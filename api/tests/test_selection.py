@@ -0,0 +1,25 @@
+import numpy as np
+import pandas as pd
+
+import CausalFastAPI as cf
+
+
+def _data(rows=100000, seed=0):
+    rng = np.random.default_rng(seed)
+    U = rng.normal(size=rows)
+    X = 0.5 * U + rng.normal(size=rows)
+    Y = (rng.random(rows) < 1 / (1 + np.exp(-(0.6 * X + 0.4 * U)))).astype(float)
+    return pd.DataFrame({'U': U, 'X': X, 'Y': Y})
+
+
+def test_changed_data_gets_a_new_estimator_selection(causalmodel):
+    data = _data()
+    graph = 'digraph {U->X; U->Y; X->Y;}'
+    first = cf.functions.simulator(causalmodel(data, graph=graph), refute=False, verbose=False)
+    assert first.method_name == 'backdoor.generalized_linear_model'
+    # Rows between the sampled fingerprint blocks stop Y being binary
+    edited = data.copy()
+    edited.loc[4100:4200, 'Y'] = 3.7
+    assert cf.datafingerprint(edited) == cf.datafingerprint(data)
+    second = cf.functions.simulator(causalmodel(edited, graph=graph), refute=False, verbose=False)
+    assert second.method_name == 'backdoor.linear_regression'
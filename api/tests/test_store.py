@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+import CausalFastAPI as cf
+
+
+def _run(cmodel, store, verbose=False, quiet=None):
+    if verbose == True:
+        with quiet():
+            return cf.functions.simulator(cmodel, method_name='backdoor.linear_regression', refute=False, store=store, verbose=True)
+    return cf.functions.simulator(cmodel, method_name='backdoor.linear_regression', refute=False, store=store, verbose=False)
+
+
+@pytest.mark.parametrize('verbose', [False, True])
+def test_hits_and_misses_return_the_same_type(backdoor, causalmodel, tmp_path, quiet, verbose):
+    store = cf.ResultStore(tmp_path / 'results.db')
+    cmodel = causalmodel(backdoor(rows=500))
+    miss = _run(cmodel, store, verbose, quiet)
+    hit = _run(cmodel, store, verbose, quiet)
+    if verbose == True:
+        (miss, missscores), (hit, hitscores) = miss, hit
+        assert missscores is None and hitscores is None
+    assert type(miss) is cf.SimulatorResult and type(hit) is cf.SimulatorResult
+    assert miss.estimate is not None and hit.estimate is None
+    assert hit.value == miss.value and len(store) == 1
+
+
+def test_edits_between_sampled_blocks_miss_the_store(backdoor, causalmodel, tmp_path):
+    store = cf.ResultStore(tmp_path / 'results.db')
+    data = backdoor(rows=200000)
+    cmodel = causalmodel(data)
+    first = _run(cmodel, store)
+    sampled = cf.datafingerprint(cmodel._data)
+    # Row 5000 lies between the first two sampled blocks of 4096 rows
+    cmodel._data.loc[5000, 'Y'] += 1000.0
+    assert cf.datafingerprint(cmodel._data) == sampled
+    second = _run(cmodel, store)
+    assert second.estimate is not None and second.value != first.value and len(store) == 2
+
+
+def test_stored_results_cannot_score_conditional_effects(backdoor, causalmodel, tmp_path, quiet):
+    store = cf.ResultStore(tmp_path / 'results.db')
+    data = backdoor(rows=500)
+    cmodel = causalmodel(data)
+    miss = _run(cmodel, store)
+    scored = cf.functions.catesimulator(miss, data, verbose=False)
+    assert np.allclose(scored['effect'], miss.value)
+    hit = _run(cmodel, store)
+    with pytest.raises(ValueError, match='result store'):
+        cf.functions.catesimulator(hit, data, verbose=False)
+    with pytest.raises(ValueError, match='result store'):
+        cf.functions.catesimulator(_run(cmodel, store, True, quiet), data, verbose=False)
+    with pytest.raises(ValueError, match='result store'):
+        cf.cateestimate(hit, data)
+
+
+def test_full_output_and_target_units_are_part_of_the_key(backdoor, causalmodel, tmp_path, quiet):
+    store = cf.ResultStore(tmp_path / 'results.db')
+    cmodel = causalmodel(backdoor(rows=2000), outcome='B')
+    run = lambda full_output: cf.functions.simulator(cmodel, method_name='backdoor.propensity_score_stratification', unit='att',
+                                                     full_output=full_output, refute=False, store=store, verbose=False)
+    with quiet():
+        # full_output estimates the ATE whatever unit says; the default DoWhy mode estimates the requested ATT
+        full = run(True)
+        att = run(False)
+        again = run(False)
+    assert full.target_units == 'ate' and att.target_units == 'att'
+    assert att.estimate is not None and att.value != full.value and len(store) == 2
+    assert again.estimate is None and again.value == att.value
@@ -0,0 +1,33 @@
+import numpy as np
+import statsmodels.api as sm
+
+import CausalFastAPI as cf
+
+BACKDOOR = 'digraph {U->X; U->Y; W->X; W->Y; X->Y;}'
+
+
+def _dowhy(causalmodel, data, outcome, method_name, method_params=None):
+    cmodel = causalmodel(data, outcome=outcome)
+    identified_estimand = cmodel.identify_effect(proceed_when_unidentifiable=True)
+    return cmodel.estimate_effect(identified_estimand, method_name=method_name, method_params=method_params)
+
+
+def test_streamed_ols_matches_dowhy(backdoor, causalmodel, tmp_path):
+    data = backdoor(rows=3000)
+    result = cf.streamestimate(data, BACKDOOR, 'X', 'Y', method_name='backdoor.linear_regression', chunksize=700)
+    expected = _dowhy(causalmodel, data, 'Y', 'backdoor.linear_regression')
+    assert result.nobs == 3000 and np.isclose(result.value, expected.value)
+    assert np.isclose(result.std_error, np.ravel(expected.get_standard_error())[0])
+    path = tmp_path / 'rows.csv'
+    data.to_csv(path, index=False)
+    fromfile = cf.streamestimate(str(path), BACKDOOR, 'X', 'Y', method_name='backdoor.linear_regression', chunksize=700)
+    assert np.isclose(fromfile.value, result.value)
+
+
+def test_streamed_glm_matches_dowhy(backdoor, causalmodel):
+    data = backdoor(rows=3000)
+    graph = BACKDOOR.replace('Y', 'B')
+    result = cf.streamestimate(data, graph, 'X', 'B', chunksize=700)
+    expected = _dowhy(causalmodel, data, 'B', 'backdoor.generalized_linear_model', {'glm_family': sm.families.Binomial()})
+    assert result.method_name == 'backdoor.generalized_linear_model' and result.converged == True
+    assert np.isclose(result.value, expected.value, atol=1e-8)
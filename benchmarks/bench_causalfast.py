@@ -0,0 +1,172 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+
+try:
+    from causalfast import causalfastapi as cf
+except ImportError:
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+    import CausalFastAPI as cf
+
+import dowhy
+
+KINDS = ['backdoor', 'frontdoor', 'iv']
+
+
+def benchgraph(kind, nodes):
+    # Canonical estimand structure, padded with extra observed nodes up to the requested node count
+    if kind == 'backdoor':
+        extra = max(nodes - 2, 1)
+        edges = [('X', 'Y', 0.65)]
+        for i in range(extra):
+            edges += [('W' + str(i), 'X', 0.19), ('W' + str(i), 'Y', 0.36)]
+            if i > 0:
+                edges.append(('W' + str(i - 1), 'W' + str(i), 0.3))
+        observed = ['X', 'Y'] + ['W' + str(i) for i in range(extra)]
+    elif kind == 'frontdoor':
+        extra = max(nodes - 4, 0)
+        edges = [('U', 'X', 0.19), ('X', 'M', 0.75), ('M', 'Y', 0.90), ('U', 'Y', 0.36)]
+        edges += [('C' + str(i), 'Y', 0.1) for i in range(extra)]
+        observed = ['X', 'Y', 'M'] + ['C' + str(i) for i in range(extra)]
+    else:
+        extra = max(nodes - 4, 0)
+        edges = [('Z', 'X', 0.70), ('U', 'X', 0.19), ('U', 'Y', 0.36), ('X', 'Y', 0.90)]
+        edges += [('C' + str(i), 'Y', 0.1) for i in range(extra)]
+        observed = ['X', 'Y', 'Z'] + ['C' + str(i) for i in range(extra)]
+    return edges, observed
+
+
+def quietly(call, *args, **kwargs):
+    # makegraph and the simulators print their menus; only the timings are reported
+    with contextlib.redirect_stdout(io.StringIO()):
+        return call(*args, **kwargs)
+
+
+def batchspecs(observed):
+    # The main effect plus the total effects of up to three covariates, all over the one dataset and DAG
+    return [('X', 'Y')] + [(name, 'Y') for name in observed if name not in ('X', 'Y', 'M')][:3]
+
+
+def compiledcase(edges, observed):
+    # Large graphs go through compilegraph() and minimal-adjustment: DoWhy's own backdoor search is exponential in the node count.
+    # False when the compiled graph cannot identify X -> Y by adjustment (frontdoor and iv hide a confounder), so DoWhy would search
+    return cf.CompiledGraph([(parent, child) for parent, child, _ in edges], observed=observed).estimand('X', 'Y', observed) is not None
+
+
+def runcase(kind, rows, nodes, refute, seed, compiled=False):
+    # Every stage is timed by an Instrument: the setup stages here, makegraph's and the simulators' stages by the functions themselves
+    edges, observed = benchgraph(kind, nodes)
+    setup = cf.Instrument()
+    with setup.stage('generate'):
+        data = cf.scmdata(edges, samples=rows, seed=seed, observed=observed, dtype=np.float64)
+    with setup.stage('eda'):
+        cf.edasummary(data, cardinality=False)
+    cmodel, dot = quietly(cf.functions.makegraph, function='makecausalmodel', edges=[(parent, child) for parent, child, _ in edges],
+                          dataset=data, treatment='X', outcome='Y', verbose=False, instrument=setup)[:2]
+    digraph, identifier = dot, 'default'
+    if compiled == True:
+        with setup.stage('compilegraph'):
+            digraph = cf.functions.compilegraph(dot, pairs=batchspecs(observed), dataset=data, verbose=False)
+        cmodel, identifier = digraph.causalmodel(data, 'X', 'Y'), 'minimal-adjustment'
+    simulator = cf.Instrument()
+    cf.functions.simulator(cmodel, identifier=identifier, refute=refute, random_seed=seed, cache=False, verbose=False, instrument=simulator)
+    batch = cf.Instrument()
+    specs = quietly(cf.functions.batchsimulator, dataset=data, digraph=digraph, specs=batchspecs(observed), identifier=identifier,
+                    cache=False, verbose=False, instrument=batch)
+    failed = specs[specs['error'].notna()]
+    if len(failed) > 0:
+        raise RuntimeError(kind + ' batch specs failed: ' + '; '.join(failed['treatment'] + ': ' + failed['error']))
+    results = {}
+    for prefix, instrument in (('', setup), ('simulator.', simulator), ('', batch)):
+        for name, timing in instrument.summary().items():
+            results[prefix + name] = {'seconds': timing.wall_seconds, 'cpu_seconds': timing.cpu_seconds,
+                                      'rows_per_second': rows / timing.wall_seconds if timing.wall_seconds > 0 else float('inf'),
+                                      'peak_rss_mb': timing.peak_rss_mb}
+    return results
+
+
+def compare(current, baseline, tolerance, memory_tolerance):
+    # A stage regresses when its wall time or its own peak RSS grows past the tolerance
+    regressions = []
+    for key, stats in current.items():
+        if key not in baseline:
+            continue
+        for metric, allowed in (('seconds', tolerance), ('peak_rss_mb', memory_tolerance)):
+            before, after = baseline[key].get(metric), stats[metric]
+            if before is None or after is None or before <= 0:
+                continue
+            ratio = after / before
+            if ratio > 1 + allowed:
+                regressions.append((key, metric, before, after, ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time simulator() and batchsimulator() stages on generated backdoor, frontdoor and iv datasets.')
+    parser.add_argument('--kinds', nargs='+', default=KINDS, choices=KINDS)
+    parser.add_argument('--rows', nargs='+', type=int, default=[1000, 10000, 100000])
+    parser.add_argument('--nodes', nargs='+', type=int, default=[3, 20])
+    parser.add_argument('--refute-max-rows', type=int, default=10000,
+                        help='run the refuter battery only for datasets up to this many rows (0 disables refuters)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the results as JSON to this path')
+    parser.add_argument('--baseline', help='JSON results from an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown vs baseline before a stage is flagged')
+    parser.add_argument('--memory-tolerance', type=float, default=0.25, help='allowed growth of a stage\'s peak RSS vs baseline')
+    parser.add_argument('--quick', action='store_true', help='one small case per estimand with refuters (CI smoke run)')
+    parser.add_argument('--large', action='store_true', help='1e3 to 1e7 rows and 3 to 200 nodes (cases above --max-cells are skipped)')
+    parser.add_argument('--max-cells', type=float, default=1e8, help='skip cases with more than this many rows x nodes')
+    parser.add_argument('--compile-nodes', type=int, default=50,
+                        help='graphs with at least this many nodes use compilegraph() and identifier=minimal-adjustment')
+    args = parser.parse_args(argv)
+    if args.quick == True:
+        args.rows, args.nodes, args.refute_max_rows = [1000], [3], 1000
+    elif args.large == True:
+        args.rows, args.nodes = [1000, 10000, 100000, 1000000, 10000000], [3, 20, 200]
+
+    # Untimed first pass, so lazy imports and first-call setup inside DoWhy do not land on the first case
+    runcase('backdoor', 200, 3, False, args.seed)
+    current = {}
+    print('CausalFast benchmark  dowhy', dowhy.__version__, ' numpy', np.__version__)
+    print('%-60s %10s %10s %14s %12s' % ('stage', 'seconds', 'cpu', 'rows/second', 'peak RSS MB'))
+    for kind in args.kinds:
+        for nodes in args.nodes:
+            compiled = nodes >= args.compile_nodes
+            if compiled == True and not compiledcase(*benchgraph(kind, nodes)):
+                print('%-60s skipped: no adjustment set, DoWhy would search every subset' % '/'.join([kind, '*', str(nodes)]))
+                continue
+            for rows in args.rows:
+                if rows * nodes > args.max_cells:
+                    print('%-60s skipped: more than --max-cells rows x nodes' % '/'.join([kind, str(rows), str(nodes)]))
+                    continue
+                refute = args.refute_max_rows > 0 and rows <= args.refute_max_rows
+                for name, stats in runcase(kind, rows, nodes, refute, args.seed, compiled=compiled).items():
+                    key = '/'.join([kind, str(rows), str(nodes), name])
+                    current[key] = stats
+                    print('%-60s %10.4f %10.4f %14.0f %12s' % (key, stats['seconds'], stats['cpu_seconds'], stats['rows_per_second'],
+                                                               '--' if stats['peak_rss_mb'] is None else '%.1f' % stats['peak_rss_mb']))
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump({'dowhy': dowhy.__version__, 'numpy': np.__version__, 'results': current}, handle, indent=1)
+    if args.baseline:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)['results']
+        regressions = compare(current, baseline, args.tolerance, args.memory_tolerance)
+        print('')
+        print('Regressions vs', args.baseline, '(time tolerance', str(int(args.tolerance * 100)) + '%, memory tolerance',
+              str(int(args.memory_tolerance * 100)) + '%):', len(regressions))
+        for key, metric, before, after, ratio in regressions:
+            print('%-60s %-12s %10.4f -> %10.4f  x%.2f' % (key, metric, before, after, ratio))
+        return 1 if len(regressions) > 0 else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,74 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+API = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api')
+
+HEAVY = ['dowhy', 'econml', 'sklearn', 'statsmodels', 'scipy.stats', 'matplotlib', 'matplotlib.pyplot', 'networkx', 'pydot']
+
+# Each scenario runs in a fresh interpreter, so every measurement is a cold start
+SCENARIOS = {
+    'import': '',
+    'graph': '''
+edges = [('U', 'X', 0.19), ('U', 'Y', 0.36), ('X', 'Y', 0.65)]
+data = cf.scmdata(edges, samples=1000, seed=0)
+digraph = cf.functions.makegraph(function='makecausalmodel', edges=[edge[:2] for edge in edges], verbose=False)
+cf.datafingerprint(data)
+''',
+    'ols': '''
+import contextlib, io
+with contextlib.redirect_stdout(io.StringIO()):
+    model = cf.functions.makegraph(function='tutorial', model='backdoor', samples=1000, seed=0, verbose=False)[0]
+    cf.functions.simulator(model, method_name='backdoor.linear_regression', refute=False, verbose=False)
+''',
+}
+
+RUNNER = '''
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {api!r})
+import CausalFastAPI as cf
+imported = time.perf_counter()
+{body}
+done = time.perf_counter()
+print(json.dumps({{'import': imported - start, 'total': done - start, 'modules': [name for name in {heavy!r} if name in sys.modules]}}))
+'''
+
+
+def runscenario(api, body, repeats):
+    runs = []
+    for _ in range(repeats):
+        code = RUNNER.format(api=api, body=body, heavy=HEAVY)
+        output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True,
+                                env=dict(os.environ, MPLBACKEND='Agg')).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return {'import': statistics.median(run['import'] for run in runs),
+            'total': statistics.median(run['total'] for run in runs),
+            'modules': runs[-1]['modules']}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Cold-start time of importing CausalFast and of short graph and OLS jobs.')
+    parser.add_argument('--api', nargs='+', default=[API], help='directories holding a CausalFastAPI.py to compare')
+    parser.add_argument('--scenarios', nargs='+', default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--output', default=None, help='write the results as JSON')
+    args = parser.parse_args(argv)
+    results = []
+    print('%-40s %-8s %10s %10s  %s' % ('api', 'scenario', 'import s', 'total s', 'heavy modules loaded'))
+    for api in args.api:
+        for scenario in args.scenarios:
+            result = runscenario(os.path.abspath(api), SCENARIOS[scenario], args.repeats)
+            result.update(api=api, scenario=scenario)
+            results.append(result)
+            print('%-40s %-8s %10.3f %10.3f  %s' % (api[-40:], scenario, result['import'], result['total'], ', '.join(result['modules'])))
+    if args.output is not None:
+        with open(args.output, 'w') as handle:
+            json.dump(results, handle, indent=2)
+
+
+if __name__ == '__main__':
+    main()